@@ -0,0 +1,140 @@
+"""Keep the discovered node and unit database between runs."""
+
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Final, TYPE_CHECKING
+
+from duotecno.protocol import EV_NODEDATABASEINFO_1
+
+if TYPE_CHECKING:
+    from duotecno.controller import PyDuotecno
+
+CACHE_VERSION: Final = 1
+
+_log = logging.getLogger("pyduotecno-cache")
+
+
+def default_path(host: str, port: int) -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "duotecno", f"{host}-{port}.json")
+
+
+def read_cache(path: str) -> dict[str, Any] | None:
+    """The cache content, None if it is missing or unusable."""
+    try:
+        with open(path) as fh:
+            data = json.load(fh)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        _log.warning(f"Ignoring cache {path}: {e}")
+        return None
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+        _log.warning(f"Ignoring cache {path}: unknown version")
+        return None
+    return data
+
+
+def drop_cache(path: str) -> None:
+    """Remove the cache, the next connect discovers the database again."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def save_cache(controller: PyDuotecno, path: str, **extra: Any) -> None:
+    """Write the database frames of a discovered controller.
+
+    extra keys are stored next to the frames, an existing cache keeps the
+    keys that are not overwritten.
+    """
+    data = read_cache(path) or {}
+    data.update(extra)
+    data.update(
+        version=CACHE_VERSION,
+        host=controller.host,
+        port=controller.port,
+        # the node count (64,0) would start a new discovery, not needed
+        frames=[
+            frame
+            for key, frame in controller.dbFrames.items()
+            if not key.startswith("64,0")
+        ],
+    )
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(data, fh)
+    os.replace(tmp, path)
+
+
+async def load_cache(controller: PyDuotecno, path: str) -> bool:
+    """Rebuild the nodes and units from the cache, without the gateway.
+
+    The frames go through the same path as a live discovery, with
+    config.auto_tune the settings tuned at that discovery are used, the
+    other settings of controller.config are kept. Returns
+    False (and leaves no nodes behind) when the cache is missing, is for
+    another gateway or is incomplete.
+    """
+    data = read_cache(path)
+    if not data or (data.get("host"), data.get("port")) != (
+        controller.host,
+        controller.port,
+    ):
+        return False
+    for frame in data["frames"]:
+        await controller._handlePacket(controller._parsePacket(frame))
+    nodes = controller.nodes.values()
+    if not nodes or not all(node.isLoaded.is_set() for node in nodes):
+        _log.warning(f"Ignoring cache {path}: incomplete")
+        controller.nodes = {}
+        controller.dbFrames = {}
+        controller.topology.clear()
+        return False
+    controller.numNodes = len(controller.nodes)
+    if controller.config.auto_tune and data.get("config"):
+        controller.config = controller.config.with_tuning(data["config"])
+    return True
+
+
+async def validate_cache(controller: PyDuotecno) -> bool:
+    """Check a loaded cache against the connected gateway.
+
+    Only the node count (64,0) and the node frames (64,1) are requested,
+    one frame per node instead of one per unit. False when a node or the
+    unit count of a node differs, or the gateway does not answer in time.
+    """
+    cached = {addr: len(node.units) for addr, node in controller.nodes.items()}
+    live: dict[int, int] = {}
+    numNodes: list[int] = []
+
+    def collect(frame: str) -> None:
+        if frame.startswith("64,0,"):
+            numNodes.append(int(frame.split(",")[2]))
+        elif frame.startswith("64,1,"):
+            info = controller._parsePacket(frame).cls
+            if isinstance(info, EV_NODEDATABASEINFO_1):
+                live[info.address] = info.numUnits
+
+    async def collected() -> None:
+        while not numNodes or len(live) < numNodes[-1]:
+            await asyncio.sleep(controller.config.load_poll)
+
+    controller.rawListeners.append(collect)
+    try:
+        await controller.write("[209,0]")
+        await asyncio.wait_for(collected(), controller.config.load_node_timeout)
+    except TimeoutError:
+        _log.warning("Cache not validated: no node count from the gateway")
+        return False
+    finally:
+        controller.rawListeners.remove(collect)
+    if live != cached:
+        _log.warning(f"Cache is out of date: {cached} units, gateway {live}")
+        return False
+    return True
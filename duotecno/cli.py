@@ -0,0 +1,383 @@
+"""The duotecno command line tool.
+
+duotecno --host 192.168.1.10 --port 5001 --password secret discover
+duotecno tail --unit 1.2 --type UnitStateEvent
+duotecno get 1.2 1.3
+duotecno set commands.txt
+duotecno probe --count 20
+duotecno bench
+
+Connection details can also come from DUOTECNO_HOST, DUOTECNO_PORT and
+DUOTECNO_PASSWORD.
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from collections.abc import Iterator
+from typing import Any, TextIO
+
+from duotecno import events
+from duotecno.cache import default_path
+from duotecno.config import Config
+from duotecno.controller import PyDuotecno
+from duotecno.exceptions import InvalidPassword, LoadFailure
+from duotecno.hub import STATUS_CODES
+from duotecno.unit import BaseUnit
+
+
+def _unit_id(text: str) -> tuple[int, int]:
+    """ "1.2" => (1, 2)"""
+    try:
+        address, unit = text.split(".")
+        return int(address), int(unit)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a unit (address.unit): {text}")
+
+
+def _value(text: str) -> Any:
+    for conv in (int, float):
+        try:
+            return conv(text)
+        except ValueError:
+            pass
+    return text
+
+
+def _stats(samples: list[float]) -> str:
+    ms = [s * 1000 for s in samples]
+    return (
+        f"min {min(ms):.1f} ms, median {statistics.median(ms):.1f} ms, "
+        f"max {max(ms):.1f} ms ({len(ms)} samples)"
+    )
+
+
+async def _connect(args: argparse.Namespace) -> PyDuotecno:
+    if not args.host or not args.port:
+        raise SystemExit("--host and --port (or DUOTECNO_HOST/PORT) are required")
+    ctrl = PyDuotecno(Config(auto_tune=args.auto_tune))
+    cache = None
+    if not args.no_cache:
+        cache = args.cache or default_path(args.host, args.port)
+        if getattr(args, "refresh", False) and os.path.exists(cache):
+            os.remove(cache)
+    start = time.perf_counter()
+    await ctrl.connect(args.host, args.port, args.password, cache=cache)
+    took = time.perf_counter() - start
+    args.log.info(f"Connected in {took:.1f}s, {len(ctrl.topology)} units")
+    return ctrl
+
+
+def _get_unit(ctrl: PyDuotecno, uid: tuple[int, int]) -> BaseUnit:
+    try:
+        return ctrl.nodes[uid[0]].units[uid[1]]
+    except KeyError:
+        raise SystemExit(f"Unknown unit {uid[0]}.{uid[1]}")
+
+
+def _lines(path: str) -> Iterator[tuple[int, str]]:
+    fh: TextIO = sys.stdin if path == "-" else open(path)
+    with fh:
+        for num, line in enumerate(fh, 1):
+            line = line.split("#", 1)[0].strip()
+            if line:
+                yield num, line
+
+
+def _format_event(event: events.Event) -> str:
+    ts = time.strftime("%H:%M:%S", time.localtime(event.timestamp))
+    ts += f".{int(event.timestamp * 1000) % 1000:03d}"
+    where = "" if event.address is None else str(event.address)
+    if event.unit is not None:
+        where += f".{event.unit}"
+    if isinstance(event, events.UnitStateEvent):
+        pending = " (pending)" if event.pending else ""
+        detail = f"{event.name!r} {event.changes}{pending}"
+    elif isinstance(event, events.NodeAvailabilityEvent):
+        detail = f"available={event.available} units={event.units}"
+    elif isinstance(event, events.RawPacketEvent):
+        detail = f"{event.packet.cmdName} {event.packet.cls}"
+    else:
+        detail = ""
+    return f"{ts} {type(event).__name__:22} {where:6} {detail}"
+
+
+async def cmd_discover(args: argparse.Namespace) -> None:
+    ctrl = await _connect(args)
+    try:
+        if args.json:
+            print(ctrl.snapshot().decode())
+            return
+        for node in ctrl.nodes.values():
+            print(f"node {node.address} {node.name!r} {node.nodeType.name}")
+            for unit in node.get_units():
+                print(
+                    f"  {node.address}.{unit.get_number():<3} "
+                    f"{type(unit).__name__:15} {unit.get_name()}"
+                )
+        summary = ctrl.topology.summary()
+        print(f"{summary['nodes']} nodes, {summary['units']} units")
+        for name, num in sorted(summary["types"].items()):
+            print(f"  {name:15} {num}")
+        config = ctrl.config
+        if config.rtt is not None:
+            print(
+                f"tuned: rtt {config.rtt * 1000:.1f} ms, {config.rate:.0f} replies/s, "
+                f"window {config.max_inflight}, poll budget {config.poll_budget}/s"
+            )
+    finally:
+        await ctrl.disconnect()
+
+
+async def cmd_tail(args: argparse.Namespace) -> None:
+    types = None
+    if args.type:
+        types = []
+        for name in args.type:
+            cls = getattr(events, name, None)
+            if not (isinstance(cls, type) and issubclass(cls, events.Event)):
+                raise SystemExit(f"Unknown event type {name}")
+            types.append(cls)
+    ctrl = await _connect(args)
+    stream = ctrl.events(nodes=args.node, units=args.unit, types=types)
+    try:
+        async for event in stream:
+            print(_format_event(event), flush=True)
+    finally:
+        stream.close()
+        await ctrl.disconnect()
+
+
+async def cmd_get(args: argparse.Namespace) -> None:
+    uids = list(args.units)
+    if args.file:
+        uids += [_unit_id(line.split()[0]) for _num, line in _lines(args.file)]
+    ctrl = await _connect(args)
+    try:
+        if uids:
+            states = [_get_unit(ctrl, uid).to_dict() for uid in uids]
+        else:
+            states = json.loads(ctrl.snapshot())
+        for state in states:
+            print(json.dumps(state))
+    finally:
+        await ctrl.disconnect()
+
+
+async def cmd_set(args: argparse.Namespace) -> None:
+    """One command per line: <address>.<unit> <method> [args], ex 1.2 turn_on"""
+    commands = []
+    for num, line in _lines(args.file):
+        uid, method, *params = line.split()
+        if method.startswith("_"):
+            raise SystemExit(f"line {num}: not a public method: {method}")
+        commands.append((num, _unit_id(uid), method, [_value(p) for p in params]))
+    ctrl = await _connect(args)
+    failed = 0
+    try:
+        for num, (address, number), method, params in commands:
+            unit = _get_unit(ctrl, (address, number))
+            try:
+                await getattr(unit, method)(*params)
+                if args.confirm and not await unit.wait_confirmed(args.timeout):
+                    raise TimeoutError("not confirmed")
+                print(f"line {num}: {address}.{number} {method} ok")
+            except Exception as e:
+                failed += 1
+                print(f"line {num}: {address}.{number} {method} failed: {e!r}")
+        await ctrl.flush()
+    finally:
+        await ctrl.disconnect()
+    if failed:
+        raise SystemExit(1)
+
+
+async def _status_rtt(ctrl: PyDuotecno, unit: BaseUnit, timeout: float) -> float:
+    """Seconds until the status of unit arrives, raises TimeoutError."""
+    fut: asyncio.Future[float] = asyncio.get_running_loop().create_future()
+    want = [str(unit.get_node_address()), str(unit.get_number())]
+
+    def listener(frame: str) -> None:
+        p = frame.split(",", 5)
+        if p[0] in STATUS_CODES and p[2:4] == want and not fut.done():
+            fut.set_result(time.perf_counter())
+
+    ctrl.rawListeners.append(listener)
+    try:
+        start = time.perf_counter()
+        # also the units that are not asked at connect time, ex. sensunits
+        await unit.pollStatus()
+        return await asyncio.wait_for(fut, timeout) - start
+    finally:
+        ctrl.rawListeners.remove(listener)
+
+
+async def cmd_probe(args: argparse.Namespace) -> None:
+    ctrl = await _connect(args)
+    try:
+        hb = []
+        for _i in range(args.count):
+            ctrl.heartbeatReceived.clear()
+            start = time.perf_counter()
+            await ctrl.write("[215,1]")
+            try:
+                await asyncio.wait_for(ctrl.heartbeatReceived.wait(), args.timeout)
+            except TimeoutError:
+                print(f"heartbeat      no reply within {args.timeout}s")
+                raise SystemExit(1)
+            hb.append(time.perf_counter() - start)
+        print(f"heartbeat      {_stats(hb)}")
+        if args.unit:
+            unit = _get_unit(ctrl, args.unit)
+        else:
+            units = ctrl.topology.by_type(["SwitchUnit", "DimUnit", "DuoswitchUnit"])
+            if not units:
+                return
+            unit = units[0]
+        label = f"status {unit.get_node_address()}.{unit.get_number():<5}"
+        try:
+            rtt = [
+                await _status_rtt(ctrl, unit, args.timeout)
+                for _i in range(args.count)
+            ]
+        except TimeoutError:
+            print(f"{label} no reply within {args.timeout}s")
+            raise SystemExit(1)
+        print(f"{label} {_stats(rtt)}")
+        print(f"queues         {ctrl.queue_stats()}")
+        print(f"framing        {ctrl.framing.stats()}")
+    finally:
+        await ctrl.disconnect()
+
+
+async def cmd_bench(args: argparse.Namespace) -> None:
+    from duotecno.simulator import FakeGateway
+
+    gw = FakeGateway.generate(args.nodes, args.units, "bench")
+    await gw.start()
+    ctrl = PyDuotecno()
+    try:
+        start = time.perf_counter()
+        await ctrl.connect("127.0.0.1", gw.port, "bench")
+        took = time.perf_counter() - start
+        print(f"discovery      {len(ctrl.topology)} units in {took:.2f}s")
+        switch = ctrl.topology.by_type("SwitchUnit")[0]
+        addr, num = switch.get_node_address(), switch.get_number()
+        rtt = [await _status_rtt(ctrl, switch, 5.0) for _i in range(args.count)]
+        print(f"status         {_stats(rtt)}")
+        # a burst of status changes, as fast as the controller reads them
+        stream = ctrl.events(units=[(addr, num)], types=[events.UnitStateEvent])
+        blob = b"".join(
+            b"[6,0,%d,%d,2,0,%d]\r\n" % (addr, num, i % 2) for i in range(args.frames)
+        )
+        start = last = time.perf_counter()
+        gw.inject(blob)
+        received = 0
+        # under pressure status packets are coalesced, not every frame
+        # becomes an event
+        while received < args.frames:
+            try:
+                await asyncio.wait_for(stream.__anext__(), 2.0)
+            except TimeoutError:
+                break
+            received += 1
+            last = time.perf_counter()
+        stream.close()
+        took = last - start
+        print(
+            f"status burst   {args.frames} frames, {received} events in "
+            f"{took:.2f}s, {args.frames / took:.0f} frames/s"
+        )
+        print(f"queues         {ctrl.queue_stats()}")
+    finally:
+        await ctrl.disconnect()
+        await gw.stop()
+
+
+def _parser() -> argparse.ArgumentParser:
+    env = os.environ.get
+    parser = argparse.ArgumentParser(
+        prog="duotecno",
+        description="Talk to a duotecno ip gateway.",
+        epilog="The connection details can also come from DUOTECNO_HOST, "
+        "DUOTECNO_PORT and DUOTECNO_PASSWORD.",
+    )
+    parser.add_argument("--host", default=env("DUOTECNO_HOST"))
+    parser.add_argument("--port", type=int, default=env("DUOTECNO_PORT"))
+    parser.add_argument("--password", default=env("DUOTECNO_PASSWORD", ""))
+    parser.add_argument("--cache", help="database cache file")
+    parser.add_argument("--no-cache", action="store_true", help="always discover")
+    parser.add_argument(
+        "--auto-tune",
+        action="store_true",
+        help="tune the timing at discovery, kept in the cache",
+    )
+    parser.add_argument("-v", "--verbose", action="count", default=0)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("discover", help="dump the nodes and units")
+    p.add_argument("--json", action="store_true", help="unit states as json")
+    p.add_argument("--refresh", action="store_true", help="ignore the cache")
+    p.set_defaults(func=cmd_discover)
+
+    p = sub.add_parser("tail", help="print the decoded events")
+    p.add_argument("--node", type=int, action="append", help="node address")
+    p.add_argument("--unit", type=_unit_id, action="append", help="address.unit")
+    p.add_argument("--type", action="append", help="event class, ex NodeResetEvent")
+    p.set_defaults(func=cmd_tail)
+
+    p = sub.add_parser("get", help="print unit states as json lines")
+    p.add_argument("units", type=_unit_id, nargs="*", help="address.unit")
+    p.add_argument("--file", help="file with a unit per line, - for stdin")
+    p.set_defaults(func=cmd_get)
+
+    p = sub.add_parser("set", help="run unit commands from a file")
+    p.add_argument("file", help="lines of <address>.<unit> <method> [args]")
+    p.add_argument("--confirm", action="store_true", help="wait for the status")
+    p.add_argument("--timeout", type=float, default=5.0)
+    p.set_defaults(func=cmd_set)
+
+    p = sub.add_parser("probe", help="heartbeat and status round-trip times")
+    p.add_argument("--unit", type=_unit_id, help="address.unit to probe")
+    p.add_argument("--count", type=int, default=10)
+    p.add_argument("--timeout", type=float, default=5.0)
+    p.set_defaults(func=cmd_probe)
+
+    p = sub.add_parser("bench", help="benchmark against a simulated gateway")
+    p.add_argument("--nodes", type=int, default=4)
+    p.add_argument("--units", type=int, default=16)
+    p.add_argument("--frames", type=int, default=5000)
+    p.add_argument("--count", type=int, default=20)
+    p.set_defaults(func=cmd_bench)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _parser().parse_args(argv)
+    logging.basicConfig(
+        stream=sys.stderr,
+        level=[logging.WARNING, logging.INFO, logging.DEBUG][min(args.verbose, 2)],
+        format="%(asctime)s %(levelname)-8s %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    args.log = logging.getLogger("pyduotecno-cli")
+    try:
+        asyncio.run(args.func(args))
+    except KeyboardInterrupt:
+        pass
+    except InvalidPassword:
+        raise SystemExit("Login failed, check the password")
+    except LoadFailure:
+        raise SystemExit("Discovery did not complete")
+    except OSError as e:
+        raise SystemExit(f"Connection failed: {e}")
+
+
+if __name__ == "__main__":
+    main()
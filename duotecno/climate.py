@@ -0,0 +1,60 @@
+"""Adjust many thermostats (SensUnits) at once."""
+
+from __future__ import annotations
+import asyncio
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+from duotecno.unit import SensUnit
+
+
+@dataclass
+class ZoneTarget:
+    """Wanted state of a thermostat, None means leave it as it is."""
+
+    on: bool | None = None
+    preset: int | None = None
+    # setpoint of the (new) active preset
+    temp: float | None = None
+
+
+async def _apply(unit: SensUnit, target: ZoneTarget) -> bool:
+    """Send only the commands needed to reach the target."""
+    sent = False
+    if target.on is not None and target.on != unit.is_on():
+        if target.on:
+            await unit.turn_on()
+        else:
+            await unit.turn_off()
+        sent = True
+    preset = unit.get_preset() if target.preset is None else target.preset
+    if preset != unit.get_preset():
+        await unit.set_preset(preset)
+        sent = True
+    if target.temp is not None and round(target.temp, 1) != unit.get_setpoint(preset):
+        await unit.set_setpoint(preset, target.temp)
+        sent = True
+    return sent
+
+
+async def apply_targets(
+    targets: Mapping[SensUnit, ZoneTarget], timeout: float = 5.0
+) -> dict[SensUnit, bool]:
+    """Bring a set of zones to their target state.
+
+    Commands for values that are already (or about to be) correct are
+    skipped, all commands are queued first and then the confirmations
+    are awaited together. Zones that did not confirm in time (or whose
+    command was refused) get their status refreshed, returns per unit if
+    it was confirmed.
+    """
+    changed = [unit for unit, target in targets.items() if await _apply(unit, target)]
+    res = {unit: True for unit in targets}
+    confirmed = await asyncio.gather(
+        *(unit.wait_confirmed(timeout) for unit in changed), return_exceptions=True
+    )
+    for unit, ok in zip(changed, confirmed):
+        res[unit] = ok is True
+        if ok is not True:
+            await unit.pollStatus()
+    return res
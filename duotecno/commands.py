@@ -0,0 +1,221 @@
+"""Typed FC_* commands and their encoder.
+
+A Command is the code, the method and the arguments of a frame that is
+sent to the gateway, for the unit commands the address and unit are the
+first arguments. The arguments are checked against the known layout of
+the command before anything is encoded.
+"""
+
+from __future__ import annotations
+import math
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Final, NamedTuple
+
+from duotecno.protocol import MsgType, sens_encode_value
+
+# (name, min, max) of an argument
+Param = tuple[str, int, int]
+
+_ADDRESS: Final[Param] = ("address", 0, 255)
+_UNIT: Final[Param] = ("unit", 0, 255)
+_PRESET: Final[Param] = ("preset", 0, 3)
+
+# the digits of every byte value, so encoding is a lookup
+_TEXT: Final = tuple(str(i).encode() for i in range(256))
+
+
+@dataclass(frozen=True)
+class CommandSpec:
+    """Arguments of a command.
+
+    params come first for every method, methods adds the arguments of the
+    known methods. Unknown methods are only allowed when variadic, they
+    get any number of extra bytes after params.
+    """
+
+    params: tuple[Param, ...] = ()
+    methods: dict[int, tuple[Param, ...]] = field(default_factory=dict)
+    variadic: bool = False
+
+
+_UNIT_SET: Final = CommandSpec((_ADDRESS, _UNIT), variadic=True)
+
+SPECS: Final[dict[MsgType, CommandSpec]] = {
+    MsgType.FC_UNITDIMREQUESTSTATUS: _UNIT_SET,
+    MsgType.FC_UNITSENSSET: CommandSpec(
+        (_ADDRESS, _UNIT),
+        {
+            1: (_PRESET, ("msb", 0, 255), ("lsb", 0, 255)),
+            3: (("on", 0, 1),),
+            13: (_PRESET,),
+        },
+        variadic=True,
+    ),
+    MsgType.FC_UNITREQUESTSENSSTATUS: _UNIT_SET,
+    MsgType.FC_NODERESETSET: CommandSpec((_ADDRESS,), variadic=True),
+    MsgType.FC_UNITAUDIOBASICSET: _UNIT_SET,
+    MsgType.FC_UNITDIMSET: CommandSpec(
+        (_ADDRESS, _UNIT), {3: (("value", 0, 100),), 9: (), 10: ()}
+    ),
+    MsgType.FC_UNITSWITCHSET: CommandSpec((_ADDRESS, _UNIT), {2: (), 3: ()}),
+    MsgType.FC_UNITCONTROLSET: _UNIT_SET,
+    MsgType.FC_TIMEDATE: CommandSpec(
+        methods={
+            1: (
+                ("hour", 0, 23),
+                ("minute", 0, 59),
+                ("second", 0, 59),
+                ("weekday", 1, 7),
+                ("day", 1, 31),
+                ("month", 1, 12),
+                ("year", 0, 99),
+            )
+        }
+    ),
+    MsgType.FC_UNITIRTXSET: _UNIT_SET,
+    MsgType.FC_UNITDUOSWITCHSET: CommandSpec((_ADDRESS, _UNIT), {3: (), 4: (), 5: ()}),
+    MsgType.FC_UNITVIDEOMUXSET: _UNIT_SET,
+    MsgType.FC_UNITAVMATRIXSET: _UNIT_SET,
+    MsgType.FC_UNITALARMSET: _UNIT_SET,
+    MsgType.FC_UNITAUDIOEXTSET: _UNIT_SET,
+    MsgType.FC_NODEDATABASEREQUESTSTATUS: CommandSpec(
+        methods={
+            0: (),
+            1: (("index", 0, 255),),
+            2: (_ADDRESS, _UNIT),
+            3: (_ADDRESS, _UNIT, ("unitType", 0, 255)),
+            5: (),
+        }
+    ),
+    MsgType.FC_HEARTBEATREQUESTSTATUS: CommandSpec(methods={1: ()}),
+}
+# the rest has no known layout, only the bytes are checked
+for _code in MsgType:
+    if _code.name.startswith("FC_") and _code not in SPECS:
+        SPECS[_code] = CommandSpec(variadic=True)
+
+# (code, method) => (code as text, params, exact), filled in on first use
+_LAYOUTS: dict[tuple[MsgType, int], tuple[bytes, tuple[Param, ...], bool]] = {}
+
+
+def _layout(code: MsgType, method: int) -> tuple[bytes, tuple[Param, ...], bool]:
+    spec = SPECS.get(code)
+    if spec is None:
+        raise ValueError(f"{code} is not a command")
+    if not isinstance(method, int) or not 0 <= method <= 255:
+        raise ValueError(f"{code.name}: method {method} out of range")
+    params = spec.methods.get(method)
+    if params is None:
+        if spec.methods and not spec.variadic:
+            raise ValueError(f"{code.name}: unknown method {method}")
+        layout = (_TEXT[code.value], spec.params, False)
+    else:
+        layout = (_TEXT[code.value], spec.params + params, True)
+    _LAYOUTS[code, method] = layout
+    return layout
+
+
+class Command(NamedTuple):
+    code: MsgType
+    method: int
+    args: tuple[int, ...] = ()
+
+    def validate(self) -> None:
+        """Raise a ValueError if the command can not be sent like this."""
+        _check(self)
+
+    def encode(self) -> bytes:
+        return _frame(_check(self), self)
+
+
+def _check(cmd: Command) -> bytes:
+    """Validate cmd, returns its code as text."""
+    code, method, args = cmd
+    text, params, exact = _LAYOUTS.get((code, method)) or _layout(code, method)
+    _check_args(code, method, params, exact, args)
+    return text
+
+
+def _check_args(
+    code: MsgType,
+    method: int,
+    params: tuple[Param, ...],
+    exact: bool,
+    args: tuple[int, ...],
+) -> None:
+    if len(args) != len(params) and (exact or len(args) < len(params)):
+        raise ValueError(
+            f"{code.name},{method}: {len(params)} arguments expected, got {args}"
+        )
+    for arg, (name, low, high) in zip(args, params):
+        if not isinstance(arg, int) or not low <= arg <= high:
+            raise ValueError(
+                f"{code.name},{method}: {name} must be {low}-{high}, got {arg!r}"
+            )
+    for arg in args[len(params) :]:
+        if not isinstance(arg, int) or not 0 <= arg <= 255:
+            raise ValueError(f"{code.name},{method}: byte must be 0-255, got {arg!r}")
+
+
+def _frame(code: bytes, cmd: Command) -> bytes:
+    text = _TEXT
+    return b"[%b]\n" % b",".join([code, text[cmd[1]], *map(text.__getitem__, cmd[2])])
+
+
+def encode_into(buf: bytearray, cmd: Command) -> None:
+    """Validate cmd and append its frame to buf."""
+    buf += _frame(_check(cmd), cmd)
+
+
+def encode_batch(cmds: Iterable[Command]) -> bytes:
+    """All frames in one buffer, ready for a single write.
+
+    Every command is validated before anything is encoded, an invalid
+    command fails the whole batch.
+    """
+    cmds = list(cmds)
+    codes = [_check(cmd) for cmd in cmds]
+    buf = bytearray()
+    for code, cmd in zip(codes, cmds):
+        buf += _frame(code, cmd)
+    return bytes(buf)
+
+
+class Template:
+    """A command with its leading arguments fixed, ex. the address and unit.
+
+    The fixed part is validated and encoded once, a call validates and
+    adds the remaining arguments: template(value) => frame.
+    """
+
+    __slots__ = ("code", "method", "_head", "_params", "_exact")
+
+    def __init__(self, code: MsgType, method: int, *fixed: int) -> None:
+        text, params, exact = _LAYOUTS.get((code, method)) or _layout(code, method)
+        _check_args(code, method, params[: len(fixed)], True, fixed)
+        self.code = code
+        self.method = method
+        head = [text, _TEXT[method], *map(_TEXT.__getitem__, fixed)]
+        self._head = b"[" + b",".join(head)
+        self._params = params[len(fixed) :]
+        self._exact = exact
+
+    def __call__(self, *args: int) -> bytes:
+        _check_args(self.code, self.method, self._params, self._exact, args)
+        if not args:
+            return self._head + b"]\n"
+        return b"%b,%b]\n" % (self._head, b",".join(map(_TEXT.__getitem__, args)))
+
+
+def unit_command(
+    code: MsgType, method: int, address: int, unit: int, *args: int
+) -> Command:
+    return Command(code, method, (address, unit, *args))
+
+
+def encode_temp(temp: float) -> tuple[int, int]:
+    """Temperature to (msb, lsb), in 1/10 degrees, two's complement."""
+    if not math.isfinite(temp) or not -3276.8 <= temp <= 3276.7:
+        raise ValueError(f"temperature out of range: {temp}")
+    return sens_encode_value(temp)
@@ -0,0 +1,108 @@
+"""Timing and throughput settings of a connection, and their auto-tuning."""
+
+from __future__ import annotations
+import math
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Any, Final
+
+from duotecno.rxqueue import RX_MAXSIZE
+
+# what tuned() sets, the rest stays as the caller configured it
+TUNED_FIELDS: Final = (
+    "password_timeout",
+    "load_node_timeout",
+    "load_unit_timeout",
+    "heartbeat_timeout",
+    "max_inflight",
+    "frame_delay",
+    "read_delay",
+    "request_delay",
+    "poll_budget",
+    "rtt",
+    "rate",
+)
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return min(max(value, low), high)
+
+
+@dataclass(frozen=True)
+class Config:
+    """Settings of a PyDuotecno connection, all times in seconds.
+
+    The defaults are the values that used to be hard-coded, they are safe
+    for a small installation. With auto_tune the discovery measures the
+    gateway and the result replaces these values, see tuned().
+    """
+
+    # wait for the login reply
+    password_timeout: float = 5.0
+    # discovery of all nodes, and of all units
+    load_node_timeout: float = 60.0
+    load_unit_timeout: float = 120.0
+    # interval of the discovery progress checks
+    load_poll: float = 1.0
+    # a heartbeat is sent after heartbeat_idle without traffic, no reply
+    # within heartbeat_timeout reconnects
+    heartbeat_timeout: float = 20.0
+    heartbeat_idle: float = 10.0
+    heartbeat_start: float = 30.0
+    # sent frames without a reply yet
+    max_inflight: int = 5
+    # pause after every sent frame, and after every read chunk
+    frame_delay: float = 0.1
+    read_delay: float = 0.1
+    # pause between the node loads and the status requests of a (re)connect
+    request_delay: float = 0.1
+    read_size: int = 4096
+    rx_maxsize: int = RX_MAXSIZE
+    # default polls per second of start_polling()
+    poll_budget: float = 2.0
+    reconnect_interval: float = 5.0
+    # measure the gateway during the discovery and use tuned()
+    auto_tune: bool = False
+    # what the tuning measured, None when not tuned
+    rtt: float | None = None
+    rate: float | None = None
+
+    def tuned(self, rtt: float, rate: float, nodes: int, units: int) -> Config:
+        """The settings for a gateway with this round trip and reply rate.
+
+        rtt is the time of one database request, rate the replies per
+        second with max_inflight requests outstanding. The window covers
+        the round trip, the pacing follows the measured rate and the
+        timeouts are a multiple of what the installation needs.
+        """
+        rtt = max(rtt, 0.001)
+        rate = max(rate, 1.0)
+        return replace(
+            self,
+            password_timeout=round(_clamp(20 * rtt, 2.0, 30.0), 3),
+            load_node_timeout=round(max(10.0, 5 * nodes * rtt), 1),
+            load_unit_timeout=round(max(30.0, 5 * units * rtt), 1),
+            # never below the old fixed timeout, a busy bus delays replies
+            heartbeat_timeout=round(_clamp(50 * rtt, 20.0, 60.0), 3),
+            max_inflight=int(_clamp(math.ceil(rate * rtt) + 1, 2, 16)),
+            # the window already paces the writer, this spreads bursts
+            frame_delay=round(_clamp(1 / rate, 0.0, self.frame_delay), 4),
+            read_delay=round(_clamp(rtt / 4, 0.0, self.read_delay), 4),
+            request_delay=0.0,
+            # a tenth of what the gateway showed it can handle
+            poll_budget=round(_clamp(rate / 10, 0.5, 20.0), 2),
+            rtt=round(rtt, 4),
+            rate=round(rate, 1),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    def with_tuning(self, data: dict[str, Any]) -> Config:
+        """These settings with the TUNED_FIELDS of data, ex. a saved to_dict()."""
+        return replace(self, **{k: data[k] for k in TUNED_FIELDS if k in data})
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Config:
+        """Inverse of to_dict, unknown keys (of other versions) are ignored."""
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
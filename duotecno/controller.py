@@ -2,28 +2,61 @@
 
 from __future__ import annotations
 import asyncio
+import contextvars
+import itertools
+import json
 import logging
 import time
-from typing import Final
+from collections.abc import Callable, Iterable
+from dataclasses import replace
+from typing import Any, Final, TYPE_CHECKING
 from collections import deque
-from duotecno.exceptions import LoadFailure, InvalidPassword
+from duotecno.events import (
+    DROP_OLDEST,
+    Event,
+    EventStream,
+    HeartbeatEvent,
+    NodeResetEvent,
+    RawPacketEvent,
+    UnitStateEvent,
+)
+from duotecno.exceptions import CommandError, LoadFailure, InvalidPassword
+from duotecno.commands import Command
+from duotecno.config import Config
+from duotecno.framing import FrameDecoder
+from duotecno.rxqueue import ReceiveQueue
+from duotecno.topology import Topology
+from duotecno.trace import HotTrace
 from duotecno.protocol import (
+    MsgType,
     Packet,
     EV_CLIENTCONNECTSET_3,
     EV_NODEDATABASEINFO_0,
     EV_NODEDATABASEINFO_1,
     EV_HEARTBEATSTATUS_1,
+    EV_NODERESET_0,
+    EV_MESSAGEERROR_0,
 )
 from duotecno.node import Node
-from duotecno.unit import BaseUnit
-
-PW_TIMEOUT: Final = 5
-LOAD_NODE_TIMEOUT: Final = 60
-LOAD_UNIT_TIMEOUT: Final = 120
-HB_TIMEOUT: Final = 20
-HB_BUSEMPTY: Final = 10
-MAX_INFLIGHT: Final = 5
+from duotecno.unit import BaseUnit, DuoswitchUnit
+
+# the optional features are only imported when they are started
+if TYPE_CHECKING:
+    from duotecno.health import HealthMonitor
+    from duotecno.history import HistoryStore
+    from duotecno.poller import StatusPoller
+    from duotecno.recorder import TrafficRecorder
+    from duotecno.rules import RuleEngine
+    from duotecno.timesync import TimeSync
+
 STATUS_RETRANSMIT: Final = 2
+# send priorities, lower goes first
+PRIO_HIGH: Final = 0
+PRIO_NORMAL: Final = 10
+# priority for the writes of the current task, see write()
+send_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "send_priority", default=PRIO_NORMAL
+)
 
 
 class PyDuotecno:
@@ -37,29 +70,251 @@ class PyDuotecno:
     writer: asyncio.StreamWriter | None = None
     reader: asyncio.StreamReader | None = None
     readerTask: asyncio.Task[None]
-    hbTask: asyncio.Task[None]
+    hbTask: asyncio.Task[None] | None = None
+    _reconnectTask: asyncio.Task[None] | None = None
     workTask: asyncio.Task[None]
     writerTask: asyncio.Task[None]
-    receiveQueue: asyncio.PriorityQueue
+    receiveQueue: ReceiveQueue
     sendSema: asyncio.Semaphore
     sendQueue: asyncio.PriorityQueue
     connectionOK: asyncio.Event
     heartbeatReceived: asyncio.Event
     nextHeartbeat: int
-    packetToWaitFor: str | None = None
-    packetWaiter: asyncio.Event
     nodes: dict[int, Node] = {}
     host: str
     port: int
     password: str
     numNodes: int = 0
+    # the database cache of connect(cache=...)
+    cachePath: str | None = None
+    recorder: TrafficRecorder | None = None
+    history: HistoryStore | None = None
+    poller: StatusPoller | None = None
+    timesync: TimeSync | None = None
+    rules: RuleEngine | None = None
+    healthMonitor: HealthMonitor | None = None
+    optimistic: float | None = None
 
-    def get_units(self, unit_type: list[str] | str) -> list[BaseUnit]:
-        res = []
+    def __init__(self, config: Config | None = None) -> None:
+        self._log = logging.getLogger("pyduotecno")
+        # timing and throughput, see Config (auto_tune replaces it)
+        self.config = config or Config()
+        self._subscribers: list[EventStream] = []
+        self.nodes = {}
+        # raw database frames (64,x) by their request key, ex "64,2,<addr>,<unit>"
+        self.dbFrames: dict[str, str] = {}
+        # called with every received frame
+        self.rawListeners: list[Callable[[str], None]] = []
+        # called with every frame, as it is written to the socket
+        self.txListeners: list[Callable[[bytes], None]] = []
+        # called with every published event, without filter or buffer
+        self.eventListeners: list[Callable[[Event], None]] = []
+        # RX/TX/WX packet trace, off by default
+        self.trace = HotTrace()
+        # framing errors are counted here, see FrameDecoder.stats()
+        self.framing = FrameDecoder()
+        # units by id, type, node and name, filled in by the discovery
+        self.topology = Topology()
+        self._reloadLock = asyncio.Lock()
+        self.connectionOK = asyncio.Event()
+        self.heartbeatReceived = asyncio.Event()
+        # frame prefix => futures of waitForPacket()
+        self._waiters: dict[str, list[asyncio.Future[None]]] = {}
+        self._reloadTasks: set[asyncio.Task[None]] = set()
+        # kept over reconnects, drained when the connection is made
+        self.receiveQueue = ReceiveQueue(self.config.rx_maxsize)
+        # (prio, seq, frames), see _enqueue()
+        self.sendQueue: asyncio.PriorityQueue[tuple[int, int, tuple[bytes, ...]]] = (
+            asyncio.PriorityQueue()
+        )
+        # high-water mark of the send queue
+        self.sendPeak = 0
+        # keeps the order of frames with the same priority
+        self._sendSeq = itertools.count()
+
+    def start_recording(
+        self, path: str, max_bytes: int = 0, backup_count: int = 5
+    ) -> None:
+        """Record all received and sent frames to a capture file."""
+        from duotecno.recorder import TrafficRecorder
+
+        self.stop_recording()
+        self.recorder = TrafficRecorder(path, max_bytes, backup_count)
+
+    def enable_history(self, capacity: int = 1024, path: str | None = None) -> None:
+        """Keep the last capacity values of every unit state field.
+
+        with a path all values are also appended to that file
+        """
+        from duotecno.history import HistoryStore
+
+        self.disable_history()
+        self.history = HistoryStore(capacity, path)
+
+    def disable_history(self) -> None:
+        if self.history:
+            self.history.close()
+            self.history = None
+
+    def start_polling(
+        self, intervals: dict[str, float] | None = None, budget: float | None = None
+    ) -> None:
+        """Periodically refresh units that do not push their state.
+
+        intervals maps a unit class name to the seconds between 2 polls,
+        budget is the maximum number of polls per second (config.poll_budget
+        by default).
+        """
+        from duotecno.poller import StatusPoller
+
+        self.stop_polling()
+        if budget is None:
+            budget = self.config.poll_budget
+        self.poller = StatusPoller(self, intervals, budget)
+        self.poller.start()
+
+    def stop_polling(self) -> None:
+        if self.poller:
+            self.poller.stop()
+            self.poller = None
+
+    def start_timesync(
+        self, interval: float = 3600.0, correct: bool = False, max_skew: float = 2.0
+    ) -> TimeSync:
+        """Track the gateway clock, events then also carry the gateway time.
+
+        with correct the gateway clock is set when it is off by max_skew,
+        the FC_TIMEDATE layout that is written is not verified against a
+        gateway, see TimeSync.correct
+        """
+        from duotecno.timesync import TimeSync
+
+        self.stop_timesync()
+        self.timesync = TimeSync(self)
+        self.timesync.start(interval, correct, max_skew)
+        return self.timesync
+
+    def stop_timesync(self) -> None:
+        if self.timesync:
+            self.timesync.close()
+            self.timesync = None
+
+    def enable_optimistic(self, timeout: float = 3.0) -> None:
+        """Apply the state of unit commands before the bus confirms it.
+
+        The state is marked pending (UnitStateEvent.pending, is_pending())
+        and rolled back with a UnitCorrectionEvent when the confirmation
+        does not arrive within timeout seconds or the command is refused.
+        """
+        self._set_optimistic(timeout)
+
+    def disable_optimistic(self) -> None:
+        self._set_optimistic(None)
+
+    def _set_optimistic(self, timeout: float | None) -> None:
+        self.optimistic = timeout
         for node in self.nodes.values():
-            for unit in node.get_unit_by_type(unit_type):
-                res.append(unit)
-        return res
+            node.optimistic = timeout
+
+    def start_health_monitor(
+        self,
+        interval: float = 30.0,
+        probe_after: float = 300.0,
+        silent_after: float = 600.0,
+        skip: Iterable[str] | None = None,
+    ) -> HealthMonitor:
+        """Probe quiet nodes and mark the units of silent nodes unavailable.
+
+        the health of a node is always tracked, see Node.health
+        skip are unit class names that are not used to probe a node,
+        default health.PROBE_SKIP
+        """
+        from duotecno.health import HealthMonitor
+
+        self.stop_health_monitor()
+        self.healthMonitor = HealthMonitor(
+            self, interval, probe_after, silent_after, skip
+        )
+        self.healthMonitor.start()
+        return self.healthMonitor
+
+    def stop_health_monitor(self) -> None:
+        if self.healthMonitor:
+            self.healthMonitor.stop()
+            self.healthMonitor = None
+
+    def get_health(self) -> dict[int, dict[str, Any]]:
+        """Health of every node, by address."""
+        return {addr: node.health.to_dict() for addr, node in self.nodes.items()}
+
+    def enable_rules(self) -> RuleEngine:
+        """Evaluate automation rules on every unit state change."""
+        from duotecno.rules import RuleEngine
+
+        if not self.rules:
+            self.rules = RuleEngine(self)
+        return self.rules
+
+    def stop_recording(self) -> None:
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
+
+    def events(
+        self,
+        nodes: Iterable[int] | None = None,
+        units: Iterable[tuple[int, int]] | None = None,
+        types: Iterable[type[Event]] | None = None,
+        msg_types: Iterable[MsgType] | None = None,
+        maxsize: int = 1000,
+        overflow: str = DROP_OLDEST,
+    ) -> EventStream:
+        """Subscribe to the decoded bus events.
+
+        nodes are node addresses, units are (address, unit) tuples,
+        types are Event subclasses and msg_types limits the events to the
+        ones decoded from those packet types.
+        Filters are applied before the event is buffered.
+        """
+        return EventStream(
+            self._subscribers,
+            nodes=nodes,
+            units=units,
+            types=types,
+            msg_types=msg_types,
+            maxsize=maxsize,
+            overflow=overflow,
+        )
+
+    def _publish(self, event: Event) -> None:
+        if self.timesync and self.timesync.skew is not None:
+            event.gatewayTime = event.timestamp + self.timesync.skew
+        if isinstance(event, UnitStateEvent) and not event.pending:
+            if self.history:
+                self.history.record(event)
+            if self.rules:
+                self.rules.evaluate(event)
+        for sub in self._subscribers.copy():
+            if sub.matches(event):
+                sub.push(event)
+        for listener in self.eventListeners:
+            listener(event)
+
+    def snapshot(self, fmt: str = "json") -> bytes:
+        """Export the state of all units, fmt is json or msgpack."""
+        units = [
+            unit.to_dict() for node in self.nodes.values() for unit in node.get_units()
+        ]
+        if fmt == "json":
+            return json.dumps(units).encode()
+        if fmt == "msgpack":
+            from duotecno.serialize import packb
+
+            return packb(units)
+        raise ValueError(f"Unknown snapshot format: {fmt}")
+
+    def get_units(self, unit_type: list[str] | str) -> list[BaseUnit]:
+        return self.topology.by_type(unit_type)
 
     async def enableAllUnits(self) -> None:
         self._log.debug("Enable all Units on all nodes")
@@ -74,9 +329,14 @@ class PyDuotecno:
     async def disconnect(self) -> None:
         self._log.debug("Disconnecting")
         self.connectionOK.clear()
+        if self.recorder:
+            self.recorder.flush()
+        if self.history:
+            self.history.flush()
 
         self.readerTask.cancel()
-        self.hbTask.cancel()
+        if self.hbTask:
+            self.hbTask.cancel()
         self.workTask.cancel()
         self.writerTask.cancel()
         if self.writer:
@@ -84,12 +344,39 @@ class PyDuotecno:
         self._log.debug("Disconnecting Finished")
 
     async def connect(
-        self, host: str, port: int, password: str, testOnly: bool = False
+        self,
+        host: str,
+        port: int,
+        password: str,
+        testOnly: bool = False,
+        cache: str | None = None,
     ) -> None:
-        """Initialize the connection."""
+        """Initialize the connection.
+
+        with a cache file the node and unit database is loaded from it if
+        possible, otherwise it is discovered and saved there, together with
+        the tuned config when config.auto_tune is set. A loaded cache is
+        checked against the node and unit counts of the gateway.
+        """
         self.host = host
         self.port = port
         self.password = password
+        if cache and not testOnly:
+            from duotecno.cache import load_cache, save_cache, validate_cache
+
+            self.cachePath = cache
+            if await load_cache(self, cache):
+                self._log.info(f"Database loaded from {cache}")
+                await self._do_connect(skipLoad=True)
+                if await validate_cache(self):
+                    return
+                await self.disconnect()
+            await self._do_connect()
+            if self.config.auto_tune:
+                save_cache(self, cache, config=self.config.to_dict())
+            else:
+                save_cache(self, cache)
+            return
         await self._do_connect(testOnly)
 
     async def _reconnect(self):
@@ -98,9 +385,13 @@ class PyDuotecno:
         await self.continuously_check_connection()
 
     async def _do_connect(self, testOnly: bool = False, skipLoad: bool = False) -> None:
+        # before connecting, a password that can not be sent raises here
+        passw = [ord(i) for i in self.password]
+        login = Command(MsgType.FC_CLIENTCONNECTSET, 3, (len(passw), *passw)).encode()
         if not skipLoad:
             self.nodes = {}
-        self._log = logging.getLogger("pyduotecno")
+            self.dbFrames = {}
+            self.topology.clear()
         # Try to connect
         self._log.debug("Try to connect")
         try:
@@ -109,27 +400,26 @@ class PyDuotecno:
             )
         except (ConnectionError, TimeoutError):
             raise
-        # events
-        self.connectionOK = asyncio.Event()
-        self.heartbeatReceived = asyncio.Event()
-        self.packetWaiter = asyncio.Event()
+        # events, the same objects are kept so waiters survive a reconnect
+        self.heartbeatReceived.clear()
+        # anything queued for the old connection is stale
+        self.receiveQueue.clear()
+        _drain(self.sendQueue)
         # at this point the connection should be ok
         self._log.debug("Connection established")
         self.connectionOK.set()
-        self.heartbeatReceived.clear()
         # start the bus reading task
-        self.receiveQueue = asyncio.PriorityQueue()
-        self.sendQueue = asyncio.PriorityQueue()
-        self.sendSema = asyncio.Semaphore(MAX_INFLIGHT)
+        self.sendSema = asyncio.Semaphore(self.config.max_inflight)
         self.readerTask = asyncio.Task(self._readTask())
         self.writerTask = asyncio.Task(self._writeTask())
         self.workTask = asyncio.Task(self._handleTask())
         # send login info
-        passw = [str(ord(i)) for i in self.password]
-        await self.write(f"[214,3,{len(passw)},{','.join(passw)}]")
+        await self.write(login)
         # wait for the login to be ok
         try:
-            await asyncio.wait_for(self.waitForPacket("67,3,1"), timeout=PW_TIMEOUT)
+            await asyncio.wait_for(
+                self.waitForPacket("67,3,1"), timeout=self.config.password_timeout
+            )
         except TimeoutError:
             await self.disconnect()
             raise InvalidPassword()
@@ -137,61 +427,174 @@ class PyDuotecno:
         if testOnly:
             return
         # do we need to reload the modules?
+        tune = self.config.auto_tune and not skipLoad
+        if tune:
+            # measure without the pacing, only the window limits the sending
+            config = self.config
+            self.config = replace(
+                config, frame_delay=0.0, read_delay=0.0, request_delay=0.0
+            )
         if not skipLoad:
             await self.write("[209,5]")
             await self.write("[209,0]")
             try:
-                await asyncio.wait_for(self._loadTaskNodes(), timeout=LOAD_NODE_TIMEOUT)
+                await asyncio.wait_for(
+                    self._loadTaskNodes(), timeout=self.config.load_node_timeout
+                )
                 self._log.info("Nodes discoverd")
+                start = time.monotonic()
                 for n in self.nodes.values():
                     await n.load()
-                    await asyncio.sleep(0.1)
-                await asyncio.wait_for(self._loadTaskUnits(), timeout=LOAD_UNIT_TIMEOUT)
+                    await asyncio.sleep(self.config.request_delay)
+                await asyncio.wait_for(
+                    self._loadTaskUnits(), timeout=self.config.load_unit_timeout
+                )
+                # the units are requested one by one, so this is a round trip
+                units = len(self.topology)
+                rtt = (time.monotonic() - start) / max(units, 1)
                 self._log.info("Units discoverd")
             except TimeoutError:
+                if tune:
+                    self.config = config
                 await self.disconnect()
                 raise LoadFailure()
         # in case of skipload we do want to request the status again
         self._log.info("Requesting unit status")
+        start = time.monotonic()
+        requested = 0
         for node in self.nodes.values():
             for unit in node.get_units():
-                self._log.debug(f"Unit: {unit}")
-                await unit.requestStatus()
-                await asyncio.sleep(0.1)
+                self._log.debug("Unit: %s", unit)
+                requested += await unit.requestStatus()
+                await asyncio.sleep(self.config.request_delay)
+        if tune:
+            # all but the last window of requests were answered, the units
+            # that are not asked (ex. sensunits) do not count
+            await self.flush()
+            rate = requested / max(time.monotonic() - start, 0.001)
+            self.config = config.tuned(rtt, rate, len(self.nodes), units)
+            self._log.info(f"Tuned for rtt {rtt * 1000:.1f} ms, {rate:.0f} replies/s")
         self.hbTask = asyncio.Task(self.heartbeatTask())
         await self.enableAllUnits()
 
-    async def write(self, msg: str) -> None:
-        """Send a message."""
+    async def reloadNode(self, address: int) -> None:
+        """Reload the database and the status of a single node."""
+        node = self.nodes[address]
+        async with self._reloadLock:
+            self._log.info(f"Reloading node {node.name}")
+            await node.disable()
+            try:
+                await asyncio.wait_for(
+                    node.load(), timeout=self.config.load_unit_timeout
+                )
+            except TimeoutError:
+                self._log.warning(f"Reloading node {node.name} timed out")
+            for unit in node.get_units():
+                await unit.requestStatus()
+            await node.enable()
+
+    async def write(self, msg: str | bytes, prio: int | None = None) -> None:
+        """Send a message.
+
+        msg is either a frame string like "[215,1]" or a pre-encoded
+        frame (including the line ending) as produced by the units.
+        Frames with a lower prio are sent first, the default comes from
+        send_priority (PRIO_HIGH for rule actions).
+        """
+        if isinstance(msg, str):
+            msg = f"{msg}\n".encode()
+        await self._enqueue((msg,), prio)
+
+    async def writeBurst(self, frames: list[bytes]) -> None:
+        """Send pre-encoded frames back to back.
+
+        The frames are a single item in the send queue, nothing gets in
+        between them, but each frame takes its own place in the in-flight
+        window.
+        """
+        if frames:
+            await self._enqueue(tuple(frames), None)
+
+    async def _enqueue(self, frames: tuple[bytes, ...], prio: int | None) -> None:
         if not self.writer:
             return
         if self.writer.transport.is_closing():
             await self._reconnect()
             return
-        self._log.debug(f"TX: {msg}")
-        await self.sendQueue.put(msg)
-        return
+        for frame in frames:
+            if self.trace.enabled:
+                self.trace.record("TX", frame)
+            if self._log.isEnabledFor(logging.DEBUG):
+                self._log.debug("TX: %r", frame)
+        if prio is None:
+            prio = send_priority.get()
+        await self.sendQueue.put((prio, next(self._sendSeq), frames))
+        if self.sendQueue.qsize() > self.sendPeak:
+            self.sendPeak = self.sendQueue.qsize()
+
+    async def move_duoswitches(self, units: list[DuoswitchUnit], action: str) -> None:
+        """Open, close or stop a group of duoswitches in sync."""
+        if action not in ("open", "close", "stop"):
+            raise ValueError(f"Unknown action: {action}")
+        frames = []
+        for unit in units:
+            if action == "stop":
+                unit._cancel_stop()
+                frames.append(unit._frames["stop"])
+            else:
+                frames.extend(unit._move_frames(action))
+        await self.writeBurst(frames)
+
+    async def set_duoswitch_positions(self, targets: dict[DuoswitchUnit, int]) -> None:
+        """Move a group of duoswitches to their positions in sync."""
+        frames = []
+        delays = []
+        for unit, position in targets.items():
+            unitFrames, delay = unit._position_frames(position)
+            frames.extend(unitFrames)
+            delays.append((unit, delay))
+        await self.writeBurst(frames)
+        for unit, delay in delays:
+            unit._stop_after(delay)
 
     async def _writeTask(self) -> None:
         while True:
+            _prio, _seq, frames = await self.sendQueue.get()
             try:
-                msg = await self.sendQueue.get()
-                await self.sendSema.acquire()
-                msg = f"{msg}{chr(10)}"
-                self.writer.write(msg.encode())
+                # one place in the window per frame, every frame gets a reply
+                for frame in frames:
+                    await self.sendSema.acquire()
+                    self.writer.write(frame)
+                    for txListener in self.txListeners:
+                        txListener(frame)
+                    if self.recorder:
+                        self.recorder.tx(frame)
                 await self.writer.drain()
-                await asyncio.sleep(0.1)
+                await asyncio.sleep(self.config.frame_delay)
             except ConnectionError:
                 await self.reconnect()
                 return
+            finally:
+                self.sendQueue.task_done()
+
+    def queue_stats(self) -> dict[str, dict[str, int]]:
+        """Length and high-water mark of the receive and send queues."""
+        return {
+            "receive": self.receiveQueue.stats(),
+            "send": {"queued": self.sendQueue.qsize(), "peak": self.sendPeak},
+        }
+
+    async def flush(self) -> None:
+        """Wait until everything written so far is sent."""
+        await self.sendQueue.join()
 
     async def _loadTaskNodes(self) -> None:
         while len(self.nodes) < 1:
-            await asyncio.sleep(3)
+            await asyncio.sleep(self.config.load_poll)
         while True:
             if len(self.nodes) == self.numNodes:
                 return
-            await asyncio.sleep(1)
+            await asyncio.sleep(self.config.load_poll)
 
     async def _loadTaskUnits(self) -> None:
         while True:
@@ -201,7 +604,7 @@ class PyDuotecno:
                     c += 1
                 if c == len(self.nodes):
                     return
-            await asyncio.sleep(1)
+            await asyncio.sleep(self.config.load_poll)
 
     async def check_tcp_connection(self, timeout=3) -> bool:
         """Check if a TCP connection can be established to the given host and port."""
@@ -227,10 +630,10 @@ class PyDuotecno:
                 break
             else:
                 self._log.debug("Connection to host not yet restored, retrying...")
-                await asyncio.sleep(5)
+                await asyncio.sleep(self.config.reconnect_interval)
 
     async def heartbeatTask(self) -> None:
-        await asyncio.sleep(30)
+        await asyncio.sleep(self.config.heartbeat_start)
         self._log.info("Starting HB task")
         while True:
             # wait until the timer expire of 5 seconds
@@ -245,7 +648,7 @@ class PyDuotecno:
                 self._log.debug("Sending heartbeat message")
                 await self.write("[215,1]")
                 await asyncio.wait_for(
-                    self.heartbeatReceived.wait(), timeout=HB_TIMEOUT
+                    self.heartbeatReceived.wait(), timeout=self.config.heartbeat_timeout
                 )
                 self._log.debug("Received heartbeat message")
             except TimeoutError:
@@ -258,81 +661,153 @@ class PyDuotecno:
 
     async def _readTask(self) -> None:
         """Reader task."""
+        self.framing.reset()
         while self.connectionOK.is_set() and self.reader:
             try:
-                tmp2 = await self.reader.readline()
+                data = await self.reader.read(self.config.read_size)
             except ConnectionError:
-                await self._reconnect()
-                return
-            if tmp2 == "":
-                return
-            tmp3 = tmp2.decode()
-            tmp = tmp3.rstrip()
-            # self._log.debug(f'Raw Receive: "{tmp}"')
-            if not tmp.startswith("["):
-                tmp = tmp.lstrip("[")
-            tmp = tmp.replace("\x00", "")
-            # self._log.debug(f'Receive: "{tmp}"')
-            tmp = tmp[1:-1]
-            if tmp == "":
+                data = b""
+            if not data:
+                # EOF, the reconnect cancels this task so run it apart
+                self._log.warning("Connection lost, reconnecting")
+                self._reconnectTask = asyncio.create_task(self._reconnect())
                 return
-            self._log.debug(f'RX: "{tmp}"')
-            self.nextHeartbeat = int(time.time()) + HB_BUSEMPTY
-            self.sendSema.release()
-            if await self._comparePacket(tmp):
-                p = tmp.split(",")
-                try:
-                    pc = Packet(int(p[0]), int(p[1]), deque([int(_i) for _i in p[2:]]))
-                    await self.receiveQueue.put(pc)
-                # self._log.debug(f'QUEUE: "{pc}" {self.receiveQueue.qsize()}')
-                except Exception as e:
-                    self._log.error(e)
-                    self._log.error(tmp)
-            await asyncio.sleep(0.1)
-
-    async def _comparePacket(self, rpck: str) -> bool:
-        if not self.packetToWaitFor:
-            return True
-        # self._log.debug(f"COMPARE received packet {rpck} with {self.packetToWaitFor}")
-        if rpck.startswith(self.packetToWaitFor):
-            self.packetWaiter.set()
-            return True
-        return False
+            for frame in self.framing.feed(data):
+                await self._receiveFrame(frame)
+            await asyncio.sleep(self.config.read_delay)
+
+    async def _receiveFrame(self, tmp: str) -> None:
+        if self.trace.enabled:
+            self.trace.record("RX", tmp)
+        if self._log.isEnabledFor(logging.DEBUG):
+            self._log.debug('RX: "%s"', tmp)
+        if self.recorder:
+            self.recorder.rx(tmp.encode())
+        for listener in self.rawListeners:
+            listener(tmp)
+        self.nextHeartbeat = int(time.time() + self.config.heartbeat_idle)
+        self.sendSema.release()
+        if self._waiters:
+            self._wakeWaiters(tmp)
+        try:
+            pc = self._parsePacket(tmp)
+            await self.receiveQueue.put(pc)
+        except Exception as e:
+            self._log.error(e)
+            self._log.error(tmp)
+
+    def _parsePacket(self, frame: str) -> Packet:
+        p = frame.split(",")
+        if p[0] == "64":
+            self._storeDbFrame(p, frame)
+        return Packet(int(p[0]), int(p[1]), deque([int(_i) for _i in p[2:]]))
+
+    def _storeDbFrame(self, p: list[str], frame: str) -> None:
+        keyLen = {"0": 2, "1": 3, "2": 4}.get(p[1])
+        if keyLen:
+            self.dbFrames[",".join(p[:keyLen])] = frame
+
+    def _wakeWaiters(self, frame: str) -> None:
+        for prefix in [p for p in self._waiters if frame.startswith(p)]:
+            for fut in self._waiters.pop(prefix):
+                if not fut.done():
+                    fut.set_result(None)
 
     async def waitForPacket(self, pstr: str) -> None:
-        """Wait for a certain packet.
+        """Wait for a frame that starts with pstr.
 
-        will clear an event and then wait for the event to be set again
+        all other frames are handled as usual in the meantime, several
+        waits (ex. a node reload during normal traffic) can run at once
+        without a connection (replaying a capture) there is nothing to wait for
         """
-        self.packetWaiter.clear()
-        self.packetToWaitFor = pstr
-        await self.packetWaiter.wait()
-        self.packetToWaitFor = None
+        if not self.writer:
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(pstr, []).append(fut)
+        try:
+            await fut
+        finally:
+            # also on a timeout (cancel) of the caller
+            waiters = self._waiters.get(pstr)
+            if waiters and fut in waiters:
+                waiters.remove(fut)
+                if not waiters:
+                    del self._waiters[pstr]
 
     async def _handleTask(self) -> None:
         """handler task."""
-        while self.connectionOK.is_set() and self.receiveQueue:
+        while self.connectionOK.is_set():
             try:
                 pc = await self.receiveQueue.get()
-                self._log.debug(f"WX: {pc}")
+                if self.trace.enabled:
+                    self.trace.record("WX", pc)
+                if self._log.isEnabledFor(logging.DEBUG):
+                    self._log.debug("WX: %s", pc)
                 await self._handlePacket(pc)
             except Exception as e:
                 self._log.error(e)
-            await asyncio.sleep(0.1)
+            # only yield, a fixed delay per packet caps a busy bus at 10/s
+            await asyncio.sleep(0)
 
     async def _handlePacket(self, packet: Packet) -> None:
+        if self._subscribers or self.eventListeners:
+            self._publish(
+                RawPacketEvent(
+                    packet,
+                    address=getattr(packet.cls, "address", None),
+                    unit=getattr(packet.cls, "unit", None),
+                    msgType=MsgType(packet.cmdCode),
+                )
+            )
         if packet.cls is None:
-            self._log.debug(f"Ignoring packet: {packet}")
+            self._log.debug("Ignoring packet: %s", packet)
             return
         if isinstance(packet.cls, EV_CLIENTCONNECTSET_3):
             return
+        if isinstance(packet.cls, EV_NODERESET_0):
+            self._log.warning(f"Node {packet.cls.address} was reset")
+            self._publish(
+                NodeResetEvent(
+                    address=packet.cls.address, msgType=MsgType.EV_NODERESET
+                )
+            )
+            if self.cachePath:
+                from duotecno.cache import drop_cache
+
+                # the node may come back with another database
+                drop_cache(self.cachePath)
+            if packet.cls.address in self.nodes:
+                task = asyncio.create_task(self.reloadNode(packet.cls.address))
+                self._reloadTasks.add(task)
+                task.add_done_callback(self._reloadTasks.discard)
+            return
+        if isinstance(packet.cls, EV_MESSAGEERROR_0):
+            self._log.warning(f"Message error: {packet.cls.values}")
+            # the payload is not documented, see EV_MESSAGEERROR_0: only a
+            # first value that is a unit with pending commands is trusted
+            node = self.nodes.get(packet.cls.address)
+            if node:
+                values = packet.cls.values
+                unit = values[0] if values else None
+                if unit not in node.units or not node.units[unit].is_pending():
+                    unit = None
+                await node.handleError(unit, CommandError(packet.cls.to_json()))
+            return
+        if packet.cmdName == "EV_TIMEDATESTATUS" and packet.method == 1:
+            if self.timesync:
+                self.timesync.handle(packet.cls)
+            return
         if isinstance(packet.cls, EV_HEARTBEATSTATUS_1):
             self.heartbeatReceived.set()
+            if self._subscribers or self.eventListeners:
+                self._publish(HeartbeatEvent(msgType=MsgType.EV_HEARTBEATSTATUS))
             return
         if isinstance(packet.cls, EV_NODEDATABASEINFO_0):
             self.numNodes = packet.cls.numNode
             for i in range(packet.cls.numNode):
-                await self.write(f"[209,1,{i}]")
+                await self.write(
+                    Command(MsgType.FC_NODEDATABASEREQUESTSTATUS, 1, (i,)).encode()
+                )
                 await self.waitForPacket(f"64,1,{i}")
             return
         if isinstance(packet.cls, EV_NODEDATABASEINFO_1):
@@ -345,10 +820,19 @@ class PyDuotecno:
                     numUnits=packet.cls.numUnits,
                     writer=self.write,
                     pwaiter=self.waitForPacket,
+                    publisher=self._publish,
+                    optimistic=self.optimistic,
+                    topology=self.topology,
                 )
                 # await self.nodes[packet.cls.address].load()
             return
         if hasattr(packet.cls, "address") and packet.cls.address in self.nodes:
             await self.nodes[packet.cls.address].handlePacket(packet.cls)
             return
-        self._log.debug(f"Ignoring packet: {packet}")
+        self._log.debug("Ignoring packet: %s", packet)
+
+
+def _drain(queue: asyncio.Queue) -> None:
+    while not queue.empty():
+        queue.get_nowait()
+        queue.task_done()
@@ -0,0 +1,167 @@
+"""Decoded bus events and the streams that deliver them."""
+
+from __future__ import annotations
+import asyncio
+import time
+from collections.abc import Iterable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Final
+
+from duotecno.protocol import MsgType, Packet
+
+DROP_OLDEST: Final = "drop_oldest"
+DROP_NEWEST: Final = "drop_newest"
+CLOSE: Final = "close"
+OVERFLOW_POLICIES: Final = (DROP_OLDEST, DROP_NEWEST, CLOSE)
+
+# what the commands sent in this context are for, ex. the running Rule
+command_cause: ContextVar[object | None] = ContextVar("command_cause", default=None)
+
+
+@dataclass
+class Event:
+    """Base class for all events."""
+
+    timestamp: float = field(default_factory=time.time, kw_only=True)
+    address: int | None = field(default=None, kw_only=True)
+    unit: int | None = field(default=None, kw_only=True)
+    msgType: MsgType | None = field(default=None, kw_only=True)
+    # timestamp on the gateway clock, when the time sync is running
+    gatewayTime: float | None = field(default=None, kw_only=True)
+    # the gateway the event came from, set by the sharded runtime
+    site: str | None = field(default=None, kw_only=True)
+    # command_cause of the command this event confirms
+    cause: object | None = field(default=None, kw_only=True, repr=False)
+
+
+@dataclass
+class UnitStateEvent(Event):
+    """One or more state fields of a unit changed."""
+
+    name: str
+    changes: dict[str, Any]
+    # optimistic state of a command, not confirmed by the bus yet
+    pending: bool = False
+
+
+@dataclass
+class UnitCorrectionEvent(UnitStateEvent):
+    """Optimistic state was rolled back to what the bus reported."""
+
+
+@dataclass
+class NodeAvailabilityEvent(Event):
+    """The units of a node became (un)available, all at once."""
+
+    available: bool
+    units: list[int]
+
+
+@dataclass
+class NodeResetEvent(Event):
+    """A node on the bus was reset."""
+
+
+@dataclass
+class HeartbeatEvent(Event):
+    """The gateway answered a heartbeat."""
+
+
+@dataclass
+class RawPacketEvent(Event):
+    """Every packet received from the bus."""
+
+    packet: Packet
+
+
+class EventStream:
+    """Async iterator over the events that match the filters.
+
+    Every stream has its own bounded buffer, when it is full the overflow
+    policy decides what happens:
+    - drop_oldest: discard the oldest buffered event
+    - drop_newest: discard the incoming event
+    - close: end the stream, the consumer is too slow
+
+    msg_types matches the message an event came from, events that were
+    not caused by a message (availability, the pending state of commands
+    and their corrections) have no msgType and never match it.
+    """
+
+    def __init__(
+        self,
+        owner: list[EventStream],
+        nodes: Iterable[int] | None = None,
+        units: Iterable[tuple[int, int]] | None = None,
+        types: Iterable[type[Event]] | None = None,
+        msg_types: Iterable[MsgType] | None = None,
+        maxsize: int = 1000,
+        overflow: str = DROP_OLDEST,
+        sites: Iterable[str] | None = None,
+    ) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self._owner = owner
+        self._nodes = frozenset(nodes) if nodes is not None else None
+        self._units = frozenset(units) if units is not None else None
+        self._types = tuple(types) if types is not None else None
+        self._msgTypes = frozenset(msg_types) if msg_types is not None else None
+        self._sites = frozenset(sites) if sites is not None else None
+        self._queue: asyncio.Queue[Event | None] = asyncio.Queue(maxsize)
+        self._overflow = overflow
+        self.closed = False
+        self.dropped = 0
+        owner.append(self)
+
+    def matches(self, event: Event) -> bool:
+        if self._types is not None and not isinstance(event, self._types):
+            return False
+        if self._nodes is not None and event.address not in self._nodes:
+            return False
+        if self._units is not None and (event.address, event.unit) not in self._units:
+            return False
+        if self._msgTypes is not None and event.msgType not in self._msgTypes:
+            return False
+        if self._sites is not None and event.site not in self._sites:
+            return False
+        return True
+
+    def push(self, event: Event) -> None:
+        if self.closed:
+            return
+        if self._queue.full():
+            self.dropped += 1
+            if self._overflow == DROP_NEWEST:
+                return
+            if self._overflow == CLOSE:
+                self.close()
+                return
+            self._queue.get_nowait()
+        self._queue.put_nowait(event)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        if self in self._owner:
+            self._owner.remove(self)
+        # wake up the consumer, make room for the end marker if needed
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+    def __aiter__(self) -> EventStream:
+        return self
+
+    async def __anext__(self) -> Event:
+        event = await self._queue.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+    async def __aenter__(self) -> EventStream:
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        self.close()
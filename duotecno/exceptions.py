@@ -8,3 +8,7 @@ class FailedLogin(Exception):
 
 class LoadFailure(Exception):
     pass
+
+
+class CommandError(Exception):
+    pass
@@ -0,0 +1,89 @@
+"""Split the byte stream from the gateway into frames."""
+
+from __future__ import annotations
+from typing import Final
+
+MAX_FRAME: Final = 1024
+
+
+class FrameDecoder:
+    """Incremental [...] frame decoder.
+
+    Bytes are fed as they arrive, in chunks of any size. Everything
+    outside of the brackets (line endings, NULs, garbage) is skipped, a
+    frame that is restarted before it is closed is dropped and a frame
+    that grows over max_length is discarded, so the buffer stays bounded.
+    The counters are there to monitor the link quality.
+    """
+
+    def __init__(self, max_length: int = MAX_FRAME) -> None:
+        self.max_length = max_length
+        self._buf = bytearray()
+        # frames returned
+        self.frames = 0
+        # bytes skipped outside of a frame, line endings not included
+        self.garbage = 0
+        # frames dropped because a new one started before the ]
+        self.truncated = 0
+        # frames dropped because they were too long
+        self.overflows = 0
+        # empty [] frames
+        self.empty = 0
+
+    def reset(self) -> None:
+        """Drop the partial frame, ex. on a reconnect."""
+        self._buf.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "frames": self.frames,
+            "garbage": self.garbage,
+            "truncated": self.truncated,
+            "overflows": self.overflows,
+            "empty": self.empty,
+            "buffered": len(self._buf),
+        }
+
+    def _skip(self, data: str) -> None:
+        if data:
+            self.garbage += len(data) - data.count("\r") - data.count("\n")
+
+    def feed(self, data: bytes) -> list[str]:
+        """Add received bytes, returns the completed frames without [ ]."""
+        if b"\x00" in data:
+            data = data.replace(b"\x00", b"")
+        buf = self._buf
+        buf += data
+        last = buf.rfind(b"]")
+        res = []
+        if last >= 0:
+            # one decode and split for all complete frames in the buffer
+            text = buf[:last].decode("latin-1").replace("\r\n", "")
+            pieces = text.split("]")
+            del buf[: last + 1]
+            for piece in pieces:
+                start = piece.rfind("[")
+                if start < 0:
+                    self._skip(piece)
+                    continue
+                if start:
+                    # frames that were restarted before they were closed
+                    self.truncated += piece.count("[", 0, start)
+                    self._skip(piece[: piece.find("[")])
+                if start + 1 == len(piece):
+                    self.empty += 1
+                elif len(piece) - start - 1 > self.max_length:
+                    self.overflows += 1
+                else:
+                    res.append(piece[start + 1 :])
+            self.frames += len(res)
+        if len(buf) > self.max_length + 1:
+            start = buf.rfind(b"[")
+            self._skip(buf[: max(start, 0)].decode("latin-1"))
+            if start < 0 or len(buf) - start > self.max_length + 1:
+                # too long, the rest of it is skipped as garbage
+                self.overflows += start >= 0
+                buf.clear()
+            else:
+                del buf[:start]
+        return res
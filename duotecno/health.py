@@ -0,0 +1,157 @@
+"""Per node health: last seen, packet rate, latency and errors."""
+
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any, Final, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from duotecno.controller import PyDuotecno
+    from duotecno.node import Node
+
+
+# not used to probe by default, like in StatusPoller their polling is
+# opt-in: not all of them answer, a node would be marked silent for it
+PROBE_SKIP: Final = frozenset(
+    {
+        "SensUnit",
+        "AudioExtUnit",
+        "AudioBasicUnit",
+        "AVMatrixUnit",
+        "IRTXUnit",
+        "VideoMuxUnit",
+    }
+)
+
+
+@dataclass
+class NodeHealth:
+    """Counters of a node, updated for every packet from the node.
+
+    latency is the average time between a status request and the next
+    packet of the node, packets that were not asked for can make it look
+    better than it is.
+    """
+
+    # time.monotonic() of the last packet, 0 if never seen
+    lastSeen: float = 0.0
+    packets: int = 0
+    errors: int = 0
+    # packets per second, over the last health check interval
+    rate: float = 0.0
+    # seconds, exponential moving average
+    latency: float | None = None
+    # no packets for too long, the units are marked unavailable
+    silent: bool = False
+    _requested: float = 0.0
+    _lastPackets: int = 0
+
+    def seen(self, now: float) -> None:
+        self.lastSeen = now
+        self.packets += 1
+        if self._requested:
+            sample = now - self._requested
+            self._requested = 0.0
+            if self.latency is None:
+                self.latency = sample
+            else:
+                self.latency += (sample - self.latency) / 8
+
+    def requested(self) -> None:
+        if not self._requested:
+            self._requested = time.monotonic()
+
+    def score(self) -> float:
+        """1.0 for a healthy node down to 0.0 for a silent one."""
+        if self.silent:
+            return 0.0
+        res = 1.0
+        if self.packets:
+            res -= min(0.5, 5 * self.errors / self.packets)
+        if self.latency:
+            res -= min(0.5, self.latency / 10)
+        return round(res, 2)
+
+    def to_dict(self) -> dict[str, Any]:
+        age = time.monotonic() - self.lastSeen if self.lastSeen else None
+        return {
+            "age": age,
+            "packets": self.packets,
+            "errors": self.errors,
+            "rate": self.rate,
+            "latency": self.latency,
+            "silent": self.silent,
+            "score": self.score(),
+        }
+
+
+class HealthMonitor:
+    """Find silent nodes without dropping the connection.
+
+    A node that did not send anything for probe_after seconds gets a
+    status request, after silent_after seconds its units are marked
+    unavailable. They come back with the next packet of the node.
+    The request is the poll of the first unit, like StatusPoller does,
+    skip holds the unit class names that are never used for this, default
+    PROBE_SKIP. A node without other units is not probed (and so never
+    marked silent).
+    """
+
+    def __init__(
+        self,
+        controller: PyDuotecno,
+        interval: float = 30.0,
+        probe_after: float = 300.0,
+        silent_after: float = 600.0,
+        skip: Iterable[str] | None = None,
+    ) -> None:
+        self._log = logging.getLogger("pyduotecno-health")
+        self.controller = controller
+        self.interval = interval
+        self.probe_after = probe_after
+        self.silent_after = silent_after
+        self.skip = set(PROBE_SKIP if skip is None else skip)
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        self.stop()
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def check(self) -> None:
+        """One round over all nodes."""
+        now = time.monotonic()
+        for node in list(self.controller.nodes.values()):
+            health = node.health
+            health.rate = (health.packets - health._lastPackets) / self.interval
+            health._lastPackets = health.packets
+            # a node that never sent anything counts from now on
+            if not health.lastSeen:
+                health.lastSeen = now
+            age = now - health.lastSeen
+            # only silent when a status request went unanswered
+            if age > self.silent_after and health._requested and not health.silent:
+                self._log.warning(f"Node {node.name} is silent for {age:.0f}s")
+                health.silent = True
+                await node.set_available(False)
+            elif age > self.probe_after:
+                await self.probe(node)
+
+    async def probe(self, node: Node) -> None:
+        for unit in node.get_units():
+            if unit._unitType and type(unit).__name__ not in self.skip:
+                await unit.pollStatus()
+                return
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.controller.connectionOK.wait()
+            await self.check()
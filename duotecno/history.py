@@ -0,0 +1,261 @@
+"""Keep a history of the unit states."""
+
+from __future__ import annotations
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterator
+from typing import BinaryIO, Final
+
+from duotecno.events import UnitStateEvent
+
+# timestamp, address, unit, length of the field name
+_HEAD: Final = struct.Struct("<dBBB")
+_VALUE: Final = struct.Struct("<d")
+# a whole sample, by the length of the field name
+_RECORDS: dict[int, struct.Struct] = {}
+# samples are written to the file in batches of this size, or older
+FLUSH_SIZE: Final = 64 * 1024
+FLUSH_INTERVAL: Final = 1.0
+
+
+class _Ring:
+    """Fixed size ring of (timestamp, value) samples backed by 2 arrays."""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.ts = array("d", bytes(8 * capacity))
+        self.values = array("d", bytes(8 * capacity))
+        self.start = 0
+        self.count = 0
+
+    def append(self, ts: float, value: float) -> None:
+        pos = (self.start + self.count) % self.capacity
+        self.ts[pos] = ts
+        self.values[pos] = value
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def oldest(self) -> float | None:
+        if not self.count:
+            return None
+        return self.ts[self.start]
+
+    def _bisect(self, ts: float) -> int:
+        """Logical index of the first sample at or after ts."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.ts[(self.start + mid) % self.capacity] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def range(
+        self, start: float | None, end: float | None
+    ) -> list[tuple[float, float]]:
+        first = 0 if start is None else self._bisect(start)
+        res = []
+        for i in range(first, self.count):
+            pos = (self.start + i) % self.capacity
+            if end is not None and self.ts[pos] > end:
+                break
+            res.append((self.ts[pos], self.values[pos]))
+        return res
+
+
+class _Index:
+    """File offsets of the values of one key, and their timestamps."""
+
+    __slots__ = ("ts", "offsets")
+
+    def __init__(self) -> None:
+        self.ts = array("d")
+        self.offsets = array("q")
+
+
+class HistoryStore:
+    """Time series of the numeric unit state fields.
+
+    The last capacity samples per (address, unit, field) are kept in
+    memory, when a path is given every sample is also appended to that
+    file so older data can still be queried. The file is written in
+    batches (see flush) and indexed per key on the first query of it.
+    """
+
+    def __init__(self, capacity: int = 1024, path: str | None = None) -> None:
+        self.capacity = capacity
+        self.path = path
+        self._rings: dict[tuple[int, int, str], _Ring] = {}
+        self._fh: BinaryIO | None = open(path, "ab") if path else None
+        # samples not written yet, the file size without them
+        self._buf = bytearray()
+        self._size = self._fh.tell() if self._fh else 0
+        self._flushed = time.monotonic()
+        # (address, unit, field name) => _Index, None until it is needed
+        self._index: dict[tuple[int, int, bytes], _Index] | None = None
+
+    def close(self) -> None:
+        if self._fh:
+            self.flush()
+            self._fh.close()
+            self._fh = None
+
+    def flush(self) -> None:
+        """Write the buffered samples to the file."""
+        if self._fh and self._buf:
+            self._fh.write(self._buf)
+            self._fh.flush()
+            self._size += len(self._buf)
+            self._buf.clear()
+        self._flushed = time.monotonic()
+
+    def record(self, event: UnitStateEvent) -> None:
+        if event.address is None or event.unit is None:
+            return
+        for field, value in event.changes.items():
+            if not isinstance(value, (int, float)):
+                continue
+            key = (event.address, event.unit, field)
+            ring = self._rings.get(key)
+            if ring is None:
+                ring = self._rings[key] = _Ring(self.capacity)
+            ring.append(event.timestamp, value)
+            if self._fh:
+                name = field.encode()
+                rec = _RECORDS.get(len(name))
+                if rec is None:
+                    rec = _RECORDS[len(name)] = struct.Struct(f"<dBBB{len(name)}sd")
+                if self._index is not None:
+                    idx = self._index.get((event.address, event.unit, name))
+                    if idx is None:
+                        idx = self._index[event.address, event.unit, name] = _Index()
+                    idx.ts.append(event.timestamp)
+                    # the value is the last part of the record
+                    end = self._size + len(self._buf) + rec.size
+                    idx.offsets.append(end - _VALUE.size)
+                self._buf += rec.pack(
+                    event.timestamp, event.address, event.unit, len(name), name, value
+                )
+        if self._buf and (
+            len(self._buf) >= FLUSH_SIZE
+            or time.monotonic() - self._flushed >= FLUSH_INTERVAL
+        ):
+            self.flush()
+
+    def fields(self, address: int, unit: int) -> list[str]:
+        return [k[2] for k in self._rings if k[0] == address and k[1] == unit]
+
+    def _build_index(self) -> dict[tuple[int, int, bytes], _Index]:
+        """One pass over the file, after that the index follows record()."""
+        index: dict[tuple[int, int, bytes], _Index] = {}
+        assert self.path
+        data = b""
+        # file offset of data[0], and the first unparsed byte in data
+        base = pos = 0
+        with open(self.path, "rb") as fh:
+            while chunk := fh.read(1 << 20):
+                data = data[pos:] + chunk
+                base += pos
+                pos = 0
+                while pos + _HEAD.size <= len(data):
+                    ts, address, unit, length = _HEAD.unpack_from(data, pos)
+                    at = pos + _HEAD.size + length
+                    if at + _VALUE.size > len(data):
+                        break
+                    key = (address, unit, data[pos + _HEAD.size : at])
+                    idx = index.get(key)
+                    if idx is None:
+                        idx = index[key] = _Index()
+                    idx.ts.append(ts)
+                    idx.offsets.append(base + at)
+                    pos = at + _VALUE.size
+        return index
+
+    def _from_file(
+        self, key: tuple[int, int, str], start: float | None, end: float
+    ) -> Iterator[tuple[float, float]]:
+        if not self.path or not os.path.exists(self.path):
+            return
+        self.flush()
+        if self._index is None:
+            self._index = self._build_index()
+        idx = self._index.get((key[0], key[1], key[2].encode()))
+        if idx is None:
+            return
+        # the samples of a key are appended in time order
+        first = 0 if start is None else bisect_left(idx.ts, start)
+        last = bisect_left(idx.ts, end)
+        with open(self.path, "rb") as fh:
+            for i in range(first, last):
+                fh.seek(idx.offsets[i])
+                yield idx.ts[i], _VALUE.unpack(fh.read(_VALUE.size))[0]
+
+    def query(
+        self,
+        address: int,
+        unit: int,
+        field: str,
+        start: float | None = None,
+        end: float | None = None,
+    ) -> list[tuple[float, float]]:
+        """Return the (timestamp, value) samples between start and end."""
+        key = (address, unit, field)
+        ring = self._rings.get(key)
+        res = ring.range(start, end) if ring else []
+        # only go to disk for the part that is no longer in memory
+        oldest = ring.oldest() if ring else None
+        if oldest is None:
+            oldest = float("inf")
+        if start is None or start < oldest:
+            older = list(self._from_file(key, start, oldest))
+            if end is not None:
+                older = [s for s in older if s[0] <= end]
+            res = older + res
+        return res
+
+    def downsample(
+        self,
+        address: int,
+        unit: int,
+        field: str,
+        bucket: float,
+        start: float | None = None,
+        end: float | None = None,
+        how: str = "mean",
+    ) -> list[tuple[float, float]]:
+        """Aggregate the samples into buckets of bucket seconds.
+
+        how is one of mean, min, max or last.
+        """
+        if how not in ("mean", "min", "max", "last"):
+            raise ValueError(f"Unknown aggregation: {how}")
+        res: list[tuple[float, float]] = []
+        cur: float | None = None
+        vals: list[float] = []
+        for ts, value in self.query(address, unit, field, start, end):
+            b = ts - (ts % bucket)
+            if b != cur:
+                if cur is not None:
+                    res.append((cur, self._aggregate(vals, how)))
+                cur = b
+                vals = []
+            vals.append(value)
+        if cur is not None:
+            res.append((cur, self._aggregate(vals, how)))
+        return res
+
+    @staticmethod
+    def _aggregate(vals: list[float], how: str) -> float:
+        if how == "mean":
+            return sum(vals) / len(vals)
+        if how == "min":
+            return min(vals)
+        if how == "max":
+            return max(vals)
+        return vals[-1]
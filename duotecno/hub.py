@@ -0,0 +1,150 @@
+"""Share one gateway connection with several local clients."""
+
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from typing import Final, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from duotecno.controller import PyDuotecno
+
+# status packets that are cached per (address, unit)
+STATUS_CODES: Final = frozenset({"4", "5", "6", "7", "38"})
+# seconds a status request sent upstream waits for its answer, after that
+# the next client request for the unit is sent again
+PENDING_TTL: Final = 5.0
+# seconds a client gets to read the frames that are buffered for it, a
+# slower client is dropped so it can not make the hub buffer without limit
+DRAIN_TIMEOUT: Final = 5.0
+
+
+class DuotecnoHub:
+    """A local server that looks like a gateway to its clients.
+
+    The hub uses an already connected PyDuotecno for the upstream session,
+    so login, heartbeat and discovery only happen once.
+    Downstream clients (any PyDuotecno) connect to the hub instead:
+    - login and heartbeats are answered by the hub
+    - the database requests are answered from the discovered database
+    - status requests are answered from the last seen status if possible
+    - all other commands go out over the shared send path
+    - every frame received from the gateway is sent to all clients, a
+      client that does not read them within DRAIN_TIMEOUT is dropped
+    """
+
+    def __init__(self, controller: PyDuotecno, password: str | None = None) -> None:
+        self._log = logging.getLogger("pyduotecno-hub")
+        self.controller = controller
+        self.password = controller.password if password is None else password
+        self.statusFrames: dict[tuple[str, str], bytes] = {}
+        # status requests sent upstream that are not answered yet, with
+        # the time.monotonic() they expire
+        self._pending: dict[tuple[str, str], float] = {}
+        self._clients: set[asyncio.StreamWriter] = set()
+        # clients with frames waiting in their send buffer
+        self._draining: dict[asyncio.StreamWriter, asyncio.Task[None]] = {}
+        self._server: asyncio.base_events.Server | None = None
+
+    @property
+    def port(self) -> int:
+        assert self._server
+        return int(self._server.sockets[0].getsockname()[1])
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.controller.rawListeners.append(self._upstream)
+        self._server = await asyncio.start_server(self._client, host, port)
+        self._log.info(f"Hub listening on {host}:{self.port}")
+
+    async def stop(self) -> None:
+        if self._upstream in self.controller.rawListeners:
+            self.controller.rawListeners.remove(self._upstream)
+        for task in list(self._draining.values()):
+            task.cancel()
+        for w in list(self._clients):
+            w.close()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def _upstream(self, frame: str) -> None:
+        """Called for every frame received from the gateway."""
+        data = f"[{frame}]\r\n".encode()
+        p = frame.split(",", 4)
+        if p[0] in STATUS_CODES and len(p) > 3:
+            self.statusFrames[(p[2], p[3])] = data
+            self._pending.pop((p[2], p[3]), None)
+        for w in self._clients:
+            w.write(data)
+            # the frame did not go out right away, the client is behind
+            if w.transport.get_write_buffer_size() and w not in self._draining:
+                self._draining[w] = asyncio.create_task(self._drain(w))
+
+    async def _drain(self, writer: asyncio.StreamWriter) -> None:
+        try:
+            await asyncio.wait_for(writer.drain(), DRAIN_TIMEOUT)
+        except (TimeoutError, ConnectionError):
+            self._log.warning("Dropping a client that does not keep up")
+            self._clients.discard(writer)
+            writer.close()
+        finally:
+            self._draining.pop(writer, None)
+
+    async def _client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._log.info("Client connected")
+        loggedIn = False
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                frame = line.strip().lstrip(b"[").rstrip(b"]").decode()
+                if not loggedIn:
+                    if frame.startswith("214,3,"):
+                        passw = "".join(chr(int(i)) for i in frame.split(",")[3:])
+                        loggedIn = passw == self.password
+                        writer.write(f"[67,3,{int(loggedIn)}]\r\n".encode())
+                        if loggedIn:
+                            self._clients.add(writer)
+                    continue
+                reply = self._local(frame)
+                if reply is not None:
+                    if reply:
+                        writer.write(reply)
+                else:
+                    await self.controller.write(f"[{frame}]")
+                await writer.drain()
+        except (ConnectionError, UnicodeDecodeError, ValueError):
+            pass
+        finally:
+            self._log.info("Client disconnected")
+            self._clients.discard(writer)
+            writer.close()
+
+    def _local(self, frame: str) -> bytes | None:
+        """Answer a request without going to the gateway, if possible.
+
+        An empty reply means the answer is already on its way.
+        """
+        if frame == "215,1":
+            return b"[72,1]\r\n"
+        if not frame.startswith("209,"):
+            return None
+        p = frame.split(",")
+        if p[1] == "3" and len(p) > 3:
+            key = (p[2], p[3])
+            if key in self.statusFrames:
+                return self.statusFrames[key]
+            now = time.monotonic()
+            if self._pending.get(key, 0.0) > now:
+                return b""
+            self._pending[key] = now + PENDING_TTL
+            return None
+        if p[1] == "5":
+            return b"[64,5,2]\r\n"
+        dbKey = ",".join(["64"] + p[1:])
+        if dbKey in self.controller.dbFrames:
+            return f"[{self.controller.dbFrames[dbKey]}]\r\n".encode()
+        return None
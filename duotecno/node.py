@@ -1,10 +1,21 @@
 from __future__ import annotations
-from typing import Callable, Awaitable
+from typing import Callable, Awaitable, TYPE_CHECKING
 import asyncio
 import logging
+import time
 
-from duotecno.protocol import NodeType, EV_NODEDATABASEINFO_2, BaseMessage
+from duotecno.commands import Command
+from duotecno.events import NodeAvailabilityEvent
+from duotecno.health import NodeHealth
+from duotecno.protocol import (
+    NodeType,
+    EV_NODEDATABASEINFO_2,
+    BaseMessage,
+    MsgType,
+    message_type,
+)
 from duotecno.unit import (
+    received_type,
     BaseUnit,
     SwitchUnit,
     SensUnit,
@@ -12,8 +23,32 @@ from duotecno.unit import (
     DuoswitchUnit,
     VirtualUnit,
     ControlUnit,
+    AudioExtUnit,
+    AudioBasicUnit,
+    AVMatrixUnit,
+    IRTXUnit,
+    VideoMuxUnit,
 )
 
+if TYPE_CHECKING:
+    from duotecno.events import Event
+    from duotecno.topology import Topology
+
+# unitTypeName => class
+UNIT_CLASSES: dict[str, type[BaseUnit]] = {
+    "SWITCH": SwitchUnit,
+    "SENS": SensUnit,
+    "DIM": DimUnit,
+    "DUOSWITCH": DuoswitchUnit,
+    "VIRTUAL": VirtualUnit,
+    "CONTROL": ControlUnit,
+    "AUDIO_EXT": AudioExtUnit,
+    "AUDIO_BASIC": AudioBasicUnit,
+    "AVMATRIC": AVMatrixUnit,
+    "IRTX": IRTXUnit,
+    "VIDEOMUX": VideoMuxUnit,
+}
+
 
 class Node:
     name: str
@@ -23,6 +58,9 @@ class Node:
     numUnits: int
     units: dict[int, BaseUnit]
     isloaded: asyncio.Event
+    # seconds before unconfirmed optimistic unit state is rolled back,
+    # None disables the optimistic mode
+    optimistic: float | None = None
 
     def __init__(
         self,
@@ -31,8 +69,11 @@ class Node:
         index: int,
         nodeType: NodeType,
         numUnits: int,
-        writer: Callable[[str], Awaitable[None]],
+        writer: Callable[[str | bytes], Awaitable[None]],
         pwaiter: Callable[[str], Awaitable[None]],
+        publisher: Callable[[Event], None] | None = None,
+        optimistic: float | None = None,
+        topology: Topology | None = None,
     ) -> None:
         self._log = logging.getLogger("pyduotecno-node")
         self.name = name
@@ -42,18 +83,34 @@ class Node:
         self.nodeType = nodeType
         self.writer = writer
         self.pwaiter = pwaiter
+        self.publisher = publisher
+        self.optimistic = optimistic
+        self.topology = topology
         self.isLoaded = asyncio.Event()
         self.isLoaded.clear()
         self.units = {}
+        self.health = NodeHealth()
         self._log.info(f"New node found: {self.name}")
 
     async def enable(self) -> None:
-        for unit in self.units.values():
-            await unit.enable()
+        await self.set_available(True)
 
     async def disable(self) -> None:
-        for unit in self.units.values():
-            await unit.disable()
+        await self.set_available(False)
+
+    async def set_available(self, available: bool) -> None:
+        """Flip the availability of all units, with a single event."""
+        changed = [u for u in self.units.values() if u._available != available]
+        if not changed:
+            return
+        for unit in changed:
+            unit._available = available
+        self.publish(
+            NodeAvailabilityEvent(
+                available, [u.unit for u in changed], address=self.address
+            )
+        )
+        await asyncio.gather(*(m() for u in changed for m in u._on_status_update))
 
     def get_name(self) -> str:
         return self.name
@@ -64,10 +121,35 @@ class Node:
     def __repr__(self) -> str:
         items = []
         for k, v in self.__dict__.items():
-            if k not in ["_log", "writer"]:
+            if k not in ["_log", "writer", "pwaiter", "publisher"]:
                 items.append(f"{k} = {v!r}")
         return "{}[{}]".format(type(self), ", ".join(items))
 
+    async def handleError(self, unit: int | None, exc: Exception) -> None:
+        """Fail the pending commands of a unit and refresh it.
+
+        without a unit the error is for the oldest command that is still
+        waiting for its status
+        """
+        self.health.errors += 1
+        if unit is None:
+            pending = [
+                (since, u.unit)
+                for u in self.get_units()
+                if (since := u._pending_since()) is not None
+            ]
+            if not pending:
+                return
+            unit = min(pending)[1]
+        u = self.units[unit]
+        if u.is_pending():
+            await u._fail(exc)
+            await u.pollStatus()
+
+    def publish(self, event: Event) -> None:
+        if self.publisher:
+            self.publisher(event)
+
     def get_units(self) -> list[BaseUnit]:
         res = []
         for unit in self.units.values():
@@ -87,33 +169,38 @@ class Node:
     async def load(self) -> None:
         self._log.debug(f"Node {self.name}: Requesting units")
         for i in range(self.numUnits):
-            await self.writer(f"[209,2,{self.address},{i}]")
+            cmd = Command(MsgType.FC_NODEDATABASEREQUESTSTATUS, 2, (self.address, i))
+            await self.writer(cmd.encode())
             await self.pwaiter(f"64,2,{self.address},{i}")
 
     async def handlePacket(self, packet: BaseMessage) -> None:
+        now = time.monotonic()
+        self.health.seen(now)
+        if self.health.silent:
+            self._log.info(f"Node {self.name} is back")
+            self.health.silent = False
+            await self.set_available(True)
         if isinstance(packet, EV_NODEDATABASEINFO_2):
-            if packet.unit not in self.units:
-                u = BaseUnit
-                if packet.unitTypeName == "SWITCH":
-                    u = SwitchUnit
-                elif packet.unitTypeName == "SENS":
-                    u = SensUnit
-                elif packet.unitTypeName == "DIM":
-                    u = DimUnit
-                elif packet.unitTypeName == "DUOSWITCH":
-                    u = DuoswitchUnit
-                elif packet.unitTypeName == "VIRTUAL":
-                    u = VirtualUnit
-                elif packet.unitTypeName == "CONTROL":
-                    u = ControlUnit
-                else:
+            u = UNIT_CLASSES.get(packet.unitTypeName, BaseUnit)
+            old = self.units.get(packet.unit)
+            # a reload (after a node reset) replaces the changed units only
+            if old is None or type(old) is not u or old.name != packet.unitName:
+                if u is BaseUnit:
                     self._log.warning(f"Unhandled unitType: {packet.unitTypeName}")
                 self.units[packet.unit] = u(
                     self, name=packet.unitName, unit=packet.unit, writer=self.writer
                 )
+                if self.topology is not None:
+                    self.topology.add(self.units[packet.unit])
             if len(self.units) == self.numUnits:
                 self.isLoaded.set()
             return
         if hasattr(packet, "unit") and packet.unit in self.units:
-            await self.units[packet.unit].handlePacket(packet)
+            unit = self.units[packet.unit]
+            unit._last_seen = now
+            token = received_type.set(message_type(packet))
+            try:
+                await unit.handlePacket(packet)
+            finally:
+                received_type.reset(token)
             return
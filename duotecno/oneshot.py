@@ -0,0 +1,21 @@
+"""Send a few commands without discovering the bus."""
+
+from __future__ import annotations
+
+from duotecno.controller import PyDuotecno
+
+
+async def send_commands(host: str, port: int, password: str, *frames: str) -> None:
+    """Log in, send the frames and disconnect.
+
+    frames are raw frame strings like "[209,3,1,2,4]", the node and unit
+    database is not loaded so this is as fast as the login round-trip.
+    """
+    controller = PyDuotecno()
+    await controller.connect(host, port, password, testOnly=True)
+    try:
+        for frame in frames:
+            await controller.write(frame)
+        await controller.flush()
+    finally:
+        await controller.disconnect()
@@ -0,0 +1,136 @@
+"""Periodically refresh the status of units."""
+
+from __future__ import annotations
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Final, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from duotecno.controller import PyDuotecno
+    from duotecno.unit import BaseUnit
+
+# the longest sleep before the topology is checked for new units
+RESYNC: Final = 5.0
+# seconds between 2 polls per unit class, 0 disables polling
+# the sensunits are not polled by default, not all of them answer a
+# status request (see SensUnit.requestStatus), enable with
+# intervals={"SensUnit": 300.0}
+DEFAULT_POLL_INTERVALS: Final = {
+    "SensUnit": 0.0,
+    "DimUnit": 1800.0,
+    "SwitchUnit": 1800.0,
+    "DuoswitchUnit": 1800.0,
+    "VirtualUnit": 1800.0,
+    "ControlUnit": 1800.0,
+    "AudioExtUnit": 600.0,
+    "AudioBasicUnit": 600.0,
+    "AVMatrixUnit": 600.0,
+    "IRTXUnit": 0.0,
+    "VideoMuxUnit": 600.0,
+}
+
+
+class StatusPoller:
+    """Re-poll units that did not push an update for a while.
+
+    - every unit class has its own interval
+    - a unit that sent a packet within its interval is not polled
+    - the first polls are spread over the interval to avoid bursts
+    - at most budget polls per second are sent over the bus
+    - units (re)discovered later are picked up from the topology
+    """
+
+    def __init__(
+        self,
+        controller: PyDuotecno,
+        intervals: dict[str, float] | None = None,
+        budget: float = 2.0,
+    ) -> None:
+        self._log = logging.getLogger("pyduotecno-poller")
+        self.controller = controller
+        self.intervals = dict(DEFAULT_POLL_INTERVALS)
+        if intervals:
+            self.intervals.update(intervals)
+        self.budget = budget
+        self.polls = 0
+        self.skipped = 0
+        self._heap: list[tuple[float, int, BaseUnit]] = []
+        self._seq = itertools.count()
+        self._task: asyncio.Task[None] | None = None
+        # topology version the schedule was built for
+        self._version = -1
+
+    def _interval(self, unit: BaseUnit) -> float:
+        return self.intervals.get(type(unit).__name__, 0.0)
+
+    def schedule(self) -> None:
+        """(Re)build the schedule from the currently known units."""
+        self._heap = []
+        self._sync()
+
+    def _sync(self) -> None:
+        """Schedule the units that are new, drop the ones that are gone."""
+        self._version = self.controller.topology.version
+        current = {
+            id(unit): unit
+            for node in self.controller.nodes.values()
+            for unit in node.get_units()
+            if self._interval(unit) > 0
+        }
+        self._heap = [item for item in self._heap if id(item[2]) in current]
+        known = {id(item[2]) for item in self._heap}
+        now = time.monotonic()
+        groups: dict[float, list[BaseUnit]] = {}
+        for key, unit in current.items():
+            if key not in known:
+                groups.setdefault(self._interval(unit), []).append(unit)
+        for interval, units in groups.items():
+            step = interval / len(units)
+            for i, unit in enumerate(units):
+                self._heap.append((now + (i + 1) * step, next(self._seq), unit))
+        heapq.heapify(self._heap)
+        self._log.debug(f"Scheduled {len(self._heap)} units for polling")
+
+    def start(self) -> None:
+        self.stop()
+        self.schedule()
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        gap = 1 / self.budget if self.budget > 0 else 0.0
+        lastPoll = 0.0
+        while True:
+            if self._version != self.controller.topology.version:
+                self._sync()
+            if not self._heap:
+                await asyncio.sleep(RESYNC)
+                continue
+            due, _seq, unit = self._heap[0]
+            now = time.monotonic()
+            if due > now:
+                await asyncio.sleep(min(due - now, RESYNC))
+                continue
+            heapq.heappop(self._heap)
+            interval = self._interval(unit)
+            lastSeen = unit.get_last_seen()
+            if lastSeen and lastSeen + interval > now:
+                # the unit pushed an update on its own, no need to poll
+                self.skipped += 1
+                heapq.heappush(self._heap, (lastSeen + interval, next(self._seq), unit))
+                continue
+            await self.controller.connectionOK.wait()
+            wait = lastPoll + gap - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            lastPoll = time.monotonic()
+            self.polls += 1
+            await unit.pollStatus()
+            heapq.heappush(self._heap, (lastPoll + interval, next(self._seq), unit))
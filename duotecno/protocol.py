@@ -1,11 +1,16 @@
 from __future__ import annotations
-from typing import final, Deque
+from typing import Any, final, Deque
 from enum import Enum, unique
 from dataclasses import dataclass, field
 import collections
-import sys
+import logging
+import re
 import json
 
+from duotecno.serialize import message_to_dict
+
+_log = logging.getLogger("pyduotecno-protocol")
+
 
 @unique
 class MsgType(Enum):
@@ -78,24 +83,24 @@ class Packet:
     data: Deque[int]
     cls: BaseMessage | None = field(init=False)
 
-    def __lt__(self, other: Packet) -> bool:
-        if isinstance(other.cls, EV_HEARTBEATSTATUS_1):
-            return True
-        return False
-
     def __post_init__(self) -> None:
         """fill in the command name, make the subsclass."""
-        try:
-            self.cmdName = MsgType(self.cmdCode).name
-        except ValueError:
-            self.cmdName = "UNKNOWN"
+        self.cmdName = _CMD_NAMES.get(self.cmdCode, "UNKNOWN")
         self.data = collections.deque(self.data)
-        tmp = getattr(sys.modules[__name__], f"{self.cmdName}_{self.method}", None)
+        tmp = DECODERS.get((self.cmdCode, self.method))
+        if tmp is None and self.cmdCode in _LAZY_CODES:
+            _load_ext()
+            tmp = DECODERS.get((self.cmdCode, self.method))
         if tmp:
-            self.cls = tmp(self.data)
+            try:
+                self.cls = tmp(self.data)
+            except IndexError:
+                self.cls = None
+                _log.warning("Packet too short: %s", self)
+                return
             # self.data should be empty once the message consumed it
             if len(self.data) != 0:
-                print(f"ERROR!!! Not all data consumed: {self}")
+                _log.warning("Not all data consumed: %s", self)
         else:
             self.cls = None
 
@@ -104,32 +109,39 @@ def calc_value(msb: int, lsb: int) -> int:
     return (256 * msb) + lsb
 
 
+def enum_name(enum: type[Enum], value: int) -> str:
+    """Name of an enum value, UNKNOWN for values the enum does not know."""
+    try:
+        return enum(value).name
+    except ValueError:
+        return "UNKNOWN"
+
+
+def encode_text(text: str) -> list[int]:
+    return [len(text), *map(ord, text)]
+
+
 class BaseMessage:
     def __init__(self, data: Deque[int]) -> None:
         pass
 
+    def encode(self) -> list[int]:
+        """The payload this message was decoded from."""
+        return []
+
+    def encode_frame(self) -> str:
+        """The full frame (without the brackets) for this message."""
+        cmd, method = _CODES[type(self)]
+        return ",".join(map(str, (cmd, method, *self.encode())))
+
     def to_json(self) -> str:
         return json.dumps(self.to_json_basic())
 
-    def to_json_basic(self) -> dict[str, str]:
+    def to_json_basic(self) -> dict[str, Any]:
         """
         Create JSON structure with generic attributes
         """
-        me = {}
-        me["name"] = str(self.__class__.__name__)
-        me.update(self.__dict__.copy())
-        for key in me.copy():
-            if key == "name":
-                continue
-            if isinstance(me[key], str):
-                continue
-            if callable(getattr(self, key)) or key.startswith("__"):
-                del me[key]
-            if isinstance(me[key], Enum):
-                me[key] = me[key].name
-            if isinstance(me[key], (bytes, bytearray)):
-                me[key] = str(me[key], "utf-8")
-        return me
+        return message_to_dict(self)
 
     def __repr__(self) -> str:
         return self.to_json()
@@ -144,6 +156,9 @@ class BaseNodeUnitMessage(BaseMessage):
         self.address = data.popleft()
         self.unit = data.popleft()
 
+    def encode(self) -> list[int]:
+        return [self.address, self.unit]
+
 
 class BaseNodeUnitTypeMessage(BaseNodeUnitMessage):
     unitType: int
@@ -152,6 +167,32 @@ class BaseNodeUnitTypeMessage(BaseNodeUnitMessage):
         super().__init__(data)
         self.unitType = data.popleft()
 
+    def encode(self) -> list[int]:
+        return [*super().encode(), self.unitType]
+
+
+class BaseUnitStatusMessage(BaseNodeUnitTypeMessage):
+    """Status of a unit family without a dedicated decoder.
+
+    The family specific payload after the state is kept as is. The
+    decoders are in protocol_ext, this base lives here so the units can
+    check for it without loading that module.
+    """
+
+    config: int
+    state: int
+    values: list[int]
+
+    def __init__(self, data: Deque[int]) -> None:
+        super().__init__(data)
+        self.config = data.popleft()
+        self.state = data.popleft()
+        self.values = list(data)
+        data.clear()
+
+    def encode(self) -> list[int]:
+        return [*super().encode(), self.config, self.state, *self.values]
+
 
 class EV_HEARTBEATSTATUS_1(BaseMessage):
     pass
@@ -163,6 +204,9 @@ class EV_CLIENTCONNECTSET_3(BaseMessage):
     def __init__(self, data: Deque[int]) -> None:
         self.loginOK = data.popleft()
 
+    def encode(self) -> list[int]:
+        return [self.loginOK]
+
 
 @unique
 class DbState(Enum):
@@ -172,11 +216,15 @@ class DbState(Enum):
 
 
 class EV_NODEDATABASEINFO_5(BaseMessage):
-    state: DbState
+    # the raw byte, a DbState value (the gateway may send others)
+    state: int
 
     def __init__(self, data: Deque[int]) -> None:
         self.state = data.popleft()
 
+    def encode(self) -> list[int]:
+        return [int(self.state)]
+
 
 class EV_NODEDATABASEINFO_0(BaseMessage):
     numNode: int
@@ -184,6 +232,9 @@ class EV_NODEDATABASEINFO_0(BaseMessage):
     def __init__(self, data: Deque[int]) -> None:
         self.numNode = data.popleft()
 
+    def encode(self) -> list[int]:
+        return [self.numNode]
+
 
 class EV_UNITMACROCOMMAND_0(BaseNodeUnitMessage):
     event: int
@@ -198,6 +249,9 @@ class EV_UNITMACROCOMMAND_0(BaseNodeUnitMessage):
         self.code1 = data.popleft()
         self.code2 = data.popleft()
 
+    def encode(self) -> list[int]:
+        return [*super().encode(), self.event, self.state, self.code1, self.code2]
+
 
 @unique
 class NodeType(Enum):
@@ -225,13 +279,26 @@ class EV_NODEDATABASEINFO_1(BaseMessage):
         self.index = data.popleft()
         self.address = data.popleft()
         # next 4 are no needed
-        [data.popleft() for _i in range(4)]
+        self._reserved = [data.popleft() for _i in range(4)]
         self.nodeName = "".join([chr(data.popleft()) for _i in range(data.popleft())])
         self.numUnits = data.popleft()
-        self.nodeType = NodeType(data.popleft())
-        self.nodeTypeName = NodeType(self.nodeType).name
+        # the raw value, unknown types are all NodeType.UNKNOWN
+        self._nodeType = data.popleft()
+        self.nodeType = NodeType(self._nodeType)
+        self.nodeTypeName = self.nodeType.name
         self.flags = data.popleft()
 
+    def encode(self) -> list[int]:
+        return [
+            self.index,
+            self.address,
+            *self._reserved,
+            *encode_text(self.nodeName),
+            self.numUnits,
+            self._nodeType,
+            self.flags,
+        ]
+
 
 @unique
 class UnitType(Enum):
@@ -273,6 +340,17 @@ class EV_NODEDATABASEINFO_2(BaseMessage):
         self.unitTypeName = UnitType(self.unitType).name
         self.unitFlags = data.popleft()
 
+    def encode(self) -> list[int]:
+        return [
+            self.address,
+            self.unit,
+            self.laddress,
+            self.lunit,
+            *encode_text(self.unitName),
+            self.unitType,
+            self.unitFlags,
+        ]
+
 
 @final
 @unique
@@ -289,9 +367,12 @@ class EV_UNITSWITCHSTATUS_0(BaseNodeUnitTypeMessage):
     def __init__(self, data: Deque[int]) -> None:
         super().__init__(data)
         # config, reserved
-        data.popleft()
+        self._config = data.popleft()
         self.state = data.popleft()
-        self.stateName = SwitchStatus(self.state).name
+        self.stateName = enum_name(SwitchStatus, self.state)
+
+    def encode(self) -> list[int]:
+        return [*super().encode(), self._config, self.state]
 
 
 class EV_UNITDIMSTATUS_0(BaseNodeUnitTypeMessage):
@@ -302,11 +383,14 @@ class EV_UNITDIMSTATUS_0(BaseNodeUnitTypeMessage):
     def __init__(self, data: Deque[int]) -> None:
         super().__init__(data)
         # config, reserved
-        data.popleft()
+        self._config = data.popleft()
         self.state = data.popleft()
-        self.stateName = SwitchStatus(self.state).name
+        self.stateName = enum_name(SwitchStatus, self.state)
         self.dimValue = data.popleft()
 
+    def encode(self) -> list[int]:
+        return [*super().encode(), self._config, self.state, self.dimValue]
+
 
 @final
 @unique
@@ -325,9 +409,12 @@ class EV_UNITDUOSWITCHSTATUS_0(BaseNodeUnitTypeMessage):
     def __init__(self, data: Deque[int]) -> None:
         super().__init__(data)
         # config, reserved
-        data.popleft()
+        self._config = data.popleft()
         self.state = data.popleft()
-        self.stateName = DuoswitchStatus(self.state).name
+        self.stateName = enum_name(DuoswitchStatus, self.state)
+
+    def encode(self) -> list[int]:
+        return [*super().encode(), self._config, self.state]
 
 
 @final
@@ -392,6 +479,11 @@ def sens_calc_value(msb: int, lsb: int) -> float:
     return val / 10
 
 
+def sens_encode_value(value: float) -> tuple[int, int]:
+    """Reverse of sens_calc_value, (msb, lsb) in two's complement."""
+    return divmod(int(round(value * 10)) & 0xFFFF, 256)
+
+
 class EV_UNITSENSSTATUS_0(BaseNodeUnitTypeMessage):
     config: int
     configName: str
@@ -410,19 +502,31 @@ class EV_UNITSENSSTATUS_0(BaseNodeUnitTypeMessage):
     def __init__(self, data: Deque[int]) -> None:
         super().__init__(data)
         self.config = data.popleft()
-        self.configName = SensType(self.config).name
+        self.configName = enum_name(SensType, self.config)
         self.controlState = data.popleft()
-        self.controlStateName = SensControl(self.controlState).name
+        self.controlStateName = enum_name(SensControl, self.controlState)
         self.state = data.popleft()
-        self.stateName = SensState(self.state).name
+        self.stateName = enum_name(SensState, self.state)
         self.preset = data.popleft()
-        self.presetName = SensPreset(self.preset).name
+        self.presetName = enum_name(SensPreset, self.preset)
         self.value = sens_calc_value(data.popleft(), data.popleft())
         self.sun = sens_calc_value(data.popleft(), data.popleft())
         self.halfsun = sens_calc_value(data.popleft(), data.popleft())
         self.moon = sens_calc_value(data.popleft(), data.popleft())
         self.halfmoon = sens_calc_value(data.popleft(), data.popleft())
 
+    def encode(self) -> list[int]:
+        res = [
+            *super().encode(),
+            self.config,
+            self.controlState,
+            self.state,
+            self.preset,
+        ]
+        for val in (self.value, self.sun, self.halfsun, self.moon, self.halfmoon):
+            res.extend(sens_encode_value(val))
+        return res
+
 
 class EV_UNITSENSSTATUS_1(EV_UNITSENSSTATUS_0):
     offset: float
@@ -439,11 +543,21 @@ class EV_UNITSENSSTATUS_1(EV_UNITSENSSTATUS_0):
         self.offset = sens_calc_value(data.popleft(), data.popleft())
         self.swing = sens_calc_value(data.popleft(), data.popleft())
         self.workingMode = data.popleft()
-        self.workingModeName = SensWorkingmode(self.workingMode).name
+        self.workingModeName = enum_name(SensWorkingmode, self.workingMode)
         self.fanSpeed = data.popleft()
-        self.fanSpeedName = SensFanspeed(self.fanSpeed).name
+        self.fanSpeedName = enum_name(SensFanspeed, self.fanSpeed)
         self.swingMode = data.popleft()
-        self.swingModeName = SensControl(self.swingMode).name
+        self.swingModeName = enum_name(SensControl, self.swingMode)
+
+    def encode(self) -> list[int]:
+        return [
+            *super().encode(),
+            *sens_encode_value(self.offset),
+            *sens_encode_value(self.swing),
+            self.workingMode,
+            self.fanSpeed,
+            self.swingMode,
+        ]
 
 
 @final
@@ -460,6 +574,93 @@ class EV_UNITCONTROLSTATUS_0(BaseNodeUnitTypeMessage):
     def __init__(self, data: Deque[int]) -> None:
         super().__init__(data)
         # config ignore
-        data.popleft()
+        self._config = data.popleft()
         self.status = data.popleft()
-        self.statusName = ControLStatus(self.status).name
+        self.statusName = enum_name(ControLStatus, self.status)
+
+    def encode(self) -> list[int]:
+        return [*super().encode(), self._config, self.status]
+
+
+class BaseNodeValuesMessage(BaseMessage):
+    """Node level message, the payload after the address is kept as is."""
+
+    address: int
+    values: list[int]
+
+    def __init__(self, data: Deque[int]) -> None:
+        self.address = data.popleft()
+        self.values = list(data)
+        data.clear()
+
+    def encode(self) -> list[int]:
+        return [self.address, *self.values]
+
+
+class EV_NODERESET_0(BaseMessage):
+    address: int
+
+    def __init__(self, data: Deque[int]) -> None:
+        self.address = data.popleft()
+        self._rest = list(data)
+        data.clear()
+
+    def encode(self) -> list[int]:
+        return [self.address, *self._rest]
+
+
+class EV_MESSAGEERROR_0(BaseNodeValuesMessage):
+    """A command was refused, values holds the rest of the error payload.
+
+    The layout is not documented, the first byte being the node address is
+    an assumption and the rest is kept raw (the simulator sends the
+    address and arguments of the refused command, also a guess). A first
+    value that is a unit with pending commands gets the error, otherwise
+    the oldest pending command of the node.
+    """
+
+    pass
+
+
+_CMD_NAMES: dict[int, str] = {m.value: m.name for m in MsgType}
+# (cmdCode, method) => decoder class
+DECODERS: dict[tuple[int, int], type[BaseMessage]] = {}
+# and the reverse, for the encoders
+_CODES: dict[type[BaseMessage], tuple[int, int]] = {}
+_DECODER_NAME = re.compile(r"^(EV_[A-Z]+)_(\d+)$")
+
+
+def register(cls: type[BaseMessage]) -> type[BaseMessage]:
+    """Register a decoder, named <MsgType name>_<method>."""
+    match = _DECODER_NAME.match(cls.__name__)
+    if not match or match.group(1) not in MsgType.__members__:
+        raise ValueError(f"Not a decoder name: {cls.__name__}")
+    key = (MsgType[match.group(1)].value, int(match.group(2)))
+    DECODERS[key] = cls
+    _CODES[cls] = key
+    return cls
+
+
+def message_type(message: BaseMessage) -> MsgType | None:
+    """The MsgType a decoded message came in as."""
+    key = _CODES.get(type(message))
+    return MsgType(key[0]) if key else None
+
+
+# message families that live in protocol_ext
+_LAZY_CODES: set[int] = {23, 48, 54, 70, 71, 73, 74}
+
+
+def _load_ext() -> None:
+    import duotecno.protocol_ext  # noqa: F401
+
+    _LAZY_CODES.clear()
+
+
+for _obj in list(globals().values()):
+    if (
+        isinstance(_obj, type)
+        and issubclass(_obj, BaseMessage)
+        and _DECODER_NAME.match(_obj.__name__)
+    ):
+        register(_obj)
@@ -0,0 +1,96 @@
+"""Decoders for the less common message families.
+
+Import the decoders from here, not from duotecno.protocol. A parser that
+only imports duotecno.protocol loads this on first use, see _LAZY_CODES.
+"""
+
+from __future__ import annotations
+from typing import Deque
+
+from duotecno.protocol import (
+    BaseMessage,
+    BaseNodeUnitTypeMessage,
+    BaseNodeValuesMessage,
+    BaseUnitStatusMessage,
+    register,
+)
+
+
+class EV_UNITDEFAULTSTATUS_0(BaseUnitStatusMessage):
+    pass
+
+
+class EV_UNITAUDIOSTATUS_0(BaseUnitStatusMessage):
+    pass
+
+
+class EV_UNITAUDIOEXTSTATUS_0(BaseUnitStatusMessage):
+    pass
+
+
+class EV_UNITAVMATRIXSTATUS_0(BaseUnitStatusMessage):
+    pass
+
+
+class EV_NODEMANAGEMENTINFO_0(BaseNodeValuesMessage):
+    pass
+
+
+class EV_SCHEDULESTATUS_0(BaseMessage):
+    values: list[int]
+
+    def __init__(self, data: Deque[int]) -> None:
+        self.values = list(data)
+        data.clear()
+
+    def encode(self) -> list[int]:
+        return list(self.values)
+
+
+class EV_TIMEDATESTATUS_1(BaseMessage):
+    """The gateway clock.
+
+    The layout (hour, minute, second, weekday, day, month, year - 2000) is
+    not documented, it is inferred from the FC_TIMEDATE command and not
+    verified against a gateway. Only TimeSync uses it.
+    """
+
+    hour: int
+    minute: int
+    second: int
+    weekDay: int
+    day: int
+    month: int
+    year: int
+
+    def __init__(self, data: Deque[int]) -> None:
+        self.hour = data.popleft()
+        self.minute = data.popleft()
+        self.second = data.popleft()
+        self.weekDay = data.popleft()
+        self.day = data.popleft()
+        self.month = data.popleft()
+        self.year = 2000 + data.popleft()
+
+    def encode(self) -> list[int]:
+        return [
+            self.hour,
+            self.minute,
+            self.second,
+            self.weekDay,
+            self.day,
+            self.month,
+            self.year - 2000,
+        ]
+
+
+for _cls in (
+    EV_UNITDEFAULTSTATUS_0,
+    EV_UNITAUDIOSTATUS_0,
+    EV_UNITAUDIOEXTSTATUS_0,
+    EV_UNITAVMATRIXSTATUS_0,
+    EV_NODEMANAGEMENTINFO_0,
+    EV_SCHEDULESTATUS_0,
+    EV_TIMEDATESTATUS_1,
+):
+    register(_cls)
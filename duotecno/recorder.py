@@ -0,0 +1,133 @@
+"""Record the bus traffic and replay it."""
+
+from __future__ import annotations
+import asyncio
+import os
+import struct
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import BinaryIO, Final, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from duotecno.controller import PyDuotecno
+
+MAGIC: Final = b"DTRC\x01"
+RX: Final = 0
+TX: Final = 1
+# timestamp, direction, length of the frame
+_RECORD: Final = struct.Struct("<dBH")
+
+
+class TrafficRecorder:
+    """Append timestamped frames to a capture file.
+
+    Every record is a small binary header followed by the frame content
+    (without the brackets). When the file grows over max_bytes it is
+    rotated to path.1 .. path.<backup_count>, like logging does.
+    """
+
+    def __init__(
+        self, path: str, max_bytes: int = 0, backup_count: int = 5
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._fh: BinaryIO = self._open()
+
+    def _open(self) -> BinaryIO:
+        fh = open(self.path, "ab")
+        if fh.tell() == 0:
+            fh.write(MAGIC)
+        return fh
+
+    def _rotate(self) -> None:
+        self._fh.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = f"{self.path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._fh = self._open()
+
+    def record(self, direction: int, frame: bytes) -> None:
+        self._fh.write(_RECORD.pack(time.time(), direction, len(frame)))
+        self._fh.write(frame)
+        if self.max_bytes and self._fh.tell() >= self.max_bytes:
+            self._rotate()
+
+    def rx(self, frame: bytes) -> None:
+        self.record(RX, frame)
+
+    def tx(self, frame: bytes) -> None:
+        """A sent frame, as written to the socket."""
+        self.record(TX, frame.strip(b"[]\r\n"))
+
+    def flush(self) -> None:
+        self._fh.flush()
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+def read_capture(path: str) -> Iterator[tuple[float, int, str]]:
+    """Yield (timestamp, direction, frame) from a capture file."""
+    with open(path, "rb") as fh:
+        if fh.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a duotecno capture file")
+        while True:
+            head = fh.read(_RECORD.size)
+            if len(head) < _RECORD.size:
+                return
+            ts, direction, length = _RECORD.unpack(head)
+            yield ts, direction, fh.read(length).decode()
+
+
+@dataclass
+class ReplayStats:
+    packets: int = 0
+    errors: int = 0
+    duration: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Handled packets per second."""
+        if not self.duration:
+            return 0.0
+        return self.packets / self.duration
+
+
+async def replay(
+    controller: PyDuotecno, *paths: str, realtime: bool = False
+) -> ReplayStats:
+    """Feed the received frames of one or more captures through a controller.
+
+    The frames go through the same Packet => _handlePacket => Node => Unit
+    path as live traffic. Use a controller that is not connected, so
+    commands triggered by the replayed packets are not sent.
+    With realtime the original timing is kept, otherwise the frames are
+    handled as fast as possible.
+    """
+    stats = ReplayStats()
+    start = time.perf_counter()
+    first: float | None = None
+    for path in paths:
+        for ts, direction, frame in read_capture(path):
+            if direction != RX:
+                continue
+            if realtime:
+                if first is None:
+                    first = ts
+                delay = (ts - first) - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            try:
+                await controller._handlePacket(controller._parsePacket(frame))
+                stats.packets += 1
+            except Exception:
+                stats.errors += 1
+    stats.duration = time.perf_counter() - start
+    return stats
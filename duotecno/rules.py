@@ -0,0 +1,137 @@
+"""Automation rules, evaluated in-process on every unit state change."""
+
+from __future__ import annotations
+import asyncio
+import dataclasses
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, Final, TYPE_CHECKING
+
+from duotecno.controller import PRIO_HIGH, send_priority
+from duotecno.events import UnitStateEvent, command_cause
+
+if TYPE_CHECKING:
+    from duotecno.controller import PyDuotecno
+    from duotecno.unit import BaseUnit
+
+# match every value of the field
+ANY: Final[Any] = object()
+
+Action = Callable[[Any], Awaitable[None]]
+
+
+@dataclass(eq=False)
+class Rule:
+    """When field of unit (address, unit) changes to value, run action.
+
+    field is a state field as in UnitStateEvent.changes ("state",
+    "value", ...), condition is an optional extra check on the new value.
+    The action gets the new value, its frames are sent with PRIO_HIGH.
+    The confirmation of a command of the action does not fire the rule
+    again.
+    """
+
+    address: int
+    unit: int
+    field: str
+    action: Action
+    value: Any = ANY
+    condition: Callable[[Any], bool] | None = None
+    name: str = ""
+    # dataclasses.field, the name field is taken by the state field
+    fired: int = dataclasses.field(default=0, init=False)
+
+    def matches(self, value: Any) -> bool:
+        if self.value is not ANY and value != self.value:
+            return False
+        return self.condition is None or self.condition(value)
+
+
+class RuleEngine:
+    """Rules indexed by their trigger (address, unit, field).
+
+    A state change only looks up the rules of the changed fields, the
+    number of rules does not matter for the cost of an event.
+    """
+
+    def __init__(self, controller: PyDuotecno) -> None:
+        self._log = logging.getLogger("pyduotecno-rules")
+        self.controller = controller
+        self._index: dict[tuple[int, int, str], list[Rule]] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+        # seconds from the state change to the end of the action
+        self.latency: deque[float] = deque(maxlen=1000)
+
+    def add(self, rule: Rule) -> Rule:
+        self._index.setdefault((rule.address, rule.unit, rule.field), []).append(rule)
+        return rule
+
+    def remove(self, rule: Rule) -> None:
+        key = (rule.address, rule.unit, rule.field)
+        rules = self._index.get(key, [])
+        if rule in rules:
+            rules.remove(rule)
+            if not rules:
+                del self._index[key]
+
+    def when(
+        self,
+        unit: BaseUnit,
+        field: str,
+        value: Any = ANY,
+        condition: Callable[[Any], bool] | None = None,
+    ) -> Callable[[Action], Action]:
+        """Decorator to add a rule for a unit.
+
+        @rules.when(switch, "state", 1)
+        async def _hall(value):
+            await dimmer.set_dimmer_state(30)
+        """
+
+        def decorator(action: Action) -> Action:
+            self.add(
+                Rule(
+                    unit.get_node_address(),
+                    unit.get_number(),
+                    field,
+                    action,
+                    value,
+                    condition,
+                    action.__name__,
+                )
+            )
+            return action
+
+        return decorator
+
+    def get_rules(self) -> list[Rule]:
+        return [rule for rules in self._index.values() for rule in rules]
+
+    def evaluate(self, event: UnitStateEvent) -> None:
+        address, unit = event.address, event.unit
+        if address is None or unit is None:
+            return
+        index = self._index
+        for key, value in event.changes.items():
+            rules = index.get((address, unit, key))
+            if not rules:
+                continue
+            for rule in rules:
+                if rule is not event.cause and rule.matches(value):
+                    rule.fired += 1
+                    task = asyncio.create_task(self._run(rule, value, event))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, rule: Rule, value: Any, event: UnitStateEvent) -> None:
+        # the task has its own context, this only affects the action
+        send_priority.set(PRIO_HIGH)
+        command_cause.set(rule)
+        try:
+            await rule.action(value)
+        except Exception:
+            self._log.exception(f"Rule {rule.name or rule.action} failed")
+        self.latency.append(time.time() - event.timestamp)
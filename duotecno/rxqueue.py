@@ -0,0 +1,106 @@
+"""Bounded queue between the reader and the handler task."""
+
+from __future__ import annotations
+import asyncio
+from collections import deque
+from typing import Final
+
+from duotecno.protocol import (
+    BaseNodeUnitTypeMessage,
+    EV_CLIENTCONNECTSET_3,
+    EV_HEARTBEATSTATUS_1,
+    Packet,
+)
+
+RX_MAXSIZE: Final = 1000
+
+
+class ReceiveQueue:
+    """FIFO of received packets with a fast lane.
+
+    Heartbeats and login replies skip the line, they keep the connection
+    alive. Everything else is handled in the order it was received.
+    Above coalesce_at a unit status packet replaces the queued status of
+    the same unit, only the latest state matters. When the queue is full
+    put() waits, the reader stops reading and tcp slows the gateway down.
+    """
+
+    def __init__(self, maxsize: int = RX_MAXSIZE, coalesce_at: int | None = None):
+        self.maxsize = maxsize
+        self.coalesce_at = maxsize // 2 if coalesce_at is None else coalesce_at
+        self._fast: deque[Packet] = deque()
+        # one item lists, a coalesced packet is swapped in place
+        self._queue: deque[list[Packet]] = deque()
+        # (cmd, method, address, unit) => queued status packet
+        self._status: dict[tuple[int, int, int, int], list[Packet]] = {}
+        self._notEmpty = asyncio.Event()
+        self._notFull = asyncio.Event()
+        self._notFull.set()
+        # high-water mark
+        self.peak = 0
+        # status packets replaced by a newer one
+        self.coalesced = 0
+        # times put() had to wait for room
+        self.blocked = 0
+
+    def __len__(self) -> int:
+        return len(self._fast) + len(self._queue)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": len(self),
+            "peak": self.peak,
+            "coalesced": self.coalesced,
+            "blocked": self.blocked,
+        }
+
+    def clear(self) -> None:
+        """Drop everything, ex. on a reconnect."""
+        self._fast.clear()
+        self._queue.clear()
+        self._status.clear()
+        self._notEmpty.clear()
+        self._notFull.set()
+
+    async def put(self, packet: Packet) -> None:
+        cls = packet.cls
+        if isinstance(cls, (EV_HEARTBEATSTATUS_1, EV_CLIENTCONNECTSET_3)):
+            self._fast.append(packet)
+            self._notEmpty.set()
+            return
+        key = None
+        if isinstance(cls, BaseNodeUnitTypeMessage):
+            key = (packet.cmdCode, packet.method, cls.address, cls.unit)
+            slot = self._status.get(key)
+            if slot and len(self._queue) >= self.coalesce_at:
+                slot[0] = packet
+                self.coalesced += 1
+                return
+        if len(self._queue) >= self.maxsize:
+            self.blocked += 1
+            while len(self._queue) >= self.maxsize:
+                self._notFull.clear()
+                await self._notFull.wait()
+        slot = [packet]
+        self._queue.append(slot)
+        if key is not None:
+            self._status[key] = slot
+        if len(self._queue) > self.peak:
+            self.peak = len(self._queue)
+        self._notEmpty.set()
+
+    async def get(self) -> Packet:
+        while not self._fast and not self._queue:
+            self._notEmpty.clear()
+            await self._notEmpty.wait()
+        if self._fast:
+            return self._fast.popleft()
+        slot = self._queue.popleft()
+        self._notFull.set()
+        packet = slot[0]
+        cls = packet.cls
+        if isinstance(cls, BaseNodeUnitTypeMessage):
+            key = (packet.cmdCode, packet.method, cls.address, cls.unit)
+            if self._status.get(key) is slot:
+                del self._status[key]
+        return packet
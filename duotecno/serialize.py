@@ -0,0 +1,225 @@
+"""Fast serialization of messages and unit states.
+
+The list of fields (and how to convert them) is worked out once per
+class, after that a message or unit is serialized with a single pass
+over that schema. Besides json there is a compact msgpack compatible
+binary format, without needing the msgpack package.
+"""
+
+from __future__ import annotations
+import struct
+from enum import Enum
+from typing import Any, Callable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from duotecno.protocol import BaseMessage
+    from duotecno.unit import BaseUnit
+
+Converter = Callable[[Any], Any] | None
+_messageSchemas: dict[type, tuple[tuple[str, Converter], ...]] = {}
+_unitSchemas: dict[type, tuple[str, ...]] = {}
+# unit class attributes that are not part of the state
+_UNIT_INTERNAL = frozenset(
+    {
+        "_unitType",
+        "_commands",
+        "_prefixes",
+        "_setCode",
+        "_frames",
+        "_on_status_update",
+        "_last_seen",
+        "_alwaysOptimistic",
+    }
+)
+
+
+def _enum_name(value: Any) -> Any:
+    return value.name if isinstance(value, Enum) else value
+
+
+def _bytes_str(value: Any) -> Any:
+    return str(value, "utf-8") if isinstance(value, (bytes, bytearray)) else value
+
+
+def _converter(value: Any) -> Converter:
+    if isinstance(value, Enum):
+        return _enum_name
+    if isinstance(value, (bytes, bytearray)):
+        return _bytes_str
+    return None
+
+
+def _message_schema(msg: BaseMessage) -> tuple[tuple[str, Converter], ...]:
+    # the decoders always set the same attributes, so one instance is enough
+    schema = tuple(
+        (key, _converter(val))
+        for key, val in msg.__dict__.items()
+        if not key.startswith("_") and not callable(val)
+    )
+    _messageSchemas[type(msg)] = schema
+    return schema
+
+
+def message_to_dict(msg: BaseMessage) -> dict[str, Any]:
+    schema = _messageSchemas.get(type(msg)) or _message_schema(msg)
+    attrs = msg.__dict__
+    res: dict[str, Any] = {"name": type(msg).__name__}
+    for key, conv in schema:
+        if key in attrs:
+            res[key] = conv(attrs[key]) if conv else attrs[key]
+    return res
+
+
+def _unit_schema(cls: type) -> tuple[str, ...]:
+    keys: dict[str, None] = {}
+    for klass in reversed(cls.__mro__):
+        for key in getattr(klass, "__annotations__", {}):
+            if key.startswith("_") and key not in _UNIT_INTERNAL:
+                keys[key] = None
+    schema = tuple(keys)
+    _unitSchemas[cls] = schema
+    return schema
+
+
+def unit_to_dict(unit: BaseUnit) -> dict[str, Any]:
+    schema = _unitSchemas.get(type(unit)) or _unit_schema(type(unit))
+    res: dict[str, Any] = {
+        "type": type(unit).__name__,
+        "address": unit.node.address,
+        "unit": unit.unit,
+        "name": unit.name,
+    }
+    for key in schema:
+        res[key[1:]] = getattr(unit, key)
+    return res
+
+
+def packb(obj: Any) -> bytes:
+    """Encode to the msgpack binary format."""
+    out = bytearray()
+    _pack(obj, out)
+    return bytes(out)
+
+
+def _pack_len(n: int, out: bytearray, fix: int, fixMax: int, codes: bytes) -> None:
+    if n <= fixMax:
+        out.append(fix | n)
+    elif n < 0x10000:
+        out.append(codes[0])
+        out += struct.pack(">H", n)
+    else:
+        out.append(codes[1])
+        out += struct.pack(">I", n)
+
+
+def _pack(obj: Any, out: bytearray) -> None:
+    if obj is None:
+        out.append(0xC0)
+    elif obj is True:
+        out.append(0xC3)
+    elif obj is False:
+        out.append(0xC2)
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -32 <= obj < 0:
+            out.append(obj & 0xFF)
+        elif -(1 << 63) <= obj < (1 << 63):
+            out.append(0xD3)
+            out += struct.pack(">q", obj)
+        else:
+            raise ValueError(f"Integer out of range: {obj}")
+    elif isinstance(obj, float):
+        out.append(0xCB)
+        out += struct.pack(">d", obj)
+    elif isinstance(obj, str):
+        data = obj.encode()
+        if len(data) < 32:
+            out.append(0xA0 | len(data))
+        elif len(data) < 0x100:
+            out += bytes((0xD9, len(data)))
+        else:
+            _pack_len(len(data), out, 0, -1, b"\xda\xdb")
+        out += data
+    elif isinstance(obj, (bytes, bytearray)):
+        if len(obj) < 0x100:
+            out += bytes((0xC4, len(obj)))
+        else:
+            _pack_len(len(obj), out, 0, -1, b"\xc5\xc6")
+        out += obj
+    elif isinstance(obj, (list, tuple)):
+        _pack_len(len(obj), out, 0x90, 15, b"\xdc\xdd")
+        for item in obj:
+            _pack(item, out)
+    elif isinstance(obj, dict):
+        _pack_len(len(obj), out, 0x80, 15, b"\xde\xdf")
+        for key, val in obj.items():
+            _pack(key, out)
+            _pack(val, out)
+    elif isinstance(obj, Enum):
+        _pack(obj.name, out)
+    else:
+        raise TypeError(f"Can not pack {type(obj).__name__}")
+
+
+def unpackb(data: bytes) -> Any:
+    """Decode the output of packb."""
+    obj, pos = _unpack(memoryview(data), 0)
+    if pos != len(data):
+        raise ValueError("Extra data after the packed object")
+    return obj
+
+
+def _unpack(data: memoryview, pos: int) -> tuple[Any, int]:
+    code = data[pos]
+    pos += 1
+    if code < 0x80:
+        return code, pos
+    if code >= 0xE0:
+        return code - 0x100, pos
+    if 0xA0 <= code < 0xC0:
+        n = code & 0x1F
+        return str(data[pos : pos + n], "utf-8"), pos + n
+    if 0x90 <= code < 0xA0:
+        return _unpack_list(data, pos, code & 0x0F)
+    if 0x80 <= code < 0x90:
+        return _unpack_dict(data, pos, code & 0x0F)
+    if code == 0xC0:
+        return None, pos
+    if code in (0xC2, 0xC3):
+        return code == 0xC3, pos
+    if code == 0xD3:
+        return struct.unpack_from(">q", data, pos)[0], pos + 8
+    if code == 0xCB:
+        return struct.unpack_from(">d", data, pos)[0], pos + 8
+    if code in (0xD9, 0xDA, 0xDB, 0xC4, 0xC5, 0xC6):
+        size = {0xD9: 1, 0xDA: 2, 0xDB: 4, 0xC4: 1, 0xC5: 2, 0xC6: 4}[code]
+        n = int.from_bytes(data[pos : pos + size], "big")
+        pos += size
+        raw = data[pos : pos + n]
+        if code in (0xD9, 0xDA, 0xDB):
+            return str(raw, "utf-8"), pos + n
+        return bytes(raw), pos + n
+    if code in (0xDC, 0xDD, 0xDE, 0xDF):
+        size = 2 if code in (0xDC, 0xDE) else 4
+        n = int.from_bytes(data[pos : pos + size], "big")
+        if code in (0xDC, 0xDD):
+            return _unpack_list(data, pos + size, n)
+        return _unpack_dict(data, pos + size, n)
+    raise ValueError(f"Unsupported type code: {code:#x}")
+
+
+def _unpack_list(data: memoryview, pos: int, n: int) -> tuple[list[Any], int]:
+    res = []
+    for _i in range(n):
+        item, pos = _unpack(data, pos)
+        res.append(item)
+    return res, pos
+
+
+def _unpack_dict(data: memoryview, pos: int, n: int) -> tuple[dict[Any, Any], int]:
+    res = {}
+    for _i in range(n):
+        key, pos = _unpack(data, pos)
+        res[key], pos = _unpack(data, pos)
+    return res, pos
@@ -0,0 +1,313 @@
+"""Spread many gateways over worker processes.
+
+Every worker runs its own event loop with a PyDuotecno per gateway
+(site). The unit state events are sent back to the parent in batches,
+msgpack encoded over a pipe, commands go the other way and are routed to
+the worker that owns the site.
+"""
+
+from __future__ import annotations
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+from collections.abc import Iterable
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from typing import Any
+
+from duotecno.events import (
+    DROP_OLDEST,
+    Event,
+    EventStream,
+    NodeResetEvent,
+    UnitCorrectionEvent,
+    UnitStateEvent,
+)
+from duotecno.serialize import packb, unpackb
+
+# record types on the pipe
+_EVENT = 0
+_REPLY = 1
+_READY = 2
+# event classes that are forwarded, by their index on the wire
+_KINDS: tuple[type[Event], ...] = (UnitStateEvent, UnitCorrectionEvent, NodeResetEvent)
+
+
+@dataclass
+class Site:
+    """Connection details of one gateway."""
+
+    host: str
+    port: int
+    password: str
+
+
+def _worker(sites: dict[str, Site], conn: Connection) -> None:
+    asyncio.run(_Worker(sites, conn).run())
+
+
+class _Worker:
+    """The worker process side, one per shard."""
+
+    def __init__(self, sites: dict[str, Site], conn: Connection) -> None:
+        # imported here, the parent does not need the controller
+        from duotecno.controller import PyDuotecno
+
+        self._log = logging.getLogger("pyduotecno-shard")
+        self.sites = sites
+        self.conn = conn
+        self.controllers = {name: PyDuotecno() for name in sites}
+        self._out: list[list[Any]] = []
+        self._stopped: asyncio.Event
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def _send(self, record: list[Any]) -> None:
+        # everything produced in one loop iteration goes in one message
+        self._out.append(record)
+        if len(self._out) == 1:
+            asyncio.get_running_loop().call_soon(self._flush)
+
+    def _flush(self) -> None:
+        out, self._out = self._out, []
+        try:
+            self.conn.send_bytes(packb(out))
+        except OSError:
+            # the parent is gone
+            self._stopped.set()
+
+    async def _connect(self, name: str) -> None:
+        site = self.sites[name]
+        ctrl = self.controllers[name]
+        try:
+            await ctrl.connect(site.host, site.port, site.password)
+        except Exception as e:
+            self._send([_READY, name, repr(e)])
+            return
+        ctrl.eventListeners.append(_Forwarder(name, self._send))
+        self._send([_READY, name, None])
+
+    def _on_command(self) -> None:
+        try:
+            reqId, name, address, unit, method, args = unpackb(self.conn.recv_bytes())
+        except (EOFError, OSError):
+            # the parent is gone
+            self._stopped.set()
+            return
+        task = asyncio.create_task(
+            self._execute(reqId, name, address, unit, method, args)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _execute(
+        self,
+        reqId: int,
+        name: str,
+        address: int | None,
+        unit: int | None,
+        method: str,
+        args: list[Any],
+    ) -> None:
+        try:
+            if method.startswith("_"):
+                raise ValueError(f"Not a public method: {method}")
+            target: Any = self.controllers[name]
+            if address is not None:
+                target = target.nodes[address]
+                if unit is not None:
+                    target = target.units[unit]
+            res = getattr(target, method)(*args)
+            if asyncio.iscoroutine(res):
+                res = await res
+            if not isinstance(res, (type(None), bool, int, float, str, list, dict)):
+                res = None
+            self._send([_REPLY, reqId, None, res])
+        except Exception as e:
+            self._send([_REPLY, reqId, repr(e), None])
+
+    async def run(self) -> None:
+        self._stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        loop.add_reader(self.conn.fileno(), self._on_command)
+        await asyncio.gather(*(self._connect(name) for name in self.sites))
+        await self._stopped.wait()
+        loop.remove_reader(self.conn.fileno())
+        for ctrl in self.controllers.values():
+            if ctrl.writer:
+                await ctrl.disconnect()
+
+
+class _Forwarder:
+    """Event listener of a controller in the worker, see eventListeners."""
+
+    def __init__(self, site: str, send: Any) -> None:
+        self.site = site
+        self.send = send
+
+    def __call__(self, event: Event) -> None:
+        if type(event) not in _KINDS:
+            return
+        if isinstance(event, UnitStateEvent):
+            extra = [event.name, event.changes, event.pending]
+        else:
+            extra = []
+        self.send(
+            [
+                _EVENT,
+                self.site,
+                _KINDS.index(type(event)),
+                event.timestamp,
+                event.gatewayTime,
+                event.address,
+                event.unit,
+                *extra,
+            ]
+        )
+
+
+class ShardPool:
+    """Run the controllers for many sites in a pool of processes.
+
+    sites are assigned round-robin to the workers, events of all sites
+    are available from events() and commands are routed with call().
+    """
+
+    def __init__(self, sites: dict[str, Site], workers: int | None = None) -> None:
+        self._log = logging.getLogger("pyduotecno-shard")
+        self.sites = sites
+        self.workers = max(1, min(workers or os.cpu_count() or 1, len(sites)))
+        self.events_received = 0
+        self._subscribers: list[EventStream] = []
+        self._procs: list[multiprocessing.process.BaseProcess] = []
+        self._conns: list[Connection] = []
+        self._route: dict[str, Connection] = {}
+        self._replies: dict[int, asyncio.Future[Any]] = {}
+        self._ready: dict[str, asyncio.Future[str | None]] = {}
+        self._seq = itertools.count()
+
+    async def start(self, timeout: float = 180.0) -> dict[str, str | None]:
+        """Start the workers, returns the connect error per site (or None)."""
+        ctx = multiprocessing.get_context("spawn")
+        loop = asyncio.get_running_loop()
+        names = sorted(self.sites)
+        for i in range(self.workers):
+            shard = {name: self.sites[name] for name in names[i :: self.workers]}
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_worker, args=(shard, child), daemon=True)
+            proc.start()
+            child.close()
+            self._procs.append(proc)
+            self._conns.append(parent)
+            for name in shard:
+                self._route[name] = parent
+                self._ready[name] = loop.create_future()
+            loop.add_reader(parent.fileno(), self._on_records, parent)
+        await asyncio.wait(self._ready.values(), timeout=timeout)
+        return {
+            name: fut.result() if fut.done() else "timeout"
+            for name, fut in self._ready.items()
+        }
+
+    async def stop(self) -> None:
+        loop = asyncio.get_running_loop()
+        for conn in self._conns:
+            loop.remove_reader(conn.fileno())
+            conn.close()
+        for proc in self._procs:
+            await loop.run_in_executor(None, proc.join, 10)
+            if proc.is_alive():
+                proc.terminate()
+        for sub in self._subscribers.copy():
+            sub.close()
+        self._procs = []
+        self._conns = []
+
+    def events(
+        self,
+        sites: Iterable[str] | None = None,
+        nodes: Iterable[int] | None = None,
+        units: Iterable[tuple[int, int]] | None = None,
+        types: Iterable[type[Event]] | None = None,
+        maxsize: int = 1000,
+        overflow: str = DROP_OLDEST,
+    ) -> EventStream:
+        """Subscribe to the events of all (or some) sites, see PyDuotecno.events."""
+        return EventStream(
+            self._subscribers,
+            nodes=nodes,
+            units=units,
+            types=types,
+            maxsize=maxsize,
+            overflow=overflow,
+            sites=sites,
+        )
+
+    async def call(
+        self,
+        site: str,
+        address: int | None,
+        unit: int | None,
+        method: str,
+        *args: Any,
+        timeout: float = 10.0,
+    ) -> Any:
+        """Call a method of a unit, a node or the controller of a site.
+
+        ex. call("home", 1, 2, "turn_on") or call("home", None, None,
+        "write", "[215,1]"), returns the result if it is a plain value.
+        """
+        reqId = next(self._seq)
+        fut = asyncio.get_running_loop().create_future()
+        self._replies[reqId] = fut
+        self._route[site].send_bytes(
+            packb([reqId, site, address, unit, method, list(args)])
+        )
+        try:
+            return await asyncio.wait_for(fut, timeout)
+        finally:
+            self._replies.pop(reqId, None)
+
+    def _on_records(self, conn: Connection) -> None:
+        try:
+            records = unpackb(conn.recv_bytes())
+        except (EOFError, OSError):
+            self._log.warning("A shard worker stopped")
+            asyncio.get_running_loop().remove_reader(conn.fileno())
+            return
+        for record in records:
+            if record[0] == _EVENT:
+                self._event(record)
+            elif record[0] == _REPLY:
+                fut = self._replies.get(record[1])
+                if fut and not fut.done():
+                    if record[2]:
+                        fut.set_exception(RuntimeError(record[2]))
+                    else:
+                        fut.set_result(record[3])
+            elif record[0] == _READY:
+                fut = self._ready.get(record[1])
+                if fut and not fut.done():
+                    fut.set_result(record[2])
+
+    def _event(self, record: list[Any]) -> None:
+        _type, site, kind, timestamp, gatewayTime, address, unit, *extra = record
+        self.events_received += 1
+        if not self._subscribers:
+            return
+        cls = _KINDS[kind]
+        meta = {
+            "timestamp": timestamp,
+            "gatewayTime": gatewayTime,
+            "address": address,
+            "unit": unit,
+            "site": site,
+        }
+        if extra:
+            event: Event = cls(extra[0], extra[1], pending=extra[2], **meta)
+        else:
+            event = cls(**meta)
+        for sub in self._subscribers.copy():
+            if sub.matches(event):
+                sub.push(event)
@@ -0,0 +1,253 @@
+"""Local stand-in for a duotecno ip gateway.
+
+Speaks enough of the protocol to log in, run the discovery, answer
+status requests and heartbeats and to execute the basic unit commands.
+Meant for examples, benchmarks and local testing, not for production.
+"""
+
+from __future__ import annotations
+import asyncio
+import datetime
+import logging
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class SimUnit:
+    name: str
+    unitType: int
+    state: int = 0
+    value: int = 0
+    # sens units: temperature and the 4 setpoints, in 1/10 degrees
+    temps: list[int] = field(default_factory=lambda: [200, 210, 200, 160, 180])
+    # duoswitch units: seconds for a full move
+    travelTime: float = 2.0
+
+
+@dataclass
+class SimNode:
+    name: str
+    address: int
+    units: list[SimUnit]
+    nodeType: int = 1
+
+
+def _text(name: str) -> list[int]:
+    return [len(name)] + [ord(c) for c in name]
+
+
+def _temp(val: int) -> list[int]:
+    return list(divmod(val & 0xFFFF, 256))
+
+
+class FakeGateway:
+    """A tcp server that behaves like a (small) duotecno installation."""
+
+    def __init__(self, nodes: list[SimNode], password: str = "") -> None:
+        self._log = logging.getLogger("pyduotecno-simulator")
+        self.nodes = nodes
+        self.password = password
+        self.received: list[str] = []
+        # seconds the gateway clock is ahead of the local clock
+        self.clockOffset = 0.0
+        # command codes that are answered with a message error
+        self.refuse: set[int] = set()
+        self._clients: set[asyncio.StreamWriter] = set()
+        self._server: asyncio.base_events.Server | None = None
+        self._moves: dict[tuple[int, int], asyncio.Task[None]] = {}
+
+    @classmethod
+    def generate(
+        cls, numNodes: int = 2, unitsPerNode: int = 8, password: str = ""
+    ) -> FakeGateway:
+        """Build an installation with a mix of unit types."""
+        types = [2, 1, 8, 4, 7]
+        nodes = []
+        for n in range(numNodes):
+            units = [
+                SimUnit(f"unit {n}.{u}", types[u % len(types)])
+                for u in range(unitsPerNode)
+            ]
+            nodes.append(SimNode(f"node {n}", n + 1, units))
+        return cls(nodes, password)
+
+    @property
+    def port(self) -> int:
+        assert self._server
+        return int(self._server.sockets[0].getsockname()[1])
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._server = await asyncio.start_server(self._client, host, port)
+
+    async def stop(self) -> None:
+        for task in self._moves.values():
+            task.cancel()
+        for w in list(self._clients):
+            w.close()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def push(self, frame: list[int]) -> None:
+        """Send an unsolicited frame to all connected clients."""
+        for w in list(self._clients):
+            self._send(w, frame)
+            await w.drain()
+
+    def inject(self, data: bytes) -> None:
+        """Write raw bytes to all connected clients, ex. a burst of frames."""
+        for w in list(self._clients):
+            w.write(data)
+
+    async def reset_node(self, address: int) -> None:
+        """Act like a node rebooted."""
+        await self.push([18, 0, address])
+
+    def _send(self, writer: asyncio.StreamWriter, frame: list[int]) -> None:
+        writer.write(f"[{','.join(str(i) for i in frame)}]\r\n".encode())
+
+    def _node(self, address: int) -> SimNode | None:
+        for node in self.nodes:
+            if node.address == address:
+                return node
+        return None
+
+    async def _client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._clients.add(writer)
+        loggedIn = False
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.strip()
+                if not line.startswith(b"[") or not line.endswith(b"]"):
+                    continue
+                self.received.append(line.decode())
+                try:
+                    data = [int(i) for i in line[1:-1].split(b",")]
+                except ValueError:
+                    continue
+                if not loggedIn:
+                    if data[:2] == [214, 3]:
+                        passw = "".join(chr(i) for i in data[3:])
+                        loggedIn = passw == self.password
+                        self._send(writer, [67, 3, int(loggedIn)])
+                    continue
+                for frame in self.handle(data):
+                    self._send(writer, frame)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    def status(self, node: SimNode, idx: int) -> list[int]:
+        u = node.units[idx]
+        head = [node.address, idx, u.unitType]
+        if u.unitType == 1:
+            return [5, 0] + head + [0, u.state, u.value]
+        if u.unitType == 2:
+            return [6, 0] + head + [0, u.state]
+        if u.unitType == 8:
+            return [38, 0] + head + [0, u.state]
+        if u.unitType == 4:
+            res = [7, 0] + head + [0, 1, u.state, u.value]
+            for t in u.temps:
+                res += _temp(t)
+            return res
+        return [4, 0] + head + [0, u.state]
+
+    def _travel(self, node: SimNode, idx: int) -> None:
+        """Finish a duoswitch move after its travel time."""
+        key = (node.address, idx)
+        if key in self._moves:
+            self._moves.pop(key).cancel()
+        u = node.units[idx]
+        if u.state not in (3, 4):
+            return
+
+        async def _end() -> None:
+            await asyncio.sleep(u.travelTime)
+            u.state = 2 if u.state == 4 else 1
+            self._moves.pop(key, None)
+            await self.push(self.status(node, idx))
+
+        self._moves[key] = asyncio.create_task(_end())
+
+    def handle(self, data: list[int]) -> list[list[int]]:
+        """Execute a command, return the frames to answer with."""
+        cmd, method, args = data[0], data[1], data[2:]
+        if cmd == 215:
+            return [[72, 1]]
+        # the time layouts mirror the guess of the library (see
+        # EV_TIMEDATESTATUS_1), they are not taken from a real gateway
+        if cmd == 216:
+            dt = datetime.datetime.fromtimestamp(time.time() + self.clockOffset)
+            return [
+                [71, 1, dt.hour, dt.minute, dt.second, dt.isoweekday()]
+                + [dt.day, dt.month, dt.year - 2000]
+            ]
+        if cmd == 170 and len(args) >= 7:
+            h, m, sec, _wd, d, mo, y = args[:7]
+            gw = datetime.datetime(2000 + y, mo, d, h, m, sec).timestamp()
+            self.clockOffset = gw - time.time()
+            return [[71, 1] + args[:7]]
+        if cmd == 209:
+            if method == 5:
+                return [[64, 5, 2]]
+            if method == 0:
+                return [[64, 0, len(self.nodes)]]
+            if method == 1:
+                # by index, not by address
+                info = self.nodes[args[0]]
+                return [
+                    [64, 1, args[0], info.address, 0, 0, 0, 0]
+                    + _text(info.name)
+                    + [len(info.units), info.nodeType, 0]
+                ]
+            node = self._node(args[0])
+            if node is None or args[1] >= len(node.units):
+                return [[17, 0] + args]
+            if method == 2:
+                u = node.units[args[1]]
+                return [
+                    [64, 2, node.address, args[1], node.address, args[1]]
+                    + _text(u.name)
+                    + [u.unitType, 0]
+                ]
+            if method == 3:
+                return [self.status(node, args[1])]
+            return []
+        if len(args) < 2:
+            return []
+        node = self._node(args[0])
+        if node is None or args[1] >= len(node.units) or cmd in self.refuse:
+            # the error layout is a guess, see EV_MESSAGEERROR_0
+            return [[17, 0] + args]
+        u = node.units[args[1]]
+        if cmd == 163:
+            u.state = 1 if method == 3 else 0
+        elif cmd == 162:
+            if method == 9:
+                u.state = 0
+            elif method == 10:
+                u.state = 1
+            elif method == 3:
+                u.value = args[2]
+        elif cmd == 182:
+            # 3 = stop, 4 = up, 5 = down
+            u.state = {3: 0, 4: 4, 5: 3}.get(method, u.state)
+            self._travel(node, args[1])
+        elif cmd == 136:
+            if method == 3:
+                u.state = args[2]
+            elif method == 13:
+                u.value = args[2]
+            elif method == 1:
+                u.temps[args[2] + 1] = ((args[3] << 8) + args[4]) & 0xFFFF
+        return [self.status(node, args[1])]
@@ -0,0 +1,161 @@
+"""Follow the clock of the gateway."""
+
+from __future__ import annotations
+import asyncio
+import datetime
+import logging
+import statistics
+import time
+from typing import Final, TYPE_CHECKING
+
+from duotecno.commands import Command
+from duotecno.protocol import BaseMessage, MsgType
+from duotecno.protocol_ext import EV_TIMEDATESTATUS_1
+
+if TYPE_CHECKING:
+    from duotecno.controller import PyDuotecno
+
+REQUEST_TIME: Final = "[216,1]"
+_REQUEST_FRAME: Final = f"{REQUEST_TIME}\n".encode()
+TIME_PREFIX: Final = "71,1,"
+
+
+def gateway_timestamp(msg: EV_TIMEDATESTATUS_1) -> float:
+    """The (local) wall clock time of a time status, as a unix timestamp."""
+    return datetime.datetime(
+        msg.year, msg.month, msg.day, msg.hour, msg.minute, msg.second
+    ).timestamp()
+
+
+def encode_time(ts: float) -> bytes:
+    """FC_TIMEDATE frame that sets the gateway clock to ts.
+
+    Unverified: the argument layout is the one of the time status (see
+    EV_TIMEDATESTATUS_1), it is not documented for this command.
+    """
+    dt = datetime.datetime.fromtimestamp(ts)
+    return Command(
+        MsgType.FC_TIMEDATE,
+        1,
+        (
+            dt.hour,
+            dt.minute,
+            dt.second,
+            dt.isoweekday(),
+            dt.day,
+            dt.month,
+            dt.year - 2000,
+        ),
+    ).encode()
+
+
+class TimeSync:
+    """Estimate the offset between the gateway clock and the local clock.
+
+    Every sample is a request/response round-trip, like the heartbeat.
+    The gateway only reports whole seconds, so the skew is the median
+    over several samples, with the reported second taken at its middle.
+    skew = gateway time - local time
+    """
+
+    def __init__(self, controller: PyDuotecno) -> None:
+        self._log = logging.getLogger("pyduotecno-timesync")
+        self.controller = controller
+        self.skew: float | None = None
+        self.rtt: float | None = None
+        self._txTime = 0.0
+        self._rxTime = 0.0
+        self._reply: asyncio.Future[float] | None = None
+        self._task: asyncio.Task[None] | None = None
+        controller.rawListeners.append(self._stamp)
+        controller.txListeners.append(self._stampTx)
+
+    def _stamp(self, frame: str) -> None:
+        # called from the reader, before any queueing
+        if frame.startswith(TIME_PREFIX):
+            self._rxTime = time.time()
+
+    def _stampTx(self, frame: bytes) -> None:
+        # called from the writer, after the send queue
+        if frame == _REQUEST_FRAME:
+            self._txTime = time.time()
+
+    def handle(self, msg: BaseMessage) -> None:
+        if not isinstance(msg, EV_TIMEDATESTATUS_1):
+            return
+        if self._reply and not self._reply.done():
+            self._reply.set_result(gateway_timestamp(msg))
+
+    def gateway_time(self, ts: float) -> float | None:
+        """Convert a local timestamp to the gateway clock."""
+        if self.skew is None:
+            return None
+        return ts + self.skew
+
+    async def measure(self, samples: int = 5, timeout: float = 5.0) -> float:
+        """Measure the skew and round-trip time, returns the skew."""
+        skews = []
+        rtts = []
+        for _i in range(samples):
+            self._reply = asyncio.get_running_loop().create_future()
+            self._txTime = self._rxTime = 0.0
+            queued = time.time()
+            await self.controller.write(REQUEST_TIME)
+            gw = await asyncio.wait_for(self._reply, timeout)
+            # the time in the send queue is not part of the round trip
+            sent = self._txTime or queued
+            received = self._rxTime or time.time()
+            rtts.append(received - sent)
+            skews.append(gw + 0.5 - (sent + received) / 2)
+            # spread the samples over the second boundaries
+            await asyncio.sleep(0.37)
+        self.skew = statistics.median(skews)
+        self.rtt = min(rtts)
+        self._log.debug(f"Gateway clock skew {self.skew:.3f}s, rtt {self.rtt:.3f}s")
+        return self.skew
+
+    async def correct(self) -> None:
+        """Set the gateway clock to the local clock.
+
+        Opt-in (start(correct=True)) and unverified, see encode_time.
+        """
+        # the frame is built on whole seconds, send it at the start of one
+        await asyncio.sleep(1 - time.time() % 1)
+        await self.controller.write(encode_time(time.time()))
+
+    def start(
+        self, interval: float = 3600.0, correct: bool = False, max_skew: float = 2.0
+    ) -> None:
+        """Measure on a schedule, optionally correct drift over max_skew."""
+        self.stop()
+        if correct:
+            self._log.warning(
+                "Gateway clock correction is enabled, the FC_TIMEDATE layout "
+                "is not verified against a gateway"
+            )
+        self._task = asyncio.create_task(self._run(interval, correct, max_skew))
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def close(self) -> None:
+        self.stop()
+        if self._stamp in self.controller.rawListeners:
+            self.controller.rawListeners.remove(self._stamp)
+        if self._stampTx in self.controller.txListeners:
+            self.controller.txListeners.remove(self._stampTx)
+
+    async def _run(self, interval: float, correct: bool, max_skew: float) -> None:
+        while True:
+            await self.controller.connectionOK.wait()
+            try:
+                skew = await self.measure()
+                if correct and abs(skew) > max_skew:
+                    self._log.info(f"Correcting gateway clock, skew {skew:.1f}s")
+                    await self.correct()
+                    await self.measure()
+            except asyncio.TimeoutError:
+                self._log.warning("No time status from the gateway")
+            await asyncio.sleep(interval)
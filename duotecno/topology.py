@@ -0,0 +1,176 @@
+"""Index of the nodes and units of an installation."""
+
+from __future__ import annotations
+import difflib
+from bisect import bisect_left, insort
+from collections import Counter
+from collections.abc import Iterable
+from typing import Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from duotecno.unit import BaseUnit
+
+
+class Topology:
+    """Units by dense id, type, node and name.
+
+    Units are added as they are discovered, see Node.handlePacket. The id
+    of a unit is its position in discovery order and stays the same for
+    the same (address, unit) after a reconnect, so it can be used as an
+    index into arrays kept by the application.
+    """
+
+    def __init__(self) -> None:
+        # id => unit, None while it is not (re)discovered
+        self._units: list[BaseUnit | None] = []
+        self._ids: dict[tuple[int, int], int] = {}
+        self._byType: dict[str, list[int]] = {}
+        self._byNode: dict[int, list[int]] = {}
+        # sorted (lowercase name or word of the name, id)
+        self._names: list[tuple[str, int]] = []
+        # word of a name => ids, for fuzzy()
+        self._vocab: dict[str, list[int]] = {}
+        self._counts: Counter[tuple[int, str]] = Counter()
+        self._summary: dict[str, Any] | None = None
+        # changes with every add or clear, to notice new units
+        self.version = 0
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self._byNode.values())
+
+    def clear(self) -> None:
+        """Forget the units, the ids are kept for the next discovery."""
+        self._units = [None] * len(self._units)
+        self._byType.clear()
+        self._byNode.clear()
+        self._names.clear()
+        self._vocab.clear()
+        self._counts.clear()
+        self._summary = None
+        self.version += 1
+
+    def add(self, unit: BaseUnit) -> int:
+        key = (unit.get_node_address(), unit.get_number())
+        uid = self._ids.get(key)
+        if uid is None:
+            uid = self._ids[key] = len(self._units)
+            self._units.append(None)
+        elif self._units[uid] is not None:
+            self._remove(uid)
+        self._units[uid] = unit
+        typeName = type(unit).__name__
+        insort(self._byType.setdefault(typeName, []), uid)
+        insort(self._byNode.setdefault(key[0], []), uid)
+        for word in _words(unit.get_name()):
+            insort(self._names, (word, uid))
+        for word in set(unit.get_name().lower().split()):
+            self._vocab.setdefault(word, []).append(uid)
+        self._counts[key[0], typeName] += 1
+        self._summary = None
+        self.version += 1
+        return uid
+
+    def _remove(self, uid: int) -> None:
+        unit = self._units[uid]
+        assert unit
+        typeName = type(unit).__name__
+        self._byType[typeName].remove(uid)
+        self._byNode[unit.get_node_address()].remove(uid)
+        for word in _words(unit.get_name()):
+            self._names.remove((word, uid))
+        for word in set(unit.get_name().lower().split()):
+            self._vocab[word].remove(uid)
+            if not self._vocab[word]:
+                del self._vocab[word]
+        self._counts[unit.get_node_address(), typeName] -= 1
+
+    def uid(self, unit: BaseUnit) -> int:
+        return self._ids[unit.get_node_address(), unit.get_number()]
+
+    def get(self, uid: int) -> BaseUnit | None:
+        return self._units[uid]
+
+    def _get(self, ids: Iterable[int]) -> list[BaseUnit]:
+        # the indexes only hold ids of known units, the check is cheap
+        units = self._units
+        return [unit for uid in ids if (unit := units[uid]) is not None]
+
+    def by_type(self, unit_type: list[str] | str) -> list[BaseUnit]:
+        """Units of one or more classes, ex. "DimUnit", in id order."""
+        if isinstance(unit_type, str):
+            return self._get(self._byType.get(unit_type, ()))
+        ids: set[int] = set()
+        for name in unit_type:
+            ids.update(self._byType.get(name, ()))
+        return self._get(sorted(ids))
+
+    def by_node(self, address: int) -> list[BaseUnit]:
+        return self._get(self._byNode.get(address, ()))
+
+    def search(self, prefix: str) -> list[BaseUnit]:
+        """Units with a name, or a word in the name, starting with prefix.
+
+        Case insensitive, "kit" finds "Kitchen" and "Light kitchen".
+        """
+        prefix = prefix.lower()
+        names = self._names
+        start = bisect_left(names, (prefix, -1))
+        end = bisect_left(names, (prefix + "\uffff", -1), start)
+        return self._get(sorted({uid for _name, uid in names[start:end]}))
+
+    def fuzzy(self, name: str, n: int = 5, cutoff: float = 0.6) -> list[BaseUnit]:
+        """The n units with a name closest to name, best match first.
+
+        The words are matched one by one against the words of the names,
+        the units with the most matching words are ranked on the full name.
+        """
+        name = name.lower()
+        hits: Counter[int] = Counter()
+        for word in set(name.split()):
+            for match in difflib.get_close_matches(word, self._vocab, 3, cutoff):
+                hits.update(self._vocab[match])
+        if not hits:
+            return []
+        best = max(hits.values())
+        matcher = difflib.SequenceMatcher(b=name)
+        ranked = []
+        for uid, num in hits.items():
+            unit = self._units[uid]
+            if num == best and unit is not None:
+                matcher.set_seq1(unit.get_name().lower())
+                ranked.append((-matcher.ratio(), uid))
+        return self._get(uid for _ratio, uid in sorted(ranked)[:n])
+
+    def count(self, unit_type: str | None = None, address: int | None = None) -> int:
+        """Number of units, of a class and/or on a node."""
+        if unit_type is None:
+            return len(self) if address is None else len(self._byNode.get(address, ()))
+        if address is None:
+            return len(self._byType.get(unit_type, ()))
+        return self._counts[address, unit_type]
+
+    def summary(self) -> dict[str, Any]:
+        """Unit counts per class, per node and per node and class.
+
+        Built once after a change, do not modify the result.
+        """
+        if self._summary is not None:
+            return self._summary
+        byType: Counter[str] = Counter()
+        byNode: dict[int, dict[str, int]] = {}
+        for (addr, typeName), num in self._counts.items():
+            if num:
+                byType[typeName] += num
+                byNode.setdefault(addr, {})[typeName] = num
+        self._summary = {
+            "units": sum(byType.values()),
+            "nodes": len(byNode),
+            "types": dict(byType),
+            "perNode": byNode,
+        }
+        return self._summary
+
+
+def _words(name: str) -> set[str]:
+    name = name.lower()
+    return {name, *name.split()}
@@ -0,0 +1,43 @@
+"""Low overhead tracing of the packets on the hot path."""
+
+from __future__ import annotations
+import time
+from collections import deque
+
+
+class HotTrace:
+    """Bounded ring buffer of (time, tag, object) entries.
+
+    Disabled by default, the callers check enabled before calling record,
+    so there is no cost at all when it is off. Recording only stores a
+    reference, the formatting happens in dump().
+    """
+
+    def __init__(self, size: int = 10000) -> None:
+        self.enabled = False
+        self._buffer: deque[tuple[float, str, object]] = deque(maxlen=size)
+
+    def enable(self, size: int | None = None) -> None:
+        if size is not None and size != self._buffer.maxlen:
+            self._buffer = deque(self._buffer, maxlen=size)
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def clear(self) -> None:
+        self._buffer.clear()
+
+    def record(self, tag: str, obj: object) -> None:
+        self._buffer.append((time.time(), tag, obj))
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def dump(self) -> list[str]:
+        """Format the buffered entries, oldest first."""
+        return [
+            f"{time.strftime('%H:%M:%S', time.localtime(ts))}.{int(ts % 1 * 1e6):06d}"
+            f" {tag}: {obj!r}"
+            for ts, tag, obj in list(self._buffer)
+        ]
@@ -1,6 +1,11 @@
 from __future__ import annotations
-from typing import Awaitable, Callable, TYPE_CHECKING
+from typing import Any, Awaitable, Callable, Final, TYPE_CHECKING
+import asyncio
+import contextvars
 import logging
+import time
+from duotecno.commands import Template, encode_temp, unit_command
+from duotecno.events import UnitCorrectionEvent, UnitStateEvent, command_cause
 from duotecno.protocol import (
     EV_UNITDUOSWITCHSTATUS_0,
     EV_UNITDIMSTATUS_0,
@@ -9,18 +14,45 @@ from duotecno.protocol import (
     EV_UNITSENSSTATUS_1,
     EV_UNITCONTROLSTATUS_0,
     EV_UNITMACROCOMMAND_0,
+    BaseUnitStatusMessage,
+    MsgType,
     calc_value,
 )
+from duotecno.serialize import unit_to_dict
 
 if TYPE_CHECKING:
     from duotecno.node import Node
     from duotecno.protocol import BaseMessage
 
 
+# a unit state field, the generic units keep their payload as a tuple
+StateValue = str | int | float | bool | tuple[int, ...]
+
+# the message the node is handing to a unit, becomes the msgType of the
+# state events it causes
+received_type: contextvars.ContextVar[MsgType | None] = contextvars.ContextVar(
+    "received_type", default=None
+)
+
+# setpoint field per SensPreset
+PRESET_FIELDS: Final = ("setp_sun", "setp_hsun", "setp_moon", "setp_hmoon")
+# seconds a command waits for its status when the optimistic mode is off
+CONFIRM_TIMEOUT: Final = 5.0
+
+
 class BaseUnit:
     _unitType: int = 0
+    # name => (code, method, *args) for the constant frames of this unit
+    _commands: dict[str, tuple[Any, ...]] = {}
+    # name => (code, method) for frames that end with variable arguments
+    _prefixes: dict[str, tuple[MsgType, int]] = {}
+    _frames: dict[str, bytes]
+    # apply the state of commands before the confirmation, also when the
+    # optimistic mode is off (there is no rollback then)
+    _alwaysOptimistic: bool = False
     _available: bool = True
-    _on_status_update: list[Callable[[], Awaitable[None]]] = []
+    _last_seen: float = 0.0
+    _on_status_update: list[Callable[[], Awaitable[None]]]
     name: str = ""
     unit: int = 0
     available: bool = True
@@ -30,13 +62,38 @@ class BaseUnit:
         node: Node,
         name: str,
         unit: int,
-        writer: Callable[[str], Awaitable[None]],
+        writer: Callable[[str | bytes], Awaitable[None]],
     ) -> None:
         self._log = logging.getLogger("pyduotecno-unit")
         self.node = node
         self.name = name
         self.unit = unit
         self.writer = writer
+        # per unit, a class level list would call every callback for every unit
+        self._on_status_update = []
+        # key => (expected value, future, monotonic time sent, command_cause)
+        # of commands waiting for their status
+        self._pending: dict[str, tuple[Any, asyncio.Future[None], float, Any]] = {}
+        # key => last value from the bus, while an optimistic value is shown
+        self._rollback: dict[str, Any] = {}
+        self._reconcileTasks: set[asyncio.Task[None]] = set()
+        self._frames = {}
+        for key, (code, method, *args) in self._commands.items():
+            cmd = unit_command(code, method, node.address, unit, *args)
+            self._frames[key] = cmd.encode()
+        # the address and unit of the variable frames are encoded once
+        self._templates = {
+            key: Template(code, method, node.address, unit)
+            for key, (code, method) in self._prefixes.items()
+        }
+        if self._unitType:
+            self._frames["status"] = unit_command(
+                MsgType.FC_NODEDATABASEREQUESTSTATUS,
+                3,
+                node.address,
+                unit,
+                self._unitType,
+            ).encode()
         self._log.info(
             f"New Unit: '{self.node.name}' => '{self.name}' = {type(self).__name__}"
         )
@@ -50,6 +107,10 @@ class BaseUnit:
     def is_available(self) -> bool:
         return self._available
 
+    def get_last_seen(self) -> float:
+        """time.monotonic() of the last packet for this unit, 0 if never seen."""
+        return self._last_seen
+
     def get_node_address(self) -> int:
         return self.node.get_address()
 
@@ -62,36 +123,208 @@ class BaseUnit:
     def get_number(self) -> int:
         return self.unit
 
+    def _command(self, key: str, *args: int) -> bytes:
+        """Frame of a command with variable arguments, see _prefixes.
+
+        raises ValueError when an argument is out of range
+        """
+        return self._templates[key](*args)
+
     def on_status_update(self, meth: Callable[[], Awaitable[None]]) -> None:
         self._on_status_update.append(meth)
 
     def __repr__(self) -> str:
         items = []
         for k, v in self.__dict__.items():
-            if k not in ["_log", "writer", "node"]:
+            if k not in [
+                "_log",
+                "writer",
+                "node",
+                "_frames",
+                "_templates",
+                "_pending",
+                "_rollback",
+                "_reconcileTasks",
+            ]:
                 items.append(f"{k} = {v!r}")
         return "{}[{}]".format(type(self), ", ".join(items))
 
+    def to_dict(self) -> dict[str, Any]:
+        """The unit state, for json or msgpack export."""
+        return unit_to_dict(self)
+
     async def handlePacket(self, packet: BaseMessage) -> None:
-        self._log.debug(f"Unhandled unit packet: {packet}")
+        self._log.debug("Unhandled unit packet: %s", packet)
 
-    async def requestStatus(self) -> None:
-        if self._unitType:
-            await self.writer(
-                f"[209,3,{self.node.address},{self.unit},{self._unitType}]"
-            )
+    async def requestStatus(self) -> bool:
+        """Ask the status, False when this unit is not asked (nothing sent)."""
+        if not self._unitType:
+            return False
+        self.node.health.requested()
+        await self.writer(self._frames["status"])
+        return True
+
+    async def pollStatus(self) -> None:
+        """Periodic refresh, see StatusPoller."""
+        await self.requestStatus()
+
+    def is_pending(self, key: str | None = None) -> bool:
+        """True while a command did not get its status confirmation yet.
 
-    async def _update(self, data: dict[str, str | int | float | bool]) -> None:
+        with a key only that state field is checked
+        """
+        if key is None:
+            return bool(self._pending)
+        return key in self._pending
+
+    async def wait_confirmed(self, timeout: float = 5.0) -> bool:
+        """Wait until the bus confirmed all pending commands."""
+        futs = [pending[1] for pending in self._pending.values()]
+        if not futs:
+            return True
+        await asyncio.wait(futs, timeout=timeout)
+        for fut in futs:
+            if fut.done() and not fut.cancelled() and fut.exception():
+                raise fut.exception()  # type: ignore[misc]
+        return all(fut.done() and not fut.cancelled() for fut in futs)
+
+    async def _fail(self, exc: Exception) -> None:
+        """The bus refused a command, fail everything that is pending."""
+        for _val, fut, *_rest in self._pending.values():
+            if not fut.done():
+                fut.set_exception(exc)
+                # mark as retrieved, nobody might be waiting for it
+                fut.exception()
+        self._pending.clear()
+        await self._roll_back(list(self._rollback))
+
+    def _expect(self, data: dict[str, StateValue]) -> None:
+        """Register the state a command should result in."""
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        cause = command_cause.get()
+        for key, val in data.items():
+            old = self._pending.pop(key, None)
+            if old:
+                old[1].cancel()
+            self._pending[key] = (val, loop.create_future(), now, cause)
+
+    def _pending_since(self) -> float | None:
+        """When the oldest pending command was sent, None without any."""
+        return min((pending[2] for pending in self._pending.values()), default=None)
+
+    def _confirm(self, data: dict[str, StateValue]) -> dict[str, Any]:
+        """Resolve the pending commands that data confirms.
+
+        returns their keys with the command_cause of the command
+        """
+        confirmed = {}
+        for key, new_val in data.items():
+            pending = self._pending.get(key)
+            if pending and pending[0] == new_val:
+                del self._pending[key]
+                self._rollback.pop(key, None)
+                confirmed[key] = pending[3]
+                if not pending[1].done():
+                    pending[1].set_result(None)
+        return confirmed
+
+    async def _optimistic(self, data: dict[str, StateValue]) -> None:
+        """Register the expected state of a command.
+
+        In optimistic mode (see PyDuotecno.enable_optimistic) the state is
+        applied right away, flagged as pending. It is rolled back with a
+        single UnitCorrectionEvent when the bus does not confirm it in
+        time or refuses the command. The confirmation is published as a
+        regular (not pending) event.
+        """
+        self._expect(data)
+        timeout = self.node.optimistic
+        if timeout is not None:
+            for key in data:
+                if key not in self._rollback:
+                    self._rollback[key] = getattr(self, f"_{key}", None)
+        # also without rollback, an unanswered command must not stay pending
+        futs = {key: self._pending[key][1] for key in data}
+        task = asyncio.create_task(self._reconcile(futs, timeout or CONFIRM_TIMEOUT))
+        self._reconcileTasks.add(task)
+        task.add_done_callback(self._reconcileTasks.discard)
+        if timeout is not None or self._alwaysOptimistic:
+            await self._set(data, pending=True)
+
+    async def _reconcile(
+        self, futs: dict[str, asyncio.Future[None]], timeout: float
+    ) -> None:
+        await asyncio.wait(futs.values(), timeout=timeout)
+        # a newer command for the same field has its own reconcile
+        expired = [
+            key
+            for key, fut in futs.items()
+            if not fut.done() and self._pending.get(key, (None, None))[1] is fut
+        ]
+        if not expired:
+            return
+        self._log.debug(f"{self.name}: no confirmation for {expired}, rolling back")
+        for key in expired:
+            self._pending.pop(key)[1].cancel()
+        await self._roll_back(expired)
+
+    async def _roll_back(self, keys: list[str]) -> None:
+        """Restore the last state the bus reported."""
+        data = {key: self._rollback.pop(key) for key in keys if key in self._rollback}
+        if data:
+            await self._set(data, eventType=UnitCorrectionEvent)
+
+    async def _update(self, data: dict[str, StateValue]) -> None:
+        confirmed = self._confirm(data) if self._pending else {}
+        if self._rollback and not self._rollback.keys().isdisjoint(data):
+            # keep showing the optimistic value until it is reconciled
+            data = dict(data)
+            for key in self._rollback.keys() & data.keys():
+                self._rollback[key] = data.pop(key)
+        await self._set(data, msgType=received_type.get(), confirmed=confirmed)
+
+    async def _set(
+        self,
+        data: dict[str, StateValue],
+        pending: bool = False,
+        eventType: type[UnitStateEvent] = UnitStateEvent,
+        msgType: MsgType | None = None,
+        confirmed: dict[str, Any] | None = None,
+    ) -> None:
+        changes = {}
         for key, new_val in data.items():
             cur_val = getattr(self, f"_{key}", None)
             if cur_val is None or cur_val != new_val:
                 setattr(self, f"_{key}", new_val)
+                changes[key] = new_val
                 for m in self._on_status_update:
                     await m()
+            elif confirmed and key in confirmed:
+                # the optimistic value is shown already, history and rules
+                # skip pending events and only see it now
+                changes[key] = new_val
+        if changes:
+            cause = None
+            if confirmed:
+                cause = next((c for k, c in confirmed.items() if k in changes), None)
+            self.node.publish(
+                eventType(
+                    self.name,
+                    changes,
+                    pending=pending,
+                    address=self.node.address,
+                    unit=self.unit,
+                    msgType=msgType,
+                    cause=cause,
+                )
+            )
 
 
 class SensUnit(BaseUnit):
     _unitType: int = 4
+    _alwaysOptimistic = True
+    _control: int = 0
     _state: int = 0
     _preset: int = 0
     _cur_temp: float = 0.0
@@ -101,15 +334,25 @@ class SensUnit(BaseUnit):
     _setp_hmoon: float = 0.0
     _offset: float = 0.0
     _swing_angle: float = 0.0
-    _woking_mode: float = 0.0
-    _fan_speed: float = 0.0
-    _swing_mode: float = 0.0
+    _working_mode: int = 0
+    _fan_speed: int = 0
+    _swing_mode: int = 0
+    _mode: int = 0
+    _commands = {
+        "off": (MsgType.FC_UNITSENSSET, 3, 0),
+        "on": (MsgType.FC_UNITSENSSET, 3, 1),
+    }
+    _prefixes = {
+        "preset": (MsgType.FC_UNITSENSSET, 13),
+        "temp": (MsgType.FC_UNITSENSSET, 1),
+    }
 
     async def handlePacket(self, packet: BaseMessage) -> None:
         if isinstance(packet, EV_UNITSENSSTATUS_0) or isinstance(
             packet, EV_UNITSENSSTATUS_1
         ):
-            tmp: dict[str, str | int | float] = {}
+            tmp: dict[str, StateValue] = {}
+            tmp["control"] = packet.controlState
             if packet.controlState == 0:
                 tmp["state"] = 0
             else:
@@ -122,7 +365,7 @@ class SensUnit(BaseUnit):
             tmp["setp_hmoon"] = packet.halfmoon
             if isinstance(packet, EV_UNITSENSSTATUS_1):
                 tmp["offset"] = packet.offset
-                tmp["swing_angle"] = packet.swingMode
+                tmp["swing_angle"] = packet.swing
                 tmp["working_mode"] = packet.workingMode
                 tmp["fan_speed"] = packet.fanSpeed
                 tmp["swing_mode"] = packet.swingMode
@@ -133,37 +376,56 @@ class SensUnit(BaseUnit):
                 await self._update({"state": packet.state})
             elif packet.event == 10:
                 await self._update({"mode": packet.state})
-            # TODO event 11
             elif packet.event == 12:
                 await self._update({"working_mode": packet.state})
             elif packet.event == 13:
                 await self._update({"fan_speed": packet.state})
-            # TODO event 14
             elif packet.event == 15:
-                await self._update({"Swing_mode": packet.state})
+                await self._update({"swing_mode": packet.state})
+            elif packet.event in (11, 14):
+                # these do not carry the new value, sensunits are not asked
+                # for their status (see requestStatus): the next status
+                # brings it, an opted-in StatusPoller no longer skips it
+                self._last_seen = 0.0
+            else:
+                self._log.debug("Unhandled sens macro event: %s", packet)
             return
         await super().handlePacket(packet)
 
-    async def requestStatus(self) -> None:
+    async def requestStatus(self) -> bool:
         # We should never do this for sensunits, as not all senseunits will work
-        pass
+        return False
+
+    async def pollStatus(self) -> None:
+        # not done at connect time (see above), only when polling is enabled
+        self.node.health.requested()
+        await self.writer(self._frames["status"])
 
     async def set_preset(self, preset: int) -> None:
-        await self.writer(f"[136,13,{self.node.address},{self.unit},{preset}]")
+        await self.writer(self._command("preset", preset))
+        await self._optimistic({"preset": preset})
 
     async def turn_off(self) -> None:
-        await self.writer(f"[136,3,{self.node.address},{self.unit},0]")
+        await self.writer(self._frames["off"])
+        await self._optimistic({"control": 0})
 
     async def turn_on(self) -> None:
-        await self.writer(f"[136,3,{self.node.address},{self.unit},1]")
-
-    async def set_temp(self, temp: float) -> None:
-        msb, lsb = divmod(temp * 10, 256)
-        msb = int(msb)
-        lsb = int(lsb)
-        await self.writer(
-            f"[136,1,{self.node.address},{self.unit},{self._preset},{msb},{lsb}]"
-        )
+        await self.writer(self._frames["on"])
+        await self._optimistic({"control": 1})
+
+    async def set_setpoint(self, preset: int, temp: float) -> None:
+        """Set the target temperature of one preset."""
+        await self.writer(self._command("temp", preset, *encode_temp(temp)))
+        await self._optimistic({PRESET_FIELDS[preset]: round(float(temp), 1)})
+
+    async def set_temp(self, temp: float, preset: int | None = None) -> None:
+        """Set the target temperature, by default of the active preset."""
+        if preset is None:
+            preset = self._preset
+        await self.set_setpoint(preset, temp)
+
+    def is_on(self) -> bool:
+        return self._control != 0
 
     def get_state(self) -> int:
         return self._state
@@ -171,6 +433,9 @@ class SensUnit(BaseUnit):
     def get_cur_temp(self) -> float:
         return self._cur_temp
 
+    def get_setpoint(self, preset: int) -> float:
+        return float(getattr(self, f"_{PRESET_FIELDS[preset]}"))
+
     def get_target_temp(self) -> float:
         if self._preset == 0:
             return self._setp_sun
@@ -184,11 +449,28 @@ class SensUnit(BaseUnit):
     def get_preset(self) -> int:
         return self._preset
 
+    def get_working_mode(self) -> int:
+        return self._working_mode
+
+    def get_fan_speed(self) -> int:
+        return self._fan_speed
+
+    def get_swing_mode(self) -> int:
+        return self._swing_mode
+
+    def get_swing_angle(self) -> float:
+        return self._swing_angle
+
+    def get_offset(self) -> float:
+        return self._offset
+
 
 class DimUnit(BaseUnit):
     _unitType: int = 1
     _state: int = 0
     _value: int = 0
+    _commands = {"off": (MsgType.FC_UNITDIMSET, 9), "on": (MsgType.FC_UNITDIMSET, 10)}
+    _prefixes = {"set": (MsgType.FC_UNITDIMSET, 3)}
 
     async def handlePacket(self, packet: BaseMessage) -> None:
         if isinstance(packet, EV_UNITDIMSTATUS_0):
@@ -215,20 +497,28 @@ class DimUnit(BaseUnit):
         # val 0 but not None => turn off
         # val = None => restore
         if value and value > 0:
-            # set state and turn on
-            await self.writer(f"[162,10,{self.node.address},{self.unit}]")
-            await self.writer(f"[162,3,{self.node.address},{self.unit},{value}]")
+            # set state and turn on, nothing is sent for an invalid value
+            frame = self._command("set", value)
+            await self.writer(self._frames["on"])
+            await self.writer(frame)
+            await self._optimistic({"state": 1, "value": value})
         elif value is not None:
             # turn off
-            await self.writer(f"[162,9,{self.node.address},{self.unit}]")
+            await self.writer(self._frames["off"])
+            await self._optimistic({"state": 0})
         else:
             # send turn on (restore state)
-            await self.writer(f"[162,10,{self.node.address},{self.unit}]")
+            await self.writer(self._frames["on"])
+            await self._optimistic({"state": 1})
 
 
 class SwitchUnit(BaseUnit):
     _unitType: int = 2
     _state: int = 0
+    _commands = {
+        "off": (MsgType.FC_UNITSWITCHSET, 2),
+        "on": (MsgType.FC_UNITSWITCHSET, 3),
+    }
 
     async def handlePacket(self, packet: BaseMessage) -> None:
         if isinstance(packet, EV_UNITSWITCHSTATUS_0):
@@ -250,23 +540,85 @@ class SwitchUnit(BaseUnit):
 
     async def turn_on(self) -> None:
         """Switch on."""
-        await self.writer(f"[163,3,{self.node.address},{self.unit}]")
+        await self.writer(self._frames["on"])
+        await self._optimistic({"state": 1})
 
     async def turn_off(self) -> None:
         """Switch off."""
-        await self.writer(f"[163,2,{self.node.address},{self.unit}]")
+        await self.writer(self._frames["off"])
+        await self._optimistic({"state": 0})
 
 
 class DuoswitchUnit(BaseUnit):
     _unitType: int = 8
     _state: int = 1
+    # estimated position, 0 = closed, 100 = open, None = unknown
+    _position: int | None = None
+    _commands = {
+        "stop": (MsgType.FC_UNITDUOSWITCHSET, 3),
+        "open": (MsgType.FC_UNITDUOSWITCHSET, 4),
+        "close": (MsgType.FC_UNITDUOSWITCHSET, 5),
+    }
+    # seconds needed for a full move, used to estimate the position
+    travel_up: float = 30.0
+    travel_down: float = 30.0
+
+    def __init__(
+        self,
+        node: Node,
+        name: str,
+        unit: int,
+        writer: Callable[[str | bytes], Awaitable[None]],
+    ) -> None:
+        super().__init__(node, name, unit, writer)
+        # (monotonic start time, start position) of the current move
+        self._move: tuple[float, float] | None = None
+        self._stopTask: asyncio.Task[None] | None = None
 
     async def handlePacket(self, packet: BaseMessage) -> None:
         if isinstance(packet, EV_UNITDUOSWITCHSTATUS_0):
-            await self._update({"state": packet.state})
+            await self._update(self._track(packet.state))
             return
         await super().handlePacket(packet)
 
+    def _track(self, state: int) -> dict[str, StateValue]:
+        """Follow the moves to estimate the position."""
+        res: dict[str, StateValue] = {"state": state}
+        if state in (3, 4):
+            if self._state != state or self._move is None:
+                start = self._estimate()
+                if start is None:
+                    # unknown, assume it starts from the opposite end
+                    start = 0.0 if state == 4 else 100.0
+                self._move = (time.monotonic(), start)
+            return res
+        pos = self._estimate()
+        self._move = None
+        if state == 1:
+            pos = 0.0
+        elif state == 2:
+            pos = 100.0
+        if pos is not None:
+            res["position"] = int(round(pos))
+        return res
+
+    def _estimate(self) -> float | None:
+        if self._move is None:
+            return None if self._position is None else float(self._position)
+        started, start = self._move
+        elapsed = time.monotonic() - started
+        if self._state == 4:
+            return min(100.0, start + elapsed / self.travel_up * 100)
+        return max(0.0, start - elapsed / self.travel_down * 100)
+
+    def get_position(self) -> int | None:
+        """Estimated position (0 closed - 100 open), also during a move."""
+        pos = self._estimate()
+        return None if pos is None else int(round(pos))
+
+    def is_idle(self) -> bool:
+        return self._state not in (3, 4)
+
     def is_opening(self) -> bool:
         if self._state == 4:
             return True
@@ -282,19 +634,71 @@ class DuoswitchUnit(BaseUnit):
             return True
         return False
 
+    def _cancel_stop(self) -> None:
+        if self._stopTask:
+            self._stopTask.cancel()
+            self._stopTask = None
+
+    def _move_frames(self, action: str) -> list[bytes]:
+        """Frames for a move, stop first only when moving the other way."""
+        self._cancel_stop()
+        if (action == "open" and self._state == 3) or (
+            action == "close" and self._state == 4
+        ):
+            return [self._frames["stop"], self._frames[action]]
+        return [self._frames[action]]
+
+    def _position_frames(self, position: int) -> tuple[list[bytes], float]:
+        """Frames to move to a position and after how long to stop.
+
+        A delay of 0 means no timed stop is needed.
+        """
+        position = max(0, min(100, position))
+        cur = self._estimate()
+        if position in (0, 100) or cur is None:
+            if cur is None and position not in (0, 100):
+                self._log.warning(
+                    f"{self.name}: position unknown, moving to the nearest end"
+                )
+            return self._move_frames("open" if position >= 50 else "close"), 0.0
+        delta = position - cur
+        if abs(delta) < 1:
+            self._cancel_stop()
+            return ([] if self.is_idle() else [self._frames["stop"]]), 0.0
+        if delta > 0:
+            return self._move_frames("open"), delta / 100 * self.travel_up
+        return self._move_frames("close"), -delta / 100 * self.travel_down
+
+    def _stop_after(self, delay: float) -> None:
+        if delay > 0:
+            self._stopTask = asyncio.create_task(self._timed_stop(delay))
+
+    async def _timed_stop(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._stopTask = None
+        await self.writer(self._frames["stop"])
+
     async def open(self) -> None:
         """Move up."""
-        await self.stop()
-        await self.writer(f"[182,4,{self.node.address},{self.unit}]")
+        for frame in self._move_frames("open"):
+            await self.writer(frame)
 
     async def close(self) -> None:
         """Move down."""
-        await self.stop()
-        await self.writer(f"[182,5,{self.node.address},{self.unit}]")
+        for frame in self._move_frames("close"):
+            await self.writer(frame)
+
+    async def set_position(self, position: int) -> None:
+        """Move to a position (0 closed - 100 open), stopped on a timer."""
+        frames, delay = self._position_frames(position)
+        for frame in frames:
+            await self.writer(frame)
+        self._stop_after(delay)
 
     async def stop(self) -> None:
         """Stop the motor."""
-        await self.writer(f"[182,3,{self.node.address},{self.unit}]")
+        self._cancel_stop()
+        await self.writer(self._frames["stop"])
 
 
 class VirtualUnit(BaseUnit):
@@ -319,3 +723,65 @@ class VirtualUnit(BaseUnit):
 class ControlUnit(VirtualUnit):
     _unitType: int = 3
     pass
+
+
+class GenericUnit(BaseUnit):
+    """Unit family with a generic status payload (audio, av, irtx, videomux)."""
+
+    _setCode: MsgType
+    _state: int = 0
+    _values: tuple[int, ...] = ()
+
+    async def handlePacket(self, packet: BaseMessage) -> None:
+        if isinstance(packet, BaseUnitStatusMessage):
+            await self._update({"state": packet.state, "values": tuple(packet.values)})
+            return
+        if isinstance(packet, EV_UNITMACROCOMMAND_0):
+            await self._update({"state": packet.state})
+            return
+        await super().handlePacket(packet)
+
+    async def requestStatus(self) -> bool:
+        # like the sensunits, not requested at connect, only when polling
+        return False
+
+    async def pollStatus(self) -> None:
+        self.node.health.requested()
+        await self.writer(self._frames["status"])
+
+    def get_state(self) -> int:
+        return self._state
+
+    def get_values(self) -> tuple[int, ...]:
+        """The family specific part of the last status."""
+        return self._values
+
+    async def command(self, method: int, *args: int) -> None:
+        """Send a method of this family's FC_*SET command to the unit."""
+        frame = unit_command(self._setCode, method, self.node.address, self.unit, *args)
+        await self.writer(frame.encode())
+
+
+class AudioExtUnit(GenericUnit):
+    _unitType: int = 5
+    _setCode = MsgType.FC_UNITAUDIOEXTSET
+
+
+class AudioBasicUnit(GenericUnit):
+    _unitType: int = 10
+    _setCode = MsgType.FC_UNITAUDIOBASICSET
+
+
+class AVMatrixUnit(GenericUnit):
+    _unitType: int = 11
+    _setCode = MsgType.FC_UNITAVMATRIXSET
+
+
+class IRTXUnit(GenericUnit):
+    _unitType: int = 12
+    _setCode = MsgType.FC_UNITIRTXSET
+
+
+class VideoMuxUnit(GenericUnit):
+    _unitType: int = 14
+    _setCode = MsgType.FC_UNITVIDEOMUXSET
@@ -0,0 +1,67 @@
+"""Encoding cost of unit commands: f-strings vs the Command encoder.
+
+100 dimmer commands, one frame at a time and as a single batch.
+"""
+import time
+from duotecno.commands import Template, encode_batch, encode_into, unit_command
+from duotecno.protocol import MsgType
+
+RUNS = 2000
+CMDS = [unit_command(MsgType.FC_UNITDIMSET, 3, i % 8, i % 16, i) for i in range(100)]
+# what a unit keeps for its variable frames
+TEMPLATES = [
+    (Template(cmd.code, cmd.method, *cmd.args[:2]), cmd.args[2]) for cmd in CMDS
+]
+
+
+def fstring() -> list[bytes]:
+    # what the units used to do, per frame
+    res = []
+    for cmd in CMDS:
+        parts = (cmd.code.value, cmd.method, *cmd.args)
+        res.append(f"[{','.join(str(p) for p in parts)}]\n".encode())
+    return res
+
+
+def single() -> list[bytes]:
+    return [cmd.encode() for cmd in CMDS]
+
+
+def template() -> list[bytes]:
+    return [tmpl(value) for tmpl, value in TEMPLATES]
+
+
+def shared() -> bytearray:
+    buf = bytearray()
+    for cmd in CMDS:
+        encode_into(buf, cmd)
+    return buf
+
+
+def batch() -> bytes:
+    return encode_batch(CMDS)
+
+
+def validate() -> None:
+    for cmd in CMDS:
+        cmd.validate()
+
+
+assert b"".join(fstring()) == b"".join(single()) == shared() == batch()
+assert b"".join(template()) == batch()
+for name, func in [
+    ("f-string, no checks", fstring),
+    ("Command.encode()", single),
+    ("Template(address, unit)()", template),
+    ("encode_into(shared buffer)", shared),
+    ("encode_batch()", batch),
+    ("validate() only", validate),
+]:
+    best = float("inf")
+    for _round in range(5):
+        start = time.perf_counter()
+        for _i in range(RUNS):
+            func()
+        best = min(best, time.perf_counter() - start)
+    us = best / RUNS / len(CMDS) * 1e6
+    print(f"{name:28} {us:6.2f} us/command")
@@ -0,0 +1,44 @@
+"""Discovery of a simulated installation, the default timing vs auto-tuning.
+
+The second auto-tuned start loads the database and the tuned config from
+the cache.
+"""
+import asyncio
+import os
+import tempfile
+import time
+from duotecno.config import Config
+from duotecno.controller import PyDuotecno
+from duotecno.simulator import FakeGateway
+
+NODES = 4
+UNITS = 25
+
+
+async def start(gw: FakeGateway, config: Config, cache: str | None) -> PyDuotecno:
+    ctrl = PyDuotecno(config)
+    begin = time.perf_counter()
+    await ctrl.connect("127.0.0.1", gw.port, "secret", cache=cache)
+    took = time.perf_counter() - begin
+    window = ctrl.config.max_inflight
+    print(f"{len(ctrl.topology)} units in {took:6.2f}s, window {window}")
+    return ctrl
+
+
+async def main() -> None:
+    gw = FakeGateway.generate(NODES, UNITS, "secret")
+    await gw.start()
+    cache = os.path.join(tempfile.mkdtemp(), "cache.json")
+    for name, config, path in [
+        ("default", Config(), None),
+        ("auto-tune, discovery", Config(auto_tune=True), cache),
+        ("auto-tune, from cache", Config(auto_tune=True), cache),
+    ]:
+        print(f"{name:22}", end=" ")
+        ctrl = await start(gw, config, path)
+        await ctrl.disconnect()
+    print(ctrl.config)
+    await gw.stop()
+
+
+asyncio.run(main())
@@ -0,0 +1,48 @@
+"""Legacy readline framing vs FrameDecoder, 100k frames."""
+import asyncio
+import time
+from duotecno.framing import FrameDecoder
+
+N = 100000
+FRAME = b"[7,1,1,2,4,0,1,1,0,0,200,0,210,0,200,0,160,0,180,0,5,0,20,1,2,0]\r\n"
+
+
+def reader() -> asyncio.StreamReader:
+    res = asyncio.StreamReader(limit=2**20)
+    res.feed_data(FRAME * N)
+    res.feed_eof()
+    return res
+
+
+async def legacy() -> int:
+    rd = reader()
+    count = 0
+    while True:
+        tmp2 = await rd.readline()
+        if not tmp2:
+            return count
+        tmp = tmp2.decode().rstrip()
+        if not tmp.startswith("["):
+            tmp = tmp.lstrip("[")
+        tmp = tmp.replace("\x00", "")[1:-1]
+        count += 1
+
+
+async def decoder() -> int:
+    rd = reader()
+    dec = FrameDecoder()
+    count = 0
+    while data := await rd.read(4096):
+        count += len(dec.feed(data))
+    return count
+
+
+async def main() -> None:
+    for name, func in (("readline + str ops", legacy), ("FrameDecoder", decoder)):
+        start = time.perf_counter()
+        count = await func()
+        res = (time.perf_counter() - start) * 1000
+        print(f"{name:20} {res:8.1f} ms, {count} frames")
+
+
+asyncio.run(main())
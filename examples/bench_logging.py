@@ -0,0 +1,49 @@
+"""CPU cost of the RX/TX logging per 10k packets, with DEBUG disabled."""
+import logging
+import time
+from duotecno.controller import PyDuotecno
+from duotecno.trace import HotTrace
+
+N = 10000
+FRAME = "7,1,1,2,4,0,1,1,0,0,200,0,210,0,200,0,160,0,180,0,5,0,20,1,2,0"
+log = logging.getLogger("pyduotecno")
+log.setLevel(logging.INFO)
+ctrl = PyDuotecno()
+packets = [ctrl._parsePacket(FRAME) for _i in range(N)]
+
+
+def legacy() -> None:
+    for pc in packets:
+        log.debug(f'RX: "{FRAME}"')
+        log.debug(f"WX: {pc}")
+        log.debug(f"TX: {b'[209,3,1,2,4]'!r}")
+
+
+def guarded(trace: HotTrace) -> None:
+    for pc in packets:
+        if trace.enabled:
+            trace.record("RX", FRAME)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug('RX: "%s"', FRAME)
+        if trace.enabled:
+            trace.record("WX", pc)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("WX: %s", pc)
+        if trace.enabled:
+            trace.record("TX", b"[209,3,1,2,4]")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("TX: %r", b"[209,3,1,2,4]")
+
+
+def measure(name: str, func, *args) -> None:
+    start = time.process_time()
+    func(*args)
+    print(f"{name:20} {(time.process_time() - start) * 1000:8.2f} ms CPU / {N}")
+
+
+trace = HotTrace()
+measure("legacy f-strings", legacy)
+measure("guarded, trace off", guarded, trace)
+trace.enable()
+measure("guarded, trace on", guarded, trace)
+print(trace.dump()[-1])
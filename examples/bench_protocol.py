@@ -0,0 +1,23 @@
+"""Decode and encode throughput of the message classes, 100k frames.
+
+The decoder fuzzing and the round trip checks are in tests/test_protocol.py.
+"""
+import time
+from collections import deque
+from duotecno.protocol import Packet
+
+N = 100000
+FRAME = "7,1,1,2,4,0,1,1,0,0,200,0,210,0,200,0,160,0,180,0,5,0,20,1,2,0"
+
+start = time.perf_counter()
+packets = [
+    Packet(int(p[0]), int(p[1]), deque([int(i) for i in p[2:]]))
+    for p in (FRAME.split(",") for _i in range(N))
+]
+decode = time.perf_counter() - start
+start = time.perf_counter()
+frames = [pc.cls.encode_frame() for pc in packets]
+encode = time.perf_counter() - start
+assert frames[0] == FRAME
+print(f"decode {N / decode:10.0f} packets/s")
+print(f"encode {N / encode:10.0f} packets/s")
@@ -0,0 +1,66 @@
+"""Trigger to action latency with a backlog of status requests.
+
+A switch turning on dims a dimmer to 30%, once as a rule and once from
+an event stream consumer (the way it was done outside of the library).
+"""
+import asyncio
+import time
+from duotecno.controller import PyDuotecno
+from duotecno.events import UnitStateEvent
+from duotecno.simulator import FakeGateway
+
+BACKLOG = 40
+RUNS = 3
+ACTION = "[162,3,1,1,30]"
+
+
+async def trigger(gw: FakeGateway, ctrl: PyDuotecno, state: int) -> float:
+    # the backlog: normal priority status requests
+    for _i in range(BACKLOG // 8):
+        for unit in ctrl.get_units(["SwitchUnit", "DimUnit", "DuoswitchUnit"]):
+            await unit.requestStatus()
+    n = len(gw.received)
+    start = time.perf_counter()
+    await gw.push([6, 0, 1, 0, 2, 0, state])
+    while ACTION not in gw.received[n:]:
+        await asyncio.sleep(0.001)
+    res = time.perf_counter() - start
+    await ctrl.flush()
+    # reset for the next run
+    await gw.push([6, 0, 1, 0, 2, 0, 0])
+    await asyncio.sleep(0.3)
+    return res * 1000
+
+
+async def main() -> None:
+    gw = FakeGateway.generate(1, 8, "pw")
+    await gw.start()
+    ctrl = PyDuotecno()
+    await ctrl.connect("127.0.0.1", gw.port, "pw")
+    switch = ctrl.get_units("SwitchUnit")[0]
+    dimmer = ctrl.get_units("DimUnit")[0]
+
+    rules = ctrl.enable_rules()
+
+    @rules.when(switch, "state", 1)
+    async def _on(value: int) -> None:
+        await dimmer.set_dimmer_state(30)
+
+    res = [await trigger(gw, ctrl, 1) for _i in range(RUNS)]
+    print(f"rule, high priority      {min(res):8.1f} ms")
+    rules.remove(rules.get_rules()[0])
+
+    async def consumer() -> None:
+        async for event in ctrl.events(units=[(1, 0)], types=[UnitStateEvent]):
+            if event.changes.get("state") == 1:
+                await dimmer.set_dimmer_state(30)
+
+    task = asyncio.create_task(consumer())
+    res = [await trigger(gw, ctrl, 1) for _i in range(RUNS)]
+    print(f"event consumer           {min(res):8.1f} ms")
+    task.cancel()
+    await ctrl.disconnect()
+    await gw.stop()
+
+
+asyncio.run(main())
@@ -0,0 +1,42 @@
+"""Compare the schema based serializer with the old to_json_basic."""
+import json
+import timeit
+from collections import deque
+from enum import Enum
+from duotecno.protocol import Packet
+from duotecno.serialize import message_to_dict, packb
+
+
+def legacy_to_json_basic(msg):
+    """The implementation before the schema based serializer."""
+    me = {}
+    me["name"] = str(msg.__class__.__name__)
+    me.update(msg.__dict__.copy())
+    for key in me.copy():
+        if key == "name":
+            continue
+        if isinstance(me[key], str):
+            continue
+        if callable(getattr(msg, key)) or key.startswith("__"):
+            del me[key]
+        if isinstance(me[key], Enum):
+            me[key] = me[key].name
+        if isinstance(me[key], (bytes, bytearray)):
+            me[key] = str(me[key], "utf-8")
+    return me
+
+
+data = [1, 2, 4, 0, 1, 1, 0, 0, 200, 0, 210, 0, 200, 0, 160, 0, 180, 0, 5, 0, 20, 1]
+data += [2, 0]
+msg = Packet(7, 1, deque(data)).cls
+assert legacy_to_json_basic(msg) == message_to_dict(msg)
+N = 20000
+for name, func in (
+    ("legacy dict", lambda: legacy_to_json_basic(msg)),
+    ("schema dict", lambda: message_to_dict(msg)),
+    ("legacy json", lambda: json.dumps(legacy_to_json_basic(msg))),
+    ("schema json", lambda: json.dumps(message_to_dict(msg))),
+    ("schema msgpack", lambda: packb(message_to_dict(msg))),
+):
+    t = timeit.timeit(func, number=N)
+    print(f"{name:15} {t / N * 1e6:7.2f} us/msg")
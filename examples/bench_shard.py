@@ -0,0 +1,74 @@
+"""Event throughput of a ShardPool with 1, 2 and 4 workers.
+
+The simulated gateways run in their own process and push switch status
+frames (alternating on/off) as fast as the controllers read them.
+"""
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from duotecno.shard import ShardPool, Site
+from duotecno.simulator import FakeGateway
+
+SITES = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+DURATION = 10.0
+BLOB = b"".join(b"[6,0,1,0,2,0,%d]\r\n" % (i % 2) for i in range(200))
+
+
+def gateways(conn) -> None:
+    async def run() -> None:
+        gws = [FakeGateway.generate(1, 2, "pw") for _i in range(SITES)]
+        for gw in gws:
+            await gw.start()
+        conn.send([gw.port for gw in gws])
+        pushing = False
+        while True:
+            # push only while measuring, not during discovery
+            while conn.poll():
+                pushing = conn.recv()
+            for gw in gws if pushing else []:
+                for writer in gw._clients:
+                    if writer.transport.get_write_buffer_size() < 65536:
+                        writer.write(BLOB)
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+
+
+async def measure(load, ports: list[int], workers: int) -> float:
+    sites = {f"site{i}": Site("127.0.0.1", port, "pw") for i, port in enumerate(ports)}
+    pool = ShardPool(sites, workers)
+    errors = await pool.start()
+    failed = {name: err for name, err in errors.items() if err}
+    if failed:
+        print(f"could not connect {failed}")
+    load.send(True)
+    await asyncio.sleep(1)
+    start = pool.events_received
+    await asyncio.sleep(DURATION)
+    res = (pool.events_received - start) / DURATION
+    load.send(False)
+    await asyncio.sleep(1)
+    # a command round-trip through the pool
+    t = time.perf_counter()
+    await pool.call("site0", 1, 0, "turn_on")
+    rtt = (time.perf_counter() - t) * 1000
+    await pool.stop()
+    print(f"{workers} workers: {res:10.0f} events/s, command {rtt:.1f} ms")
+    return res
+
+
+async def main() -> None:
+    parent, child = multiprocessing.Pipe()
+    load = multiprocessing.Process(target=gateways, args=(child,), daemon=True)
+    load.start()
+    ports = parent.recv()
+    print(f"{SITES} sites, {os.cpu_count()} cores")
+    for workers in (1, 2, 4):
+        await measure(parent, ports, workers)
+    load.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+"""Import time and time to first command, one-shot vs a full connect."""
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+from duotecno.controller import PyDuotecno
+from duotecno.oneshot import send_commands
+from duotecno.simulator import FakeGateway
+
+RUNS = 10
+FRAME = "[209,3,1,0,4]"
+IMPORT = "import time; t = time.perf_counter(); import duotecno.controller; "
+IMPORT += "print(time.perf_counter() - t)"
+
+
+def import_time() -> float:
+    res = [
+        float(subprocess.check_output([sys.executable, "-c", IMPORT]))
+        for _i in range(RUNS)
+    ]
+    return statistics.median(res) * 1000
+
+
+async def first_command(gw: FakeGateway, oneshot: bool) -> float:
+    n = len(gw.received)
+    start = time.perf_counter()
+    if oneshot:
+        await send_commands("127.0.0.1", gw.port, "pw", FRAME)
+    else:
+        ctrl = PyDuotecno()
+        await ctrl.connect("127.0.0.1", gw.port, "pw")
+        await ctrl.write(FRAME)
+        await ctrl.flush()
+    while FRAME not in gw.received[n:]:
+        await asyncio.sleep(0.001)
+    res = time.perf_counter() - start
+    if not oneshot:
+        await ctrl.disconnect()
+    return res * 1000
+
+
+async def main() -> None:
+    print(f"import duotecno.controller   {import_time():8.1f} ms")
+    gw = FakeGateway.generate(2, 8, "pw")
+    await gw.start()
+    for oneshot in (True, False):
+        res = [await first_command(gw, oneshot) for _i in range(3)]
+        name = "one-shot" if oneshot else "full connect"
+        print(f"first command, {name:14} {statistics.median(res):8.1f} ms")
+    await gw.stop()
+
+
+asyncio.run(main())
@@ -0,0 +1,94 @@
+"""Unit lookups on a large installation, scanning the nodes vs the topology.
+
+The installation is discovered from the frames of a simulated gateway,
+fed straight into the controller (no connection needed).
+"""
+import asyncio
+import random
+import time
+from duotecno.controller import PyDuotecno
+from duotecno.simulator import FakeGateway, SimNode, SimUnit
+
+NODES = 100
+UNITS = 50
+ROOMS = ["kitchen", "hall", "living", "bedroom", "garage", "office", "bath"]
+THINGS = ["light", "spots", "blinds", "heating", "socket", "scene"]
+TYPES = [1, 2, 4, 7, 8]
+RUNS = 1000
+
+
+def installation() -> FakeGateway:
+    rnd = random.Random(1)
+    nodes = []
+    for n in range(NODES):
+        units = [
+            SimUnit(f"{rnd.choice(THINGS)} {rnd.choice(ROOMS)} {u}", rnd.choice(TYPES))
+            for u in range(UNITS)
+        ]
+        nodes.append(SimNode(f"node {n}", n + 1, units))
+    return FakeGateway(nodes)
+
+
+async def discover(ctrl: PyDuotecno, gw: FakeGateway) -> float:
+    frames = [gw.handle([209, 1, i])[0] for i in range(NODES)]
+    for node in gw.nodes:
+        frames += [gw.handle([209, 2, node.address, u])[0] for u in range(UNITS)]
+    start = time.perf_counter()
+    for frame in frames:
+        await ctrl._handlePacket(ctrl._parsePacket(",".join(map(str, frame))))
+    return time.perf_counter() - start
+
+
+def scan_type(ctrl: PyDuotecno, unit_type: str) -> list:
+    res = []
+    for node in ctrl.nodes.values():
+        res += node.get_unit_by_type(unit_type)
+    return res
+
+
+def scan_name(ctrl: PyDuotecno, text: str) -> list:
+    return [
+        unit
+        for node in ctrl.nodes.values()
+        for unit in node.get_units()
+        if text in unit.get_name().lower()
+    ]
+
+
+def scan_summary(ctrl: PyDuotecno) -> dict:
+    res: dict = {}
+    for node in ctrl.nodes.values():
+        for unit in node.get_units():
+            key = (node.address, type(unit).__name__)
+            res[key] = res.get(key, 0) + 1
+    return res
+
+
+def timeit(name: str, func, *args) -> None:
+    start = time.perf_counter()
+    for _i in range(RUNS):
+        res = func(*args)
+    us = (time.perf_counter() - start) / RUNS * 1e6
+    size = len(res) if isinstance(res, (list, dict)) else res
+    print(f"{name:32} {us:10.1f} us  ({size})")
+
+
+async def main() -> None:
+    ctrl = PyDuotecno()
+    secs = await discover(ctrl, installation())
+    topo = ctrl.topology
+    print(f"{len(topo)} units discovered and indexed in {secs * 1000:.0f} ms")
+    timeit("dimmers, scan", scan_type, ctrl, "DimUnit")
+    timeit("dimmers, topology", topo.by_type, "DimUnit")
+    timeit("dimmers on node 7, topology", topo.count, "DimUnit", 7)
+    timeit("*kitchen*, scan", scan_name, ctrl, "kitchen")
+    timeit("kitchen*, topology", topo.search, "kitchen")
+    timeit("counts per node, scan", scan_summary, ctrl)
+    timeit("counts per node, topology", topo.summary)
+    start = time.perf_counter()
+    match = topo.fuzzy("ligth kichen 12", 1)
+    print(f"fuzzy 'ligth kichen 12' -> {match[0].get_name()!r}", end=" ")
+    print(f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+asyncio.run(main())
@@ -0,0 +1,30 @@
+"""Fixtures: a simulated gateway and a controller connected to it."""
+
+from __future__ import annotations
+from collections.abc import AsyncIterator
+
+import pytest
+
+from duotecno.config import Config
+from duotecno.controller import PyDuotecno
+from duotecno.simulator import FakeGateway
+
+PASSWORD = "secret"
+# no pacing, the simulator answers right away
+FAST = Config(frame_delay=0.0, read_delay=0.0, request_delay=0.0, load_poll=0.01)
+
+
+@pytest.fixture
+async def gateway() -> AsyncIterator[FakeGateway]:
+    gw = FakeGateway.generate(2, 5, PASSWORD)
+    await gw.start()
+    yield gw
+    await gw.stop()
+
+
+@pytest.fixture
+async def controller(gateway: FakeGateway) -> AsyncIterator[PyDuotecno]:
+    ctrl = PyDuotecno(FAST)
+    await ctrl.connect("127.0.0.1", gateway.port, PASSWORD)
+    yield ctrl
+    await ctrl.disconnect()
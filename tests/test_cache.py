@@ -0,0 +1,57 @@
+"""The database cache of connect(cache=...)."""
+
+from __future__ import annotations
+import asyncio
+import os
+from pathlib import Path
+
+from duotecno.controller import PyDuotecno
+from duotecno.simulator import FakeGateway, SimUnit
+
+from .conftest import FAST, PASSWORD
+
+
+async def _connect(gateway: FakeGateway, cache: str) -> PyDuotecno:
+    ctrl = PyDuotecno(FAST)
+    await ctrl.connect("127.0.0.1", gateway.port, PASSWORD, cache=cache)
+    return ctrl
+
+
+def _unit_requests(gateway: FakeGateway) -> int:
+    return sum(frame.startswith("[209,2,") for frame in gateway.received)
+
+
+async def test_valid_cache_skips_the_discovery(
+    gateway: FakeGateway, tmp_path: Path
+) -> None:
+    cache = str(tmp_path / "cache.json")
+    await (await _connect(gateway, cache)).disconnect()
+    discovered = _unit_requests(gateway)
+    ctrl = await _connect(gateway, cache)
+    assert _unit_requests(gateway) == discovered
+    assert len(ctrl.topology) == 10
+    await ctrl.disconnect()
+
+
+async def test_changed_gateway_is_rediscovered(
+    gateway: FakeGateway, tmp_path: Path
+) -> None:
+    cache = str(tmp_path / "cache.json")
+    await (await _connect(gateway, cache)).disconnect()
+    gateway.nodes[1].units.append(SimUnit("new unit", 2))
+    ctrl = await _connect(gateway, cache)
+    assert len(ctrl.topology) == 11
+    assert ctrl.topology.search("new")
+    await ctrl.disconnect()
+
+
+async def test_node_reset_drops_the_cache(
+    gateway: FakeGateway, tmp_path: Path
+) -> None:
+    cache = str(tmp_path / "cache.json")
+    ctrl = await _connect(gateway, cache)
+    assert os.path.exists(cache)
+    await gateway.reset_node(1)
+    await asyncio.sleep(0.1)
+    assert not os.path.exists(cache)
+    await ctrl.disconnect()
@@ -0,0 +1,114 @@
+"""Command validation and encoding."""
+
+from __future__ import annotations
+
+import pytest
+
+from duotecno.commands import (
+    Command,
+    Template,
+    encode_batch,
+    encode_into,
+    encode_temp,
+    unit_command,
+)
+from duotecno.protocol import MsgType
+
+ADDR, UNIT = 12, 3
+AU = (ADDR, UNIT)
+
+
+def _old(frame: str) -> bytes:
+    """How the frames used to be built: text plus a newline."""
+    return f"{frame}\n".encode()
+
+
+@pytest.mark.parametrize(
+    "cmd, frame",
+    [
+        (Command(MsgType.FC_UNITSWITCHSET, 3, AU), "[163,3,12,3]"),
+        (Command(MsgType.FC_UNITSWITCHSET, 2, AU), "[163,2,12,3]"),
+        (Command(MsgType.FC_UNITDIMSET, 3, (*AU, 40)), "[162,3,12,3,40]"),
+        (Command(MsgType.FC_UNITDIMSET, 9, AU), "[162,9,12,3]"),
+        (Command(MsgType.FC_UNITDUOSWITCHSET, 4, AU), "[182,4,12,3]"),
+        (Command(MsgType.FC_UNITSENSSET, 13, (*AU, 2)), "[136,13,12,3,2]"),
+        (Command(MsgType.FC_UNITSENSSET, 3, (*AU, 1)), "[136,3,12,3,1]"),
+        (Command(MsgType.FC_UNITSENSSET, 1, (*AU, 0, 0, 215)), "[136,1,12,3,0,0,215]"),
+        (
+            Command(MsgType.FC_NODEDATABASEREQUESTSTATUS, 3, (*AU, 2)),
+            "[209,3,12,3,2]",
+        ),
+        (Command(MsgType.FC_NODEDATABASEREQUESTSTATUS, 0), "[209,0]"),
+        (Command(MsgType.FC_HEARTBEATREQUESTSTATUS, 1), "[215,1]"),
+    ],
+)
+def test_encode_matches_the_old_frames(cmd: Command, frame: str) -> None:
+    assert cmd.encode() == _old(frame)
+
+
+@pytest.mark.parametrize(
+    "cmd",
+    [
+        # out of range
+        Command(MsgType.FC_UNITDIMSET, 3, (ADDR, UNIT, 101)),
+        Command(MsgType.FC_UNITSENSSET, 13, (ADDR, UNIT, 4)),
+        Command(MsgType.FC_UNITSWITCHSET, 3, (256, UNIT)),
+        Command(MsgType.FC_UNITSWITCHSET, 3, (ADDR, -1)),
+        # wrong number of arguments
+        Command(MsgType.FC_UNITSWITCHSET, 3, (ADDR,)),
+        Command(MsgType.FC_UNITDIMSET, 3, (ADDR, UNIT)),
+        # unknown method of a command without extra bytes
+        Command(MsgType.FC_UNITSWITCHSET, 7, (ADDR, UNIT)),
+        # not a command, and not a byte
+        Command(MsgType.EV_UNITSWITCHSTATUS, 0),
+        Command(MsgType.FC_NODERESETSET, 0, (ADDR, 300)),
+        Command(MsgType.FC_UNITDIMSET, 3, (ADDR, UNIT, 4.5)),  # type: ignore[arg-type]
+    ],
+)
+def test_invalid_arguments_are_refused(cmd: Command) -> None:
+    with pytest.raises(ValueError):
+        cmd.encode()
+    with pytest.raises(ValueError):
+        cmd.validate()
+
+
+def test_template() -> None:
+    dim = Template(MsgType.FC_UNITDIMSET, 3, ADDR, UNIT)
+    assert dim(40) == _old(f"[162,3,{ADDR},{UNIT},40]")
+    assert dim(40) == unit_command(MsgType.FC_UNITDIMSET, 3, ADDR, UNIT, 40).encode()
+    with pytest.raises(ValueError):
+        dim(101)
+    with pytest.raises(ValueError):
+        dim()
+    off = Template(MsgType.FC_UNITSWITCHSET, 2, ADDR, UNIT)
+    assert off() == _old(f"[163,2,{ADDR},{UNIT}]")
+    with pytest.raises(ValueError):
+        Template(MsgType.FC_UNITDIMSET, 3, 256)
+
+
+def test_encode_batch() -> None:
+    cmds = [
+        Command(MsgType.FC_UNITSWITCHSET, 3, (ADDR, UNIT)),
+        Command(MsgType.FC_UNITDIMSET, 3, (ADDR, UNIT + 1, 40)),
+    ]
+    assert encode_batch(cmds) == b"".join(cmd.encode() for cmd in cmds)
+    buf = bytearray()
+    for cmd in cmds:
+        encode_into(buf, cmd)
+    assert bytes(buf) == encode_batch(cmds)
+    # one bad command fails the whole batch
+    with pytest.raises(ValueError):
+        encode_batch([*cmds, Command(MsgType.FC_UNITDIMSET, 3, (ADDR, UNIT, 101))])
+
+
+@pytest.mark.parametrize(
+    "temp, expected", [(21.5, (0, 215)), (0.0, (0, 0)), (-1.0, (255, 246))]
+)
+def test_encode_temp(temp: float, expected: tuple[int, int]) -> None:
+    assert encode_temp(temp) == expected
+
+
+@pytest.mark.parametrize("temp", [float("nan"), float("inf"), 4000.0, -4000.0])
+def test_encode_temp_out_of_range(temp: float) -> None:
+    with pytest.raises(ValueError):
+        encode_temp(temp)
@@ -0,0 +1,36 @@
+"""Config tuning and the tuned settings in the cache."""
+
+from __future__ import annotations
+from dataclasses import replace
+from pathlib import Path
+
+from duotecno.config import Config
+from duotecno.controller import PyDuotecno
+from duotecno.simulator import FakeGateway
+
+from .conftest import FAST, PASSWORD
+
+
+def test_tuned_heartbeat_timeout_floor() -> None:
+    assert Config().tuned(0.001, 1000.0, 2, 10).heartbeat_timeout == 20.0
+    assert Config().tuned(2.0, 10.0, 2, 10).heartbeat_timeout == 60.0
+
+
+def test_with_tuning_keeps_other_settings() -> None:
+    tuned = Config().tuned(0.01, 100.0, 2, 10).to_dict()
+    tuned.update(rx_maxsize=5, read_size=10)
+    config = Config(rx_maxsize=50, poll_budget=1.0).with_tuning(tuned)
+    assert (config.rx_maxsize, config.read_size) == (50, 4096)
+    assert (config.rtt, config.poll_budget) == (0.01, tuned["poll_budget"])
+
+
+async def test_cache_merges_the_tuning(gateway: FakeGateway, tmp_path: Path) -> None:
+    cache = str(tmp_path / "cache.json")
+    ctrl = PyDuotecno(replace(FAST, auto_tune=True))
+    await ctrl.connect("127.0.0.1", gateway.port, PASSWORD, cache=cache)
+    rtt = ctrl.config.rtt
+    await ctrl.disconnect()
+    ctrl = PyDuotecno(replace(FAST, auto_tune=True, rx_maxsize=50))
+    await ctrl.connect("127.0.0.1", gateway.port, PASSWORD, cache=cache)
+    assert (ctrl.config.rtt, ctrl.config.rx_maxsize) == (rtt, 50)
+    await ctrl.disconnect()
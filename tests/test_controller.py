@@ -0,0 +1,99 @@
+"""The controller: send path, waiters and discovery."""
+
+from __future__ import annotations
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from duotecno.controller import PyDuotecno
+from duotecno.recorder import TX, read_capture
+from duotecno.simulator import FakeGateway
+from duotecno.unit import DimUnit, DuoswitchUnit, SwitchUnit
+
+
+async def test_burst_keeps_the_inflight_window(
+    controller: PyDuotecno, gateway: FakeGateway, tmp_path: Path
+) -> None:
+    await asyncio.sleep(0.1)
+    window = controller.sendSema._value
+    path = str(tmp_path / "capture.bin")
+    controller.start_recording(path)
+    units = [
+        u
+        for u in controller.topology.by_type("DuoswitchUnit")
+        if isinstance(u, DuoswitchUnit)
+    ]
+    sent = len(gateway.received)
+    await controller.move_duoswitches(units, "stop")
+    await controller.flush()
+    await asyncio.sleep(0.1)
+    assert len(gateway.received) - sent == len(units) > 1
+    # every frame got a reply, and took its place in the window
+    assert controller.sendSema._value == window
+    controller.stop_recording()
+    frames = [frame for _ts, way, frame in read_capture(path) if way == TX]
+    assert len(frames) == len(units)
+
+
+async def test_waiting_does_not_hold_other_frames(
+    controller: PyDuotecno, gateway: FakeGateway
+) -> None:
+    controller.heartbeatReceived.clear()
+    with pytest.raises(asyncio.TimeoutError):
+        # the heartbeat reply arrives while the wait is on, and after it
+        await asyncio.wait_for(controller.waitForPacket("64,9"), 0.2)
+    assert controller._waiters == {}
+    await gateway.push([72, 1])
+    await asyncio.sleep(0.1)
+    assert controller.heartbeatReceived.is_set()
+
+
+async def test_reset_reloads_changed_units(
+    controller: PyDuotecno, gateway: FakeGateway
+) -> None:
+    node = controller.nodes[1]
+    kept = node.units[1]
+    gateway.nodes[0].units[0].name = "renamed"
+    await gateway.reset_node(1)
+    for _ in range(50):
+        await asyncio.sleep(0.02)
+        if node.units[0].get_name() == "renamed":
+            break
+    assert node.units[0].get_name() == "renamed"
+    assert controller.topology.search("renamed") == [node.units[0]]
+    assert node.units[1] is kept
+
+
+async def _two_pending(
+    controller: PyDuotecno, gateway: FakeGateway, monkeypatch: pytest.MonkeyPatch
+) -> tuple[SwitchUnit, DimUnit]:
+    # commands without an answer stay pending
+    monkeypatch.setattr(gateway, "handle", lambda data: [])
+    switch, dimmer = controller.nodes[1].units[0], controller.nodes[1].units[1]
+    assert isinstance(switch, SwitchUnit) and isinstance(dimmer, DimUnit)
+    await switch.turn_on()
+    await asyncio.sleep(0.01)
+    await dimmer.set_dimmer_state(40)
+    await controller.flush()
+    return switch, dimmer
+
+
+async def test_message_error_goes_to_the_unit(
+    controller: PyDuotecno, gateway: FakeGateway, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    switch, dimmer = await _two_pending(controller, gateway, monkeypatch)
+    errors = controller.nodes[1].health.errors
+    await gateway.push([17, 0, 1, 1, 40])
+    await asyncio.sleep(0.1)
+    assert controller.nodes[1].health.errors == errors + 1
+    assert switch.is_pending() and not dimmer.is_pending()
+
+
+async def test_message_error_without_unit_fails_the_oldest(
+    controller: PyDuotecno, gateway: FakeGateway, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    switch, dimmer = await _two_pending(controller, gateway, monkeypatch)
+    await gateway.push([17, 0, 1])
+    await asyncio.sleep(0.1)
+    assert not switch.is_pending() and dimmer.is_pending()
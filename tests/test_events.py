@@ -0,0 +1,57 @@
+"""Event streams and their filters."""
+
+from __future__ import annotations
+import asyncio
+
+from duotecno.controller import PyDuotecno
+from duotecno.events import Event, HeartbeatEvent, RawPacketEvent, UnitStateEvent
+from duotecno.protocol import MsgType
+from duotecno.simulator import FakeGateway
+
+
+async def test_msg_types_filter_passes_state_events(
+    controller: PyDuotecno, gateway: FakeGateway
+) -> None:
+    stream = controller.events(
+        types=[UnitStateEvent], msg_types=[MsgType.EV_UNITSWITCHSTATUS]
+    )
+    node = gateway.nodes[0]
+    node.units[0].state = 1
+    await gateway.push(gateway.status(node, 0))
+    event = await asyncio.wait_for(stream.__anext__(), 2)
+    assert isinstance(event, UnitStateEvent)
+    assert event.msgType is MsgType.EV_UNITSWITCHSTATUS
+    assert (event.address, event.unit, event.changes) == (1, 0, {"state": 1})
+    stream.close()
+
+
+async def test_msg_types_filter_drops_other_messages(
+    controller: PyDuotecno, gateway: FakeGateway
+) -> None:
+    stream = controller.events(
+        types=[UnitStateEvent], msg_types=[MsgType.EV_UNITDIMSTATUS]
+    )
+    node = gateway.nodes[0]
+    node.units[0].state = 1
+    await gateway.push(gateway.status(node, 0))
+    # the dimmer change comes after the switch change
+    node.units[1].value = 40
+    await gateway.push(gateway.status(node, 1))
+    event = await asyncio.wait_for(stream.__anext__(), 2)
+    assert event.msgType is MsgType.EV_UNITDIMSTATUS
+    assert event.unit == 1
+    stream.close()
+
+
+async def test_event_listeners_see_every_event(
+    controller: PyDuotecno, gateway: FakeGateway
+) -> None:
+    seen: list[Event] = []
+    controller.eventListeners.append(seen.append)
+    await gateway.push([72, 1])
+    node = gateway.nodes[0]
+    node.units[0].state = 1
+    await gateway.push(gateway.status(node, 0))
+    await asyncio.sleep(0.1)
+    kinds = {type(event) for event in seen}
+    assert {HeartbeatEvent, RawPacketEvent, UnitStateEvent} <= kinds
@@ -0,0 +1,76 @@
+"""The incremental frame decoder."""
+
+from __future__ import annotations
+import random
+
+import pytest
+
+from duotecno.framing import FrameDecoder
+
+NOISE = b"\x00\r\n \xff\x7fabc,;"
+
+
+def test_frames_split_over_chunks() -> None:
+    dec = FrameDecoder()
+    assert dec.feed(b"[72,1]\r\n[64,") == ["72,1"]
+    assert dec.feed(b"0,2]") == ["64,0,2"]
+    assert dec.stats()["frames"] == 2
+
+
+def test_garbage_and_nul_are_skipped() -> None:
+    dec = FrameDecoder()
+    assert dec.feed(b"ab\r\n[72\x00,1]c") == ["72,1"]
+    assert dec.feed(b"[]") == []
+    assert (dec.garbage, dec.empty, dec.stats()["buffered"]) == (3, 1, 0)
+
+
+def test_restarted_frame_is_dropped() -> None:
+    dec = FrameDecoder()
+    assert dec.feed(b"[64,1[72,1]") == ["72,1"]
+    assert dec.truncated == 1
+
+
+def test_overlong_frame_is_dropped() -> None:
+    dec = FrameDecoder(max_length=20)
+    assert dec.feed(b"[" + b"1," * 30) == []
+    assert len(dec._buf) <= dec.max_length + 1
+    assert dec.feed(b"1][72,1]") == ["72,1"]
+    assert dec.overflows == 1
+
+
+def _frame(rnd: random.Random) -> str:
+    return ",".join(str(rnd.randrange(256)) for _i in range(rnd.randrange(1, 40)))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_noisy_stream(seed: int) -> None:
+    """Random chunks of a stream with garbage, cut off and overlong frames."""
+    rnd = random.Random(seed)
+    for _round in range(200):
+        dec = FrameDecoder(max_length=200)
+        stream = bytearray()
+        sent = []
+        for _i in range(rnd.randrange(1, 30)):
+            kind = rnd.random()
+            if kind < 0.1:
+                stream += bytes(rnd.choice(NOISE) for _j in range(rnd.randrange(20)))
+            elif kind < 0.15:
+                stream += b"[" + _frame(rnd).encode()[: rnd.randrange(5)]
+            elif kind < 0.2:
+                stream += b"[" + b"1," * 300 + b"1]"
+            else:
+                f = _frame(rnd)
+                sent.append(f)
+                raw = f"[{f}]\r\n".encode()
+                if rnd.random() < 0.2:
+                    pos = rnd.randrange(len(raw))
+                    raw = raw[:pos] + b"\x00" + raw[pos:]
+                stream += raw
+        got = []
+        pos = 0
+        while pos < len(stream):
+            size = rnd.randrange(1, 64)
+            got += dec.feed(bytes(stream[pos : pos + size]))
+            pos += size
+            assert len(dec._buf) <= dec.max_length + 1
+        assert got == sent
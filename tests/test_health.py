@@ -0,0 +1,56 @@
+"""Probing of quiet nodes."""
+
+from __future__ import annotations
+import asyncio
+
+from duotecno.controller import PyDuotecno
+from duotecno.node import Node
+from duotecno.simulator import FakeGateway
+
+
+def _only_sensunits(controller: PyDuotecno) -> Node:
+    node = controller.nodes[1]
+    for number, unit in list(node.units.items()):
+        if type(unit).__name__ != "SensUnit":
+            del node.units[number]
+    return node
+
+
+async def test_node_of_sensunits_is_not_probed(
+    controller: PyDuotecno, gateway: FakeGateway
+) -> None:
+    monitor = controller.start_health_monitor(interval=3600, silent_after=0.0)
+    node = _only_sensunits(controller)
+    sent = len(gateway.received)
+    await monitor.probe(node)
+    await controller.flush()
+    await asyncio.sleep(0.1)
+    assert gateway.received[sent:] == []
+    # nothing was asked, so no answer is missing either
+    node.health.lastSeen = 1.0
+    await monitor.check()
+    assert not node.health.silent
+
+
+async def test_sensunits_can_be_probed(
+    controller: PyDuotecno, gateway: FakeGateway
+) -> None:
+    monitor = controller.start_health_monitor(interval=3600, skip=())
+    node = _only_sensunits(controller)
+    sent = len(gateway.received)
+    await monitor.probe(node)
+    await controller.flush()
+    await asyncio.sleep(0.1)
+    assert gateway.received[sent:] == ["[209,3,1,3,4]"]
+
+
+async def test_probe_skips_unit_classes(
+    controller: PyDuotecno, gateway: FakeGateway
+) -> None:
+    monitor = controller.start_health_monitor(interval=3600, skip=["SwitchUnit"])
+    sent = len(gateway.received)
+    await monitor.probe(controller.nodes[1])
+    await controller.flush()
+    await asyncio.sleep(0.1)
+    # unit 0 is a switch, unit 1 (a dimmer) is the first that may be probed
+    assert gateway.received[sent:] == ["[209,3,1,1,1]"]
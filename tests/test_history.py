@@ -0,0 +1,51 @@
+"""The history store, in memory and on file."""
+
+from __future__ import annotations
+from pathlib import Path
+
+from duotecno.events import UnitStateEvent
+from duotecno.history import HistoryStore
+
+
+def _event(ts: float, unit: int, value: float) -> UnitStateEvent:
+    return UnitStateEvent("u", {"value": value}, address=1, unit=unit, timestamp=ts)
+
+
+def test_query_reads_older_samples_from_file(tmp_path: Path) -> None:
+    path = str(tmp_path / "history.bin")
+    store = HistoryStore(capacity=4, path=path)
+    for i in range(20):
+        store.record(_event(1000.0 + i, i % 2, float(i)))
+    even = [(1000.0 + i, float(i)) for i in range(0, 20, 2)]
+    assert store.query(1, 0, "value") == even
+    assert store.query(1, 0, "value", start=1004, end=1011) == even[2:6]
+    # samples recorded after the index was built
+    store.record(_event(1020.0, 0, 20.0))
+    store.record(_event(1021.0, 1, 21.0))
+    assert store.query(1, 0, "value")[-1] == (1020.0, 20.0)
+    store.close()
+
+
+def test_file_survives_a_restart(tmp_path: Path) -> None:
+    path = str(tmp_path / "history.bin")
+    store = HistoryStore(capacity=2, path=path)
+    for i in range(10):
+        store.record(_event(1000.0 + i, 0, float(i)))
+    store.close()
+    store = HistoryStore(capacity=2, path=path)
+    store.record(_event(1010.0, 0, 10.0))
+    assert store.query(1, 0, "value") == [(1000.0 + i, float(i)) for i in range(11)]
+    assert store.query(1, 1, "value") == []
+    store.close()
+
+
+def test_writes_are_batched(tmp_path: Path) -> None:
+    path = tmp_path / "history.bin"
+    store = HistoryStore(capacity=2, path=str(path))
+    store.record(_event(1000.0, 0, 1.0))
+    store.record(_event(1001.0, 0, 2.0))
+    # the first record is within the flush interval of the creation
+    assert path.stat().st_size == 0
+    store.flush()
+    assert path.stat().st_size > 0
+    store.close()
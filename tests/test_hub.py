@@ -0,0 +1,112 @@
+"""The hub, between local clients and a simulated gateway."""
+
+from __future__ import annotations
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+
+from duotecno import hub
+from duotecno.controller import PyDuotecno
+from duotecno.hub import DuotecnoHub
+from duotecno.simulator import FakeGateway
+
+from .conftest import FAST, PASSWORD
+
+# a sensunit, its status is not requested at connect
+SENS = "209,3,1,3,4"
+
+Client = tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+@pytest.fixture
+async def running_hub(controller: PyDuotecno) -> AsyncIterator[DuotecnoHub]:
+    h = DuotecnoHub(controller)
+    await h.start()
+    yield h
+    await h.stop()
+
+
+async def _login(port: int) -> Client:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    passw = ",".join(str(ord(c)) for c in PASSWORD)
+    writer.write(f"[214,3,{len(PASSWORD)},{passw}]\n".encode())
+    assert await reader.readline() == b"[67,3,1]\r\n"
+    return reader, writer
+
+
+async def _request(client: Client, frame: str) -> None:
+    client[1].write(f"[{frame}]\n".encode())
+    await client[1].drain()
+
+
+async def _read_all(reader: asyncio.StreamReader) -> None:
+    while await reader.readline():
+        pass
+
+
+async def test_client_discovers_through_the_hub(
+    running_hub: DuotecnoHub, gateway: FakeGateway
+) -> None:
+    sent = len(gateway.received)
+    client = PyDuotecno(FAST)
+    await client.connect("127.0.0.1", running_hub.port, PASSWORD)
+    assert len(client.topology) == len(running_hub.controller.topology)
+    # the database came from the hub, not from the gateway
+    assert not any(f.startswith("[209,2,") for f in gateway.received[sent:])
+    await client.disconnect()
+
+
+async def test_status_requests_are_shared(
+    running_hub: DuotecnoHub, gateway: FakeGateway
+) -> None:
+    first = await _login(running_hub.port)
+    second = await _login(running_hub.port)
+    await _request(first, SENS)
+    await _request(second, SENS)
+    line = await asyncio.wait_for(second[0].readline(), 2)
+    assert line.startswith(b"[7,0,1,3,")
+    assert gateway.received.count(f"[{SENS}]") == 1
+    for _reader, writer in (first, second):
+        writer.close()
+
+
+async def test_unanswered_status_request_expires(
+    running_hub: DuotecnoHub,
+    gateway: FakeGateway,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(hub, "PENDING_TTL", 0.1)
+    handle = gateway.handle
+    # the gateway loses the request
+    monkeypatch.setattr(
+        gateway, "handle", lambda data: [] if data[:2] == [209, 3] else handle(data)
+    )
+    client = await _login(running_hub.port)
+    await _request(client, SENS)
+    await _request(client, SENS)
+    await asyncio.sleep(0.2)
+    await _request(client, SENS)
+    await asyncio.sleep(0.1)
+    assert gateway.received.count(f"[{SENS}]") == 2
+    client[1].close()
+
+
+async def test_slow_client_is_dropped(
+    running_hub: DuotecnoHub, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(hub, "DRAIN_TIMEOUT", 0.1)
+    slow = await _login(running_hub.port)
+    fast = await _login(running_hub.port)
+    reading = asyncio.create_task(_read_all(fast[0]))
+    frame = "7,0,1,3," + ",".join(["255"] * 500)
+    # the slow client never reads, until the socket buffers are full
+    for _i in range(10000):
+        running_hub._upstream(frame)
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.2)
+    assert len(running_hub._clients) == 1
+    assert not running_hub._draining
+    for _reader, writer in (slow, fast):
+        writer.close()
+    await reading
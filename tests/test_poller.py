@@ -0,0 +1,46 @@
+"""The status poller."""
+
+from __future__ import annotations
+import asyncio
+
+import pytest
+
+from duotecno import poller
+from duotecno.controller import PyDuotecno
+from duotecno.simulator import FakeGateway
+
+from .conftest import FAST, PASSWORD
+
+
+def _polls(gateway: FakeGateway, unitType: int) -> int:
+    return sum(
+        1
+        for frame in gateway.received
+        if frame.startswith("[209,3,") and frame.endswith(f",{unitType}]")
+    )
+
+
+async def test_sensunits_are_not_polled_by_default(
+    controller: PyDuotecno, gateway: FakeGateway
+) -> None:
+    before = _polls(gateway, 4), _polls(gateway, 2)
+    controller.start_polling({"SwitchUnit": 0.05}, budget=100)
+    await asyncio.sleep(0.3)
+    controller.stop_polling()
+    assert _polls(gateway, 4) == before[0]
+    assert _polls(gateway, 2) > before[1]
+
+
+async def test_units_discovered_later_are_polled(
+    gateway: FakeGateway, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(poller, "RESYNC", 0.05)
+    ctrl = PyDuotecno(FAST)
+    # started before there is anything to poll
+    ctrl.start_polling({"SwitchUnit": 0.05}, budget=100)
+    await ctrl.connect("127.0.0.1", gateway.port, PASSWORD)
+    before = _polls(gateway, 2)
+    await asyncio.sleep(0.3)
+    ctrl.stop_polling()
+    assert _polls(gateway, 2) > before
+    await ctrl.disconnect()
@@ -0,0 +1,82 @@
+"""Decoding and encoding of the bus messages."""
+
+from __future__ import annotations
+import logging
+import random
+import subprocess
+import sys
+from collections import deque
+from pathlib import Path
+
+import pytest
+
+import duotecno.protocol_ext  # noqa: F401
+from duotecno.protocol import DECODERS, EV_UNITSENSSTATUS_1, BaseMessage, Packet
+
+MAX_LEN = 48
+SENS_FRAME = "7,1,1,2,4,0,1,1,0,0,200,0,210,0,200,0,160,0,180,0,5,0,20,1,2,0"
+
+
+@pytest.fixture(autouse=True)
+def _quiet(caplog: pytest.LogCaptureFixture) -> None:
+    # short and overlong payloads are logged, that is expected here
+    caplog.set_level(logging.ERROR, "pyduotecno-protocol")
+
+
+def _payloads(rnd: random.Random, size: int) -> list[list[int]]:
+    res = [[rnd.randrange(256) for _i in range(size)] for _j in range(20)]
+    # names are length prefixed, also try every possible length byte
+    for pos in range(min(size, 8)):
+        data = [rnd.randrange(256) for _i in range(size)]
+        data[pos] = max(0, size - pos - 4)
+        res.append(data)
+    return res
+
+
+@pytest.mark.parametrize(
+    "key, cls", sorted(DECODERS.items()), ids=lambda v: getattr(v, "__name__", "")
+)
+def test_round_trip(key: tuple[int, int], cls: type[BaseMessage]) -> None:
+    """Payloads that decode completely encode back to the same bytes."""
+    cmd, method = key
+    rnd = random.Random(cmd * 256 + method)
+    decoded = 0
+    for size in range(MAX_LEN):
+        for data in _payloads(rnd, size):
+            pc = Packet(cmd, method, deque(data))
+            if pc.cls is None or pc.data:
+                continue
+            decoded += 1
+            assert type(pc.cls) is cls
+            assert pc.cls.encode() == data
+            assert pc.cls.encode_frame() == ",".join(map(str, (cmd, method, *data)))
+            pc.cls.to_json()
+    assert decoded, f"{cls.__name__} never decoded"
+
+
+def test_sens_status() -> None:
+    cmd, method, *data = map(int, SENS_FRAME.split(","))
+    pc = Packet(cmd, method, deque(data))
+    assert isinstance(pc.cls, EV_UNITSENSSTATUS_1)
+    assert not pc.data
+    assert pc.cls.encode_frame() == SENS_FRAME
+
+
+def test_short_payload_is_refused() -> None:
+    pc = Packet(7, 1, deque([1, 2]))
+    assert pc.cls is None
+
+
+def test_controller_does_not_load_the_ext_decoders() -> None:
+    code = (
+        "import sys, duotecno.controller;"
+        "print('duotecno.protocol_ext' in sys.modules)"
+    )
+    res = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parents[1],
+    )
+    assert res.stdout.strip() == "False"
@@ -0,0 +1,80 @@
+"""Recording the traffic to a capture file and replaying it."""
+
+from __future__ import annotations
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+from duotecno.controller import PyDuotecno
+from duotecno.recorder import RX, TX, TrafficRecorder, read_capture, replay
+from duotecno.simulator import FakeGateway
+from duotecno.unit import DimUnit, SwitchUnit
+
+from .conftest import FAST
+
+
+async def _record(controller: PyDuotecno, gateway: FakeGateway, path: str) -> None:
+    controller.start_recording(path)
+    node = gateway.nodes[0]
+    node.units[0].state = 1
+    await gateway.push(gateway.status(node, 0))
+    dimmer = controller.nodes[1].units[1]
+    assert isinstance(dimmer, DimUnit)
+    await dimmer.set_dimmer_state(40)
+    await controller.flush()
+    await asyncio.sleep(0.1)
+    controller.stop_recording()
+
+
+async def test_capture_round_trip(
+    controller: PyDuotecno, gateway: FakeGateway, tmp_path: Path
+) -> None:
+    path = str(tmp_path / "bus.cap")
+    await _record(controller, gateway, path)
+    frames = [(way, frame) for _ts, way, frame in read_capture(path)]
+    assert (RX, "6,0,1,0,2,0,1") in frames
+    # the sent frames are stored without the brackets
+    assert (TX, "162,3,1,1,40") in frames
+
+
+async def test_replay_updates_the_units(
+    controller: PyDuotecno, gateway: FakeGateway, tmp_path: Path
+) -> None:
+    path = str(tmp_path / "bus.cap")
+    await _record(controller, gateway, path)
+    switch = controller.nodes[1].units[0]
+    assert isinstance(switch, SwitchUnit)
+    switch._state = 0
+    received = sum(way == RX for _ts, way, _frame in read_capture(path))
+    # a controller without a connection, that knows the same units
+    offline = PyDuotecno(FAST)
+    offline.nodes = controller.nodes
+    stats = await replay(offline, path)
+    # only the received frames are replayed
+    assert (stats.packets, stats.errors) == (received, 0)
+    assert switch.is_on()
+
+
+def test_not_a_capture_file(tmp_path: Path) -> None:
+    path = tmp_path / "other.cap"
+    path.write_bytes(b"[6,0,1,0,2,0,1]\n")
+    with pytest.raises(ValueError):
+        list(read_capture(str(path)))
+
+
+def test_rotation_keeps_backups(tmp_path: Path) -> None:
+    path = str(tmp_path / "bus.cap")
+    recorder = TrafficRecorder(path, max_bytes=64, backup_count=2)
+    for i in range(20):
+        recorder.rx(f"6,0,1,{i},2,0,1".encode())
+    recorder.close()
+    assert os.path.exists(f"{path}.1")
+    assert os.path.exists(f"{path}.2")
+    assert not os.path.exists(f"{path}.3")
+    # every file is a valid capture on its own
+    for name in (path, f"{path}.1", f"{path}.2"):
+        for _ts, way, frame in read_capture(name):
+            assert way == RX
+            assert frame.startswith("6,0,1,")
@@ -0,0 +1,69 @@
+"""Automation rules."""
+
+from __future__ import annotations
+import asyncio
+from typing import Any
+
+from duotecno.controller import PyDuotecno
+from duotecno.rules import ANY, Rule
+from duotecno.simulator import FakeGateway
+from duotecno.unit import SwitchUnit
+
+
+async def _noop(value: Any) -> None:
+    pass
+
+
+def test_rule_matches() -> None:
+    assert Rule(1, 0, "state", _noop).matches(5)
+    assert Rule(1, 0, "state", _noop, value=1).matches(1)
+    assert not Rule(1, 0, "state", _noop, value=1).matches(0)
+    above = Rule(1, 1, "value", _noop, ANY, lambda v: v > 50)
+    assert above.matches(60) and not above.matches(40)
+
+
+async def _set_switch(gateway: FakeGateway, unit: int, state: int) -> None:
+    node = gateway.nodes[0]
+    node.units[unit].state = state
+    await gateway.push(gateway.status(node, unit))
+    await asyncio.sleep(0.1)
+
+
+async def test_rule_fires_on_its_value(
+    controller: PyDuotecno, gateway: FakeGateway
+) -> None:
+    rules = controller.enable_rules()
+    switch = controller.nodes[1].units[0]
+    seen: list[Any] = []
+
+    @rules.when(switch, "state", 1)
+    async def _on(value: Any) -> None:
+        seen.append(value)
+
+    await _set_switch(gateway, 0, 1)
+    await _set_switch(gateway, 0, 0)
+    assert seen == [1]
+    assert [rule.fired for rule in rules.get_rules()] == [1]
+    assert rules.latency
+    rules.remove(rules.get_rules()[0])
+    await _set_switch(gateway, 0, 1)
+    assert seen == [1] and not rules.get_rules()
+
+
+async def test_rule_does_not_trigger_itself(
+    controller: PyDuotecno, gateway: FakeGateway
+) -> None:
+    rules = controller.enable_rules()
+    switch = controller.nodes[1].units[0]
+    assert isinstance(switch, SwitchUnit)
+
+    # every change of the switch turns it on (again), its confirmation
+    # must not fire the rule once more
+    @rules.when(switch, "state")
+    async def _keep_on(value: Any) -> None:
+        await switch.turn_on()
+
+    await _set_switch(gateway, 0, 1)
+    await asyncio.sleep(0.2)
+    assert rules.get_rules()[0].fired == 1
+    assert not switch.is_pending()
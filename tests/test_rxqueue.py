@@ -0,0 +1,83 @@
+"""The receive queue between the reader and the handler task."""
+
+from __future__ import annotations
+import asyncio
+from collections import deque
+
+import pytest
+
+from duotecno.protocol import Packet
+from duotecno.rxqueue import ReceiveQueue
+
+
+def _packet(frame: str) -> Packet:
+    cmd, method, *data = map(int, frame.split(","))
+    return Packet(cmd, method, deque(data))
+
+
+def _switch(unit: int, state: int) -> Packet:
+    return _packet(f"6,0,1,{unit},2,0,{state}")
+
+
+async def _drain(queue: ReceiveQueue) -> list[Packet]:
+    return [await queue.get() for _i in range(len(queue))]
+
+
+async def test_heartbeat_skips_the_line() -> None:
+    queue = ReceiveQueue()
+    first = _switch(0, 1)
+    await queue.put(first)
+    heartbeat = _packet("72,1")
+    await queue.put(heartbeat)
+    assert await _drain(queue) == [heartbeat, first]
+
+
+async def test_status_is_coalesced_under_pressure() -> None:
+    queue = ReceiveQueue(maxsize=10, coalesce_at=2)
+    packets = [_switch(0, 1), _switch(1, 1), _switch(0, 0), _switch(0, 1)]
+    for packet in packets:
+        await queue.put(packet)
+    # the last status of unit 0 took the place of the first one
+    assert await _drain(queue) == [packets[3], packets[1]]
+    assert queue.coalesced == 2
+
+
+async def test_no_coalescing_below_the_threshold() -> None:
+    queue = ReceiveQueue(maxsize=10, coalesce_at=5)
+    packets = [_switch(0, 1), _switch(0, 0)]
+    for packet in packets:
+        await queue.put(packet)
+    assert await _drain(queue) == packets
+    assert queue.coalesced == 0
+
+
+async def test_put_blocks_when_full() -> None:
+    queue = ReceiveQueue(maxsize=2, coalesce_at=10)
+    await queue.put(_switch(0, 1))
+    await queue.put(_switch(1, 1))
+    put = asyncio.create_task(queue.put(_switch(2, 1)))
+    await asyncio.sleep(0.01)
+    assert not put.done() and queue.blocked == 1
+    await queue.get()
+    await asyncio.wait_for(put, 1)
+    assert len(queue) == 2 and queue.peak == 2
+
+
+async def test_get_waits_for_a_packet() -> None:
+    queue = ReceiveQueue()
+    get = asyncio.create_task(queue.get())
+    await asyncio.sleep(0.01)
+    assert not get.done()
+    packet = _switch(0, 1)
+    await queue.put(packet)
+    assert await asyncio.wait_for(get, 1) is packet
+
+
+@pytest.mark.parametrize("maxsize", [1, 4])
+async def test_clear(maxsize: int) -> None:
+    queue = ReceiveQueue(maxsize=maxsize)
+    for unit in range(maxsize):
+        await queue.put(_switch(unit, 1))
+    queue.clear()
+    assert len(queue) == 0
+    await asyncio.wait_for(queue.put(_switch(0, 1)), 1)
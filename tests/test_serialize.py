@@ -0,0 +1,88 @@
+"""The schema based serializer and the msgpack encoding."""
+
+from __future__ import annotations
+import json
+from collections import deque
+from typing import Any
+
+import pytest
+
+from duotecno.controller import PyDuotecno
+from duotecno.protocol import MsgType, Packet
+from duotecno.serialize import packb, unpackb
+
+VALUES: list[Any] = [
+    None,
+    True,
+    False,
+    0,
+    127,
+    128,
+    -1,
+    -32,
+    -33,
+    1 << 40,
+    -(1 << 63),
+    0.5,
+    -1e300,
+    "",
+    "é" * 15,
+    "x" * 31,
+    "x" * 255,
+    "x" * 300,
+    "x" * 70000,
+    b"",
+    b"\x00\xff" * 200,
+    list(range(15)),
+    list(range(16)),
+    list(range(70000)),
+    {str(i): i for i in range(15)},
+    {str(i): i for i in range(16)},
+    {"a": [1, {"b": None}], "c": {"d": [True, 1.5]}},
+]
+
+
+@pytest.mark.parametrize("value", VALUES, ids=lambda v: type(v).__name__)
+def test_round_trip(value: Any) -> None:
+    assert unpackb(packb(value)) == value
+
+
+def test_tuples_and_enums() -> None:
+    assert unpackb(packb((1, MsgType.EV_HEARTBEATSTATUS))) == [1, "EV_HEARTBEATSTATUS"]
+
+
+def test_known_encoding() -> None:
+    # the same bytes as msgpack.packb
+    assert packb({"a": [1, -1, None]}) == b"\x81\xa1a\x93\x01\xff\xc0"
+
+
+def test_errors() -> None:
+    with pytest.raises(TypeError):
+        packb(object())
+    with pytest.raises(ValueError):
+        packb(1 << 64)
+    with pytest.raises(ValueError):
+        unpackb(packb(1) + b"\x00")
+
+
+def test_message_to_dict() -> None:
+    pc = Packet(6, 0, deque([1, 0, 2, 0, 1]))
+    assert pc.cls is not None
+    # the private config byte is not part of it
+    assert pc.cls.to_json_basic() == {
+        "name": "EV_UNITSWITCHSTATUS_0",
+        "address": 1,
+        "unit": 0,
+        "unitType": 2,
+        "state": 1,
+        "stateName": "ON",
+    }
+
+
+async def test_snapshot_formats(controller: PyDuotecno) -> None:
+    units = json.loads(controller.snapshot())
+    assert len(units) == 10
+    assert units[0]["address"] == 1 and units[0]["unit"] == 0
+    assert unpackb(controller.snapshot("msgpack")) == units
+    with pytest.raises(ValueError):
+        controller.snapshot("xml")
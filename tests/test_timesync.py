@@ -0,0 +1,25 @@
+"""Gateway clock tracking."""
+
+from __future__ import annotations
+from dataclasses import replace
+
+from duotecno.controller import PyDuotecno
+from duotecno.simulator import FakeGateway
+
+from .conftest import FAST, PASSWORD
+
+
+async def test_queue_delay_is_not_part_of_the_rtt(gateway: FakeGateway) -> None:
+    ctrl = PyDuotecno(replace(FAST, frame_delay=0.02))
+    await ctrl.connect("127.0.0.1", gateway.port, PASSWORD)
+    gateway.clockOffset = 30.0
+    sync = ctrl.start_timesync(interval=3600)
+    sync.stop()
+    # 20 frames (0.4 s) in the send queue before the time request
+    for _i in range(20):
+        await ctrl.write("[215,1]")
+    skew = await sync.measure(samples=1)
+    assert sync.rtt is not None and sync.rtt < 0.1
+    assert abs(skew - 30.0) <= 1.0
+    ctrl.stop_timesync()
+    await ctrl.disconnect()
@@ -0,0 +1,58 @@
+"""The unit index of an installation."""
+
+from __future__ import annotations
+import asyncio
+
+from duotecno.controller import PyDuotecno
+from duotecno.simulator import FakeGateway
+
+
+async def test_lookups(controller: PyDuotecno) -> None:
+    topo = controller.topology
+    node = controller.nodes[2]
+    assert len(topo) == 10
+    assert topo.by_node(2) == node.get_units()
+    for unit in node.get_units():
+        assert topo.get(topo.uid(unit)) is unit
+    dimmers = topo.by_type("DimUnit")
+    assert [u.get_node_address() for u in dimmers] == [1, 2]
+    assert topo.by_type(["DimUnit", "SwitchUnit"]) == sorted(
+        dimmers + topo.by_type("SwitchUnit"), key=topo.uid
+    )
+    assert topo.count("DimUnit", 2) == 1 and topo.count(address=1) == 5
+    assert topo.summary()["types"]["DimUnit"] == 2
+
+
+async def test_search_by_name(controller: PyDuotecno) -> None:
+    topo = controller.topology
+    # whole names and the words in them, case insensitive
+    assert topo.search("UNIT 1.") == controller.nodes[2].get_units()
+    assert topo.search("1.2") == [controller.nodes[2].units[2]]
+    assert topo.search("nothing") == []
+
+
+async def test_fuzzy_name(controller: PyDuotecno) -> None:
+    topo = controller.topology
+    assert topo.fuzzy("unt 1.2")[0] is controller.nodes[2].units[2]
+    assert topo.fuzzy("zzz") == []
+
+
+async def test_reload_updates_the_index(
+    controller: PyDuotecno, gateway: FakeGateway
+) -> None:
+    topo = controller.topology
+    old = controller.nodes[1].units[0]
+    uid, version = topo.uid(old), topo.version
+    gateway.nodes[0].units[0].name = "kitchen light"
+    await gateway.reset_node(1)
+    for _ in range(50):
+        await asyncio.sleep(0.02)
+        if topo.search("kitchen"):
+            break
+    new = controller.nodes[1].units[0]
+    assert topo.search("kitchen") == [new] and new is not old
+    assert topo.search("0.0") == []
+    # same id and counts, a newer version
+    assert topo.uid(new) == uid and topo.get(uid) is new
+    assert len(topo) == 10 and topo.count("SwitchUnit") == 2
+    assert topo.version > version
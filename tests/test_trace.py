@@ -0,0 +1,47 @@
+"""The RX/TX/WX packet trace."""
+
+from __future__ import annotations
+import asyncio
+
+from duotecno.controller import PyDuotecno
+from duotecno.simulator import FakeGateway
+from duotecno.trace import HotTrace
+
+
+def test_ring_buffer() -> None:
+    trace = HotTrace(size=3)
+    for i in range(5):
+        trace.record("RX", i)
+    assert len(trace) == 3
+    lines = trace.dump()
+    assert [line.split(" ", 1)[1] for line in lines] == ["RX: 2", "RX: 3", "RX: 4"]
+    trace.clear()
+    assert len(trace) == 0 and trace.dump() == []
+
+
+def test_resize_keeps_the_newest() -> None:
+    trace = HotTrace(size=5)
+    for i in range(5):
+        trace.record("TX", i)
+    trace.enable(size=2)
+    assert trace.enabled
+    assert [line.split(" ", 1)[1] for line in trace.dump()] == ["TX: 3", "TX: 4"]
+
+
+async def test_controller_traces_only_when_enabled(
+    controller: PyDuotecno, gateway: FakeGateway
+) -> None:
+    node = gateway.nodes[0]
+    await gateway.push(gateway.status(node, 0))
+    await asyncio.sleep(0.1)
+    assert len(controller.trace) == 0
+    controller.trace.enable()
+    node.units[0].state = 1
+    await gateway.push(gateway.status(node, 0))
+    await asyncio.sleep(0.1)
+    controller.trace.disable()
+    tags = [line.split(" ")[1] for line in controller.trace.dump()]
+    assert tags == ["RX:", "WX:"]
+    await gateway.push(gateway.status(node, 0))
+    await asyncio.sleep(0.1)
+    assert len(controller.trace) == 2
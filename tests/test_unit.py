@@ -0,0 +1,65 @@
+"""Unit state, commands and status requests."""
+
+from __future__ import annotations
+import asyncio
+
+import pytest
+
+import duotecno.unit as unit_module
+from duotecno.controller import PyDuotecno
+from duotecno.events import UnitStateEvent
+from duotecno.simulator import FakeGateway
+from duotecno.unit import SwitchUnit
+
+SENS_STATUS = "[209,3,1,3,4]"
+
+
+@pytest.mark.parametrize("event, due", [(11, True), (14, True), (5, False)])
+async def test_sens_macro_event_without_value(
+    controller: PyDuotecno, gateway: FakeGateway, event: int, due: bool
+) -> None:
+    before = gateway.received.count(SENS_STATUS)
+    await gateway.push([69, 0, 1, 3, event, 1, 0, 0])
+    await asyncio.sleep(0.1)
+    # sensunits are never asked unless polling them is enabled
+    assert gateway.received.count(SENS_STATUS) == before
+    assert (controller.nodes[1].units[3].get_last_seen() == 0.0) == due
+
+
+async def test_confirmation_is_published(controller: PyDuotecno) -> None:
+    controller.enable_optimistic(1.0)
+    unit = controller.nodes[1].units[0]
+    assert isinstance(unit, SwitchUnit)
+    stream = controller.events(types=[UnitStateEvent], units=[(1, 0)])
+    await unit.turn_on()
+    optimistic = await asyncio.wait_for(stream.__anext__(), 2)
+    confirmation = await asyncio.wait_for(stream.__anext__(), 2)
+    assert (optimistic.changes, optimistic.pending) == ({"state": 1}, True)
+    assert (confirmation.changes, confirmation.pending) == ({"state": 1}, False)
+    stream.close()
+
+
+async def test_unanswered_command_expires(
+    controller: PyDuotecno, gateway: FakeGateway, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(unit_module, "CONFIRM_TIMEOUT", 0.1)
+    monkeypatch.setattr(gateway, "handle", lambda data: [])
+    unit = controller.nodes[1].units[0]
+    assert isinstance(unit, SwitchUnit)
+    await unit.turn_on()
+    await controller.flush()
+    assert unit.is_pending("state")
+    await asyncio.sleep(0.2)
+    assert not unit.is_pending()
+
+
+async def test_request_status_tells_if_it_was_sent(
+    controller: PyDuotecno, gateway: FakeGateway
+) -> None:
+    sent = len(gateway.received)
+    # unit 0 is a switch, unit 3 a sensunit
+    assert await controller.nodes[1].units[0].requestStatus()
+    assert not await controller.nodes[1].units[3].requestStatus()
+    await controller.flush()
+    await asyncio.sleep(0.1)
+    assert gateway.received[sent:] == ["[209,3,1,0,2]"]